@@ -1,19 +1,24 @@
 from datetime import datetime, timedelta, timezone
 from typing import Optional
 from jose import JWTError, jwt
-from passlib.context import CryptContext
 from fastapi import HTTPException, status, Depends
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from models.database import User, SessionLocal
-from config import get_required_env, get_required_secret
+from models.database import AsyncSessionLocal, SessionLocal
+from config import get_cached_secret, get_required_env
+from utils.token_cache import token_cache
+from utils.user_cache import user_cache
 
 
 # Configuration from environment variables and secrets
 def get_secret_key():
-    """Get secret key lazily to avoid import-time errors"""
-    return get_required_secret("secret_key")
+    """
+    Get secret key lazily to avoid import-time errors. It is re-read only
+    when the secret file changes.
+    """
+    return get_cached_secret("secret_key")
 
 
 ALGORITHM = get_required_env("ALGORITHM", "HS256")
@@ -21,23 +26,10 @@ ACCESS_TOKEN_EXPIRE_MINUTES = int(
     get_required_env("ACCESS_TOKEN_EXPIRE_MINUTES", "10080")
 )
 
-# Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
 # Security
 security = HTTPBearer()
 
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """Verify a password against its hash."""
-    return pwd_context.verify(plain_password, hashed_password)
-
-
-def get_password_hash(password: str) -> str:
-    """Hash a password."""
-    return pwd_context.hash(password)
-
-
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     """Create a JWT access token."""
     try:
@@ -70,8 +62,14 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
         raise
 
 
-def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)):
-    """Verify and decode JWT token."""
+async def verify_token(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+):
+    """
+    Verify and decode JWT token, or take its claims from token_cache.
+    Async only so it runs on the event loop instead of a threadpool hop;
+    it never waits on anything.
+    """
     token = credentials.credentials
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -83,6 +81,10 @@ def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)):
         if not secret_key:
             raise ValueError("Secret key not available for JWT verification")
 
+        claims = token_cache.get(token, secret_key)
+        if claims is not None:
+            return claims
+
         payload = jwt.decode(token, secret_key, algorithms=[ALGORITHM])
         username: Optional[str] = payload.get("sub")
         user_id: Optional[int] = payload.get("user_id")
@@ -90,7 +92,9 @@ def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)):
         if username is None or user_id is None:
             raise credentials_exception
 
-        return {"username": username, "user_id": user_id}
+        claims = {"username": username, "user_id": user_id}
+        token_cache.put(token, secret_key, claims, payload.get("exp"))
+        return claims
     except ValueError as e:
         print(f"JWT verification error: {e}")
         raise credentials_exception
@@ -108,16 +112,52 @@ def get_db():
         db.close()
 
 
+async def get_async_db():
+    """Get an asyncpg-backed session (DATABASE_ASYNC=true)."""
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+class CurrentUser:
+    """The authenticated user, built from verified token claims."""
+
+    __slots__ = ("id", "username")
+
+    def __init__(self, user_id: int, username: str):
+        self.id = user_id
+        self.username = username
+
+
 def get_current_user(
     token_data: dict = Depends(verify_token), db: Session = Depends(get_db)
-) -> User:
-    """Get current authenticated user."""
+) -> CurrentUser:
+    """
+    Get current authenticated user. The token is trusted for who the user
+    is; the `users` table is only consulted when user_cache has no recent
+    entry for them.
+    """
+    username = token_data["username"]
+    user_id = token_data["user_id"]
+
+    if not user_cache.exists(db, user_id, username):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found"
+        )
+    return CurrentUser(user_id, username)
+
+
+async def get_current_user_async(
+    token_data: dict = Depends(verify_token),
+    db: AsyncSession = Depends(get_async_db),
+) -> CurrentUser:
+    """get_current_user for the async routes."""
     username = token_data["username"]
     user_id = token_data["user_id"]
 
-    user = db.query(User).filter(User.username == username, User.id == user_id).first()
-    if user is None:
+    if not await db.run_sync(
+        lambda session: user_cache.exists(session, user_id, username)
+    ):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found"
         )
-    return user
+    return CurrentUser(user_id, username)
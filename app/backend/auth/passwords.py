@@ -0,0 +1,130 @@
+"""
+Password hashing for /auth/register and /auth/login.
+
+bcrypt is deliberately slow (a few hundred milliseconds of CPU per call),
+so the routes hand it to a small per-worker process pool, running at a
+lower CPU priority, instead of spending the request threads and the GIL
+that the name and vote routes share. The hasher returns the pool's future
+and the async routes await it, so a pending hash holds no thread at all.
+At most PASSWORD_HASH_MAX_PENDING calls may be queued or running per
+worker; beyond that PasswordHashingBusy is raised and the route answers 429
+with Retry-After instead of letting a login storm queue up.
+"""
+
+import multiprocessing
+import os
+import threading
+from concurrent.futures import (
+    Executor,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+)
+from typing import Optional
+
+from passlib.context import CryptContext
+
+from config import get_required_env
+
+# 0 hashes in a thread pool of the worker (still bounded by max pending)
+PASSWORD_HASH_PROCESSES = int(get_required_env("PASSWORD_HASH_PROCESSES", "2"))
+PASSWORD_HASH_MAX_PENDING = int(get_required_env("PASSWORD_HASH_MAX_PENDING", "4"))
+# Pool processes run at lower CPU priority so request handling comes first
+PASSWORD_HASH_NICE = int(get_required_env("PASSWORD_HASH_NICE", "10"))
+PASSWORD_HASH_RETRY_AFTER_SECONDS = 1
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+
+def verify_password(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password against its hash."""
+    return pwd_context.verify(plain_password, hashed_password)
+
+
+def get_password_hash(password: str) -> str:
+    """Hash a password."""
+    return pwd_context.hash(password)
+
+
+class PasswordHashingBusy(RuntimeError):
+    """Raised when too many hashing calls are already pending."""
+
+
+class PasswordHasher:
+    """Bounded process pool for bcrypt calls."""
+
+    def __init__(
+        self,
+        processes: int = PASSWORD_HASH_PROCESSES,
+        max_pending: int = PASSWORD_HASH_MAX_PENDING,
+    ):
+        self.processes = processes
+        self.max_pending = max_pending
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._executor: Optional[Executor] = None
+
+    def _create_executor(self) -> Executor:
+        if self.processes <= 0:
+            return ThreadPoolExecutor(
+                self.max_pending, thread_name_prefix="password-hash"
+            )
+        # Spawned, not forked: the worker has threads and open connections
+        return ProcessPoolExecutor(
+            self.processes,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=os.nice,
+            initargs=(PASSWORD_HASH_NICE,),
+        )
+
+    def start(self):
+        """Start the pool's processes ahead of the first login."""
+        with self._start_lock:
+            if self._executor is not None:
+                return
+            executor = self._create_executor()
+            for future in [executor.submit(int) for _ in range(self.processes)]:
+                future.result()
+            self._executor = executor
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
+
+    def _release(self, _future: Optional[Future] = None):
+        with self._lock:
+            self._pending -= 1
+
+    def _submit(self, function, *args) -> Future:
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise PasswordHashingBusy(
+                    f"{self._pending} password hashing calls already pending"
+                )
+            self._pending += 1
+        try:
+            if self._executor is None:
+                # Not started ahead (e.g. scripts): don't wait for warm-up
+                with self._start_lock:
+                    if self._executor is None:
+                        self._executor = self._create_executor()
+            future = self._executor.submit(function, *args)
+        except BaseException:
+            self._release()
+            raise
+        future.add_done_callback(self._release)
+        return future
+
+    def hash(self, password: str) -> "Future[str]":
+        """Hash a password in the pool; await with asyncio.wrap_future."""
+        return self._submit(get_password_hash, password)
+
+    def verify(self, plain_password: str, hashed_password: str) -> "Future[bool]":
+        """Check a password in the pool; await with asyncio.wrap_future."""
+        return self._submit(verify_password, plain_password, hashed_password)
+
+
+# Global instance
+password_hasher = PasswordHasher()
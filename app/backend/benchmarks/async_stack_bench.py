@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Load benchmark for the sync and async (DATABASE_ASYNC=true) database stacks.
+
+Drives the hot routes of one or more running servers with CONCURRENCY
+clients each, in a mix like the voting page produces: fetch random names,
+vote on them, page through the user's votes, page through popular names.
+Reports requests/s and latency percentiles per route and in total.
+
+Start one server per stack and pass both URLs (default BENCH_URL, or
+http://localhost:8000), e.g.:
+
+    DATABASE_ASYNC=false gunicorn main:app ... --bind 127.0.0.1:8001 &
+    DATABASE_ASYNC=true gunicorn main:app ... --bind 127.0.0.1:8002 &
+    python benchmarks/async_stack_bench.py http://localhost:8001 http://localhost:8002
+
+Each client is its own user (registered on first use); their votes are
+deleted afterwards.
+"""
+
+import asyncio
+import os
+import random
+import sys
+import time
+from collections import defaultdict
+
+import aiohttp
+
+DEFAULT_URL = os.getenv("BENCH_URL", "http://localhost:8000")
+SECONDS = 15
+CONCURRENCY = [16, 64]
+PASSWORD = "bench-password"
+VOTE_NAME_IDS = list(range(1, 2001))
+
+
+def percentile(values: list, fraction: float) -> float:
+    return sorted(values)[int(fraction * (len(values) - 1))] if values else 0.0
+
+
+async def get_token(session: aiohttp.ClientSession, api: str, username: str) -> str:
+    credentials = {"username": username, "password": PASSWORD}
+    path = "/auth/login"
+    while True:
+        async with session.post(api + path, json=credentials) as response:
+            if response.status == 429:
+                # Password hashing is busy: back off like the frontend would
+                await asyncio.sleep(float(response.headers.get("Retry-After", 1)))
+                continue
+            if response.status == 401 and path == "/auth/login":
+                path = "/auth/register"
+                continue
+            response.raise_for_status()
+            return (await response.json())["access_token"]
+
+
+def next_request() -> tuple:
+    """(route, method, path, params, json body), half of them votes."""
+    if random.random() < 0.5:
+        vote = {"name_id": random.choice(VOTE_NAME_IDS), "vote": True}
+        return "POST /votes/", "POST", "/votes/", None, vote
+    return random.choice(
+        [
+            ("GET /names/random", "GET", "/names/random", {"n": 10}, None),
+            ("GET /names/ordered", "GET", "/names/ordered", {"limit": 10}, None),
+            ("GET /votes/", "GET", "/votes/", {"limit": 20}, None),
+        ]
+    )
+
+
+async def client(session, api: str, token: str, deadline: float, results):
+    headers = {"Authorization": f"Bearer {token}"}
+    while time.monotonic() < deadline:
+        route, method, path, params, body = next_request()
+        started = time.perf_counter()
+        try:
+            async with session.request(
+                method, api + path, params=params, json=body, headers=headers
+            ) as response:
+                await response.read()
+                status = response.status
+        except aiohttp.ClientError:
+            status = 0
+        results[route].append((time.perf_counter() - started, status))
+
+
+async def cleanup(session, api: str, token: str):
+    headers = {"Authorization": f"Bearer {token}"}
+    while True:
+        async with session.get(
+            f"{api}/votes/", params={"limit": 100}, headers=headers
+        ) as response:
+            votes = (await response.json())["items"]
+        if not votes:
+            return
+        for vote in votes:
+            async with session.delete(
+                f"{api}/votes/by-name/{vote['name_id']}", headers=headers
+            ):
+                pass
+
+
+def report(label: str, results: list, seconds: float):
+    ok = [latency * 1000 for latency, status in results if status in (200, 204)]
+    failed = len(results) - len(ok)
+    print(
+        f"  {label:<20} {len(ok) / seconds:>8.1f} req/s  "
+        f"p50 {percentile(ok, 0.5):>7.1f}ms  p99 {percentile(ok, 0.99):>7.1f}ms"
+        f"  errors {failed}"
+    )
+
+
+async def run(base_url: str):
+    api = base_url.rstrip("/") + "/api"
+    connector = aiohttp.TCPConnector(limit=0)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        tokens = [
+            await get_token(session, api, f"bench_async_stack_{i}")
+            for i in range(max(CONCURRENCY))
+        ]
+        print(base_url)
+        try:
+            for concurrency in CONCURRENCY:
+                results = defaultdict(list)
+                deadline = time.monotonic() + SECONDS
+                await asyncio.gather(
+                    *(
+                        client(session, api, token, deadline, results)
+                        for token in tokens[:concurrency]
+                    )
+                )
+                print(f" {concurrency} clients")
+                for route in sorted(results):
+                    report(route, results[route], SECONDS)
+                report("total", sum(results.values(), []), SECONDS)
+        finally:
+            for token in tokens:
+                await cleanup(session, api, token)
+
+
+async def main():
+    for base_url in sys.argv[1:] or [DEFAULT_URL]:
+        await run(base_url)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Benchmark for GET /api/names/fuzzy's in-memory engine.
+
+Builds the bigram index over the names in data/*.csv, padded with
+spelling variants (random letter edits) up to CATALOG_SIZE names to stand
+in for a full multi-country catalog. It then times misspelled queries at
+each edit distance against a full scan with the same bounded Levenshtein.
+
+Usage: python benchmarks/fuzzy_search_bench.py
+"""
+
+import csv
+import random
+import statistics
+import string
+import sys
+import time
+from pathlib import Path
+
+# Add the backend directory to Python path (works both locally and in Docker)
+backend_dir = Path(__file__).parent.parent.absolute()
+sys.path.append(str(backend_dir))
+
+from utils.fuzzy_search import NgramIndex, bounded_levenshtein
+
+CATALOG_SIZE = 200_000
+QUERIES = 300
+SCAN_QUERIES = 5
+DISTANCES = [1, 2, 3]
+
+
+def misspell(name: str, rng: random.Random, edits: int) -> str:
+    letters = list(name)
+    for _ in range(edits):
+        position = rng.randrange(len(letters) + 1)
+        operation = rng.choice(("insert", "delete", "replace"))
+        if operation == "insert" or not letters:
+            letters.insert(position, rng.choice(string.ascii_lowercase))
+        elif operation == "delete" or position == len(letters):
+            del letters[min(position, len(letters) - 1)]
+        else:
+            letters[position] = rng.choice(string.ascii_lowercase)
+    return "".join(letters)
+
+
+def load_names(rng: random.Random) -> list:
+    names = []
+    for path in sorted((backend_dir / "data").glob("*.csv")):
+        with open(path, encoding="utf-8") as file:
+            names.extend(row["name"] for row in csv.DictReader(file))
+    base = list(names)
+    while len(names) < CATALOG_SIZE:
+        names.append(misspell(rng.choice(base), rng, rng.randint(1, 2)))
+    return names
+
+
+def percentile(values: list, fraction: float) -> float:
+    return sorted(values)[int(fraction * (len(values) - 1))]
+
+
+def main():
+    rng = random.Random(7)
+    names = load_names(rng)
+
+    started = time.perf_counter()
+    index = NgramIndex([(name, name_id) for name_id, name in enumerate(names, 1)])
+    print(
+        f"{len(names)} names, {len(index.keys)} distinct folded, "
+        f"build {time.perf_counter() - started:.2f}s"
+    )
+
+    print(f"{'k':>3} {'p50 ms':>8} {'p99 ms':>8} {'scan ms':>9} {'hits':>6}")
+    for k in DISTANCES:
+        queries = [
+            misspell(rng.choice(index.keys), rng, rng.randint(0, k))
+            for _ in range(QUERIES)
+        ]
+        timings, hits = [], []
+        for query in queries:
+            started = time.perf_counter()
+            hits.append(len(index.search(query, k, 20)))
+            timings.append((time.perf_counter() - started) * 1000)
+
+        started = time.perf_counter()
+        for query in queries[:SCAN_QUERIES]:
+            [
+                key
+                for key in index.keys
+                if bounded_levenshtein(query, key, k) is not None
+            ]
+        scan = (time.perf_counter() - started) * 1000 / SCAN_QUERIES
+
+        print(
+            f"{k:>3} {statistics.median(timings):>8.2f} "
+            f"{percentile(timings, 0.99):>8.2f} {scan:>9.1f} "
+            f"{statistics.mean(hits):>6.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Load benchmark for password hashing under login storms.
+
+Runs against a live server (BENCH_URL, default http://localhost:8000):
+
+1. login throughput: LOGIN_THREADS clients log in as fast as they can;
+   reports successful logins/s, 429s (hashing queue full) and latency.
+2. vote latency: VOTE_THREADS clients cast votes, first on an idle server,
+   then while the login storm runs.
+
+Start the server once with the hashing pool (default) and once with
+PASSWORD_HASH_PROCESSES=0, which hashes on threads of the worker process
+(sharing its GIL with the request handlers), to compare. The benchmark user's votes are deleted afterwards.
+
+Usage:
+    python benchmarks/login_storm_bench.py
+"""
+
+import os
+import random
+import threading
+import time
+
+import requests
+
+BASE_URL = os.getenv("BENCH_URL", "http://localhost:8000").rstrip("/") + "/api"
+USERNAME = "bench_login_storm"
+PASSWORD = "bench-password"
+SECONDS = 10
+LOGIN_THREADS = 32
+VOTE_THREADS = 4
+VOTE_NAME_IDS = list(range(1, 201))
+
+
+def percentile(values: list, fraction: float) -> float:
+    return sorted(values)[int(fraction * (len(values) - 1))] if values else 0.0
+
+
+def login(session: requests.Session) -> requests.Response:
+    return session.post(
+        f"{BASE_URL}/auth/login", json={"username": USERNAME, "password": PASSWORD}
+    )
+
+
+def get_token() -> str:
+    with requests.Session() as session:
+        response = login(session)
+        if response.status_code == 401:
+            response = session.post(
+                f"{BASE_URL}/auth/register",
+                json={"username": USERNAME, "password": PASSWORD},
+            )
+        response.raise_for_status()
+        return response.json()["access_token"]
+
+
+def run_clients(threads: int, request, stop: threading.Event) -> tuple:
+    """Run `request(session)` in a loop on each thread until stopped.
+    Returns the (seconds, status_code) results list and the threads."""
+    results = []
+    lock = threading.Lock()
+
+    def client():
+        with requests.Session() as session:
+            while not stop.is_set():
+                started = time.perf_counter()
+                try:
+                    response = request(session)
+                    status = response.status_code
+                except requests.ConnectionError:
+                    status = 0
+                with lock:
+                    results.append((time.perf_counter() - started, status))
+                if status == 429:
+                    # Back off like the frontend would
+                    stop.wait(float(response.headers.get("Retry-After", 1)))
+
+    workers = [threading.Thread(target=client) for _ in range(threads)]
+    for worker in workers:
+        worker.start()
+    return results, workers
+
+
+def measure(threads: int, request, seconds: float = SECONDS) -> list:
+    stop = threading.Event()
+    results, workers = run_clients(threads, request, stop)
+    time.sleep(seconds)
+    stop.set()
+    for worker in workers:
+        worker.join()
+    return results
+
+
+def report(label: str, results: list, seconds: float = SECONDS):
+    ok = [latency * 1000 for latency, status in results if status == 200]
+    rejected = sum(1 for _, status in results if status == 429)
+    failed = len(results) - len(ok) - rejected
+    print(
+        f"{label:<28} {len(ok) / seconds:>8.1f}/s  p50 {percentile(ok, 0.5):>7.1f}ms"
+        f"  p99 {percentile(ok, 0.99):>7.1f}ms  429s {rejected:>5}  errors {failed}"
+    )
+
+
+def main():
+    token = get_token()
+    headers = {"Authorization": f"Bearer {token}"}
+
+    def vote(session: requests.Session) -> requests.Response:
+        return session.post(
+            f"{BASE_URL}/votes/",
+            json={
+                "name_id": random.choice(VOTE_NAME_IDS),
+                "vote": random.random() < 0.5,
+            },
+            headers=headers,
+        )
+
+    report("login storm", measure(LOGIN_THREADS, login))
+    report("votes, idle", measure(VOTE_THREADS, vote))
+
+    stop = threading.Event()
+    _, login_workers = run_clients(LOGIN_THREADS, login, stop)
+    try:
+        report("votes, during login storm", measure(VOTE_THREADS, vote))
+    finally:
+        stop.set()
+        for worker in login_workers:
+            worker.join()
+
+    with requests.Session() as session:
+        for name_id in VOTE_NAME_IDS:
+            session.delete(f"{BASE_URL}/votes/by-name/{name_id}", headers=headers)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Benchmark sort_order=most_popular on the database path of /api/names/random.
+
+Compares the previous approach (fetch every eligible row, sort in Python,
+take n) with the index-backed ORDER BY count DESC, id LIMIT n query per
+gender. Runs against temporary tables seeded with 10k, 100k and 1M names.
+
+Usage (inside the backend container):
+    python benchmarks/popular_names_bench.py
+"""
+
+import sys
+import time
+from pathlib import Path
+
+# Add the backend directory to Python path (works both locally and in Docker)
+backend_dir = Path(__file__).parent.parent.absolute()
+sys.path.append(str(backend_dir))
+
+from sqlalchemy import text
+
+from models.database import engine
+from random_sampling_bench import SEED_SQL, SETUP_SQL, SIZES, VOTED
+
+N = 10
+RUNS = 200
+LEGACY_RUNS = 10
+
+INDEX_SQL = """
+CREATE INDEX ON bench_names (gender, count DESC NULLS LAST, id)
+"""
+
+LEGACY_SQL = """
+SELECT * FROM bench_names
+WHERE gender IN ('m', 'f')
+  AND id NOT IN (SELECT name_id FROM bench_votes WHERE user_id = 1)
+"""
+
+INDEXED_SQL = """
+SELECT * FROM (
+    (SELECT * FROM bench_names
+     WHERE gender = 'm'
+       AND id NOT IN (SELECT name_id FROM bench_votes WHERE user_id = 1)
+     ORDER BY count DESC NULLS LAST, id LIMIT :n)
+    UNION ALL
+    (SELECT * FROM bench_names
+     WHERE gender = 'f'
+       AND id NOT IN (SELECT name_id FROM bench_votes WHERE user_id = 1)
+     ORDER BY count DESC NULLS LAST, id LIMIT :n)
+) AS ranked
+ORDER BY count DESC NULLS LAST, id
+LIMIT :n
+"""
+
+
+def legacy_popular(conn):
+    rows = conn.execute(text(LEGACY_SQL)).all()
+    return sorted(rows, key=lambda row: row.count, reverse=True)[:N]
+
+
+def indexed_popular(conn):
+    return conn.execute(text(INDEXED_SQL), {"n": N}).all()
+
+
+def percentiles(fn, conn, runs):
+    fn(conn)  # warm up
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        fn(conn)
+        timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+    return timings[len(timings) // 2], timings[max(0, int(len(timings) * 0.99) - 1)]
+
+
+def main():
+    print(
+        f"{'names':>10} {'legacy p50':>11} {'legacy p99':>11} "
+        f"{'indexed p50':>12} {'indexed p99':>12}   (ms)"
+    )
+    with engine.connect() as conn:
+        conn.execute(text(SETUP_SQL))
+        conn.execute(text(INDEX_SQL))
+        for size in SIZES:
+            conn.execute(text("TRUNCATE bench_names, bench_votes"))
+            for statement in SEED_SQL.strip().split(";"):
+                if statement.strip():
+                    conn.execute(text(statement), {"size": size, "voted": VOTED})
+
+            # Same answer, different cost
+            assert [row.id for row in legacy_popular(conn)] == [
+                row.id for row in indexed_popular(conn)
+            ]
+
+            legacy_p50, legacy_p99 = percentiles(legacy_popular, conn, LEGACY_RUNS)
+            indexed_p50, indexed_p99 = percentiles(indexed_popular, conn, RUNS)
+            print(
+                f"{size:>10} {legacy_p50:>11.1f} {legacy_p99:>11.1f} "
+                f"{indexed_p50:>12.2f} {indexed_p99:>12.2f}"
+            )
+        conn.rollback()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Benchmark the SQL sampling engine (RANDOM_SAMPLING_ENGINE=sql) against the
+previous in-Python approach for /api/names/random.
+
+Both run against temporary copies of the names/votes tables seeded with
+10k, 100k and 1M synthetic names, so the real data is never touched:
+
+- python: fetch every eligible row, then random.choices + dedupe
+- sql:    ORDER BY -ln(1 - random()) / count LIMIT n in Postgres
+
+Usage (inside the backend container):
+    python benchmarks/random_sampling_bench.py
+"""
+
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+# Add the backend directory to Python path (works both locally and in Docker)
+backend_dir = Path(__file__).parent.parent.absolute()
+sys.path.append(str(backend_dir))
+
+from sqlalchemy import text
+
+from models.database import engine
+
+SIZES = [10_000, 100_000, 1_000_000]
+N = 10
+VOTED = 2_000
+RUNS = 20
+
+SETUP_SQL = """
+CREATE TEMP TABLE bench_names (
+    id integer PRIMARY KEY,
+    source text NOT NULL,
+    name text NOT NULL,
+    gender text,
+    rank integer,
+    count integer,
+    info jsonb
+);
+CREATE TEMP TABLE bench_votes (
+    user_id integer NOT NULL,
+    name_id integer NOT NULL,
+    vote boolean NOT NULL,
+    UNIQUE (user_id, name_id)
+);
+"""
+
+SEED_SQL = """
+INSERT INTO bench_names
+SELECT i,
+       'Bench',
+       'Name' || i,
+       CASE WHEN i % 2 = 0 THEN 'f' ELSE 'm' END,
+       i,
+       greatest(1, (5000 / power(i, 1.1))::integer),
+       jsonb_build_object('Herkunft', repeat('x', 200), 'ipa', 'ˈnaːmə')
+FROM generate_series(1, :size) AS i;
+INSERT INTO bench_votes
+SELECT 1, i, i % 3 = 0 FROM generate_series(1, :voted) AS i;
+ANALYZE bench_names;
+ANALYZE bench_votes;
+"""
+
+PYTHON_SQL = """
+SELECT * FROM bench_names
+WHERE gender = 'f'
+  AND id NOT IN (SELECT name_id FROM bench_votes WHERE user_id = 1)
+"""
+
+ENGINE_SQL = """
+SELECT * FROM bench_names
+WHERE gender = 'f'
+  AND id NOT IN (SELECT name_id FROM bench_votes WHERE user_id = 1)
+ORDER BY -ln(1.0 - random()) / nullif(greatest(count, 0), 0) NULLS LAST
+LIMIT :n
+"""
+
+
+def python_sample(conn):
+    rows = conn.execute(text(PYTHON_SQL)).all()
+    weights = [row.count for row in rows]
+    selected = random.choices(rows, weights=weights, k=N * 2)
+    return list({row.id: row for row in selected}.values())[:N]
+
+
+def sql_sample(conn):
+    return conn.execute(text(ENGINE_SQL), {"n": N}).all()
+
+
+def measure(fn, conn):
+    fn(conn)  # warm up
+    timings = []
+    for _ in range(RUNS):
+        started = time.perf_counter()
+        fn(conn)
+        timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+    return statistics.mean(timings), timings[int(len(timings) * 0.95) - 1]
+
+
+def main():
+    print(
+        f"{'names':>10} {'python mean':>12} {'python p95':>11} "
+        f"{'sql mean':>10} {'sql p95':>9}   (ms)"
+    )
+    with engine.connect() as conn:
+        conn.execute(text(SETUP_SQL))
+        for size in SIZES:
+            conn.execute(text("TRUNCATE bench_names, bench_votes"))
+            for statement in SEED_SQL.strip().split(";"):
+                if statement.strip():
+                    conn.execute(text(statement), {"size": size, "voted": VOTED})
+
+            python_mean, python_p95 = measure(python_sample, conn)
+            sql_mean, sql_p95 = measure(sql_sample, conn)
+            print(
+                f"{size:>10} {python_mean:>12.1f} {python_p95:>11.1f} "
+                f"{sql_mean:>10.1f} {sql_p95:>9.1f}"
+            )
+        conn.rollback()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the sort_order=recommended offline build and scoring.
+
+Generates synthetic votes for USERS users over NAMES names (each user has
+a hidden taste vector; they vote on popular-ish names and like the ones
+that match their taste), times compute_neighbours() on them, then times
+scoring for users with a growing number of votes.
+
+Usage: python benchmarks/recommendations_bench.py
+"""
+
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Add the backend directory to Python path (works both locally and in Docker)
+backend_dir = Path(__file__).parent.parent.absolute()
+sys.path.append(str(backend_dir))
+
+from utils.recommendations import NameNeighbours, compute_neighbours
+
+USERS = 100_000
+NAMES = 10_000
+VOTES_PER_USER = 50
+FACTORS = 8
+SCORING_VOTES = [10, 100, 1_000]
+SCORING_REQUESTS = 200
+
+
+def synthetic_votes(rng: np.random.Generator):
+    """(user_ids, name_ids, votes) with Zipf-like name popularity."""
+    popularity = 1 / np.arange(1, NAMES + 1) ** 0.8
+    popularity /= popularity.sum()
+    user_taste = rng.standard_normal((USERS, FACTORS)).astype(np.float32)
+    name_taste = rng.standard_normal((NAMES, FACTORS)).astype(np.float32)
+
+    user_ids = np.repeat(np.arange(1, USERS + 1), VOTES_PER_USER)
+    name_ids = rng.choice(NAMES, size=len(user_ids), p=popularity)
+    affinity = np.einsum("ij,ij->i", user_taste[user_ids - 1], name_taste[name_ids])
+    votes = affinity + rng.standard_normal(len(affinity)) > 0
+
+    # One vote per (user, name), like the unique constraint
+    keys = np.unique(user_ids.astype(np.int64) * NAMES + name_ids, return_index=True)[1]
+    return user_ids[keys], name_ids[keys] + 1, votes[keys]
+
+
+def to_mask(ids) -> int:
+    mask = 0
+    for name_id in ids:
+        mask |= 1 << int(name_id)
+    return mask
+
+
+def main():
+    rng = np.random.default_rng(42)
+    user_ids, name_ids, votes = synthetic_votes(rng)
+    print(f"{USERS} users x {NAMES} names, {len(votes)} votes")
+
+    started = time.perf_counter()
+    arrays = compute_neighbours(user_ids, name_ids, votes)
+    print(
+        f"offline build: {time.perf_counter() - started:.1f}s, "
+        f"{len(arrays['indices'])} neighbours stored"
+    )
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = f"{tmp}/neighbours.npz"
+        np.savez(path, built_at=np.array(time.time()), **arrays)
+        neighbours = NameNeighbours(path)
+        neighbours.load()
+
+        print(f"{'votes':>8} {'ms/request':>12}")
+        for count in SCORING_VOTES:
+            voted = rng.choice(np.arange(1, NAMES + 1), size=count, replace=False)
+            liked = to_mask(voted[: count // 2])
+            disliked = to_mask(voted[count // 2 :])
+            started = time.perf_counter()
+            for _ in range(SCORING_REQUESTS):
+                neighbours.ranked(liked, disliked)
+            elapsed = (time.perf_counter() - started) / SCORING_REQUESTS
+            print(f"{count:>8} {elapsed * 1000:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Load benchmark for POST /api/votes/ write path.
+
+Compares the previous four round trips per vote (Name lookup, Vote lookup,
+UPDATE/INSERT + COMMIT, refresh) with the single
+INSERT ... ON CONFLICT (user_id, name_id) DO UPDATE ... RETURNING statement.
+Each worker thread owns one connection and casts votes for its own user as
+fast as it can against copies of the names/votes tables in a throwaway
+`vote_bench` schema (temporary tables are not shared across connections).
+Votes go to random names, so later ones increasingly flip earlier ones.
+
+Usage (inside the backend container):
+    python benchmarks/vote_upsert_bench.py
+"""
+
+import random
+import sys
+import threading
+import time
+from pathlib import Path
+
+# Add the backend directory to Python path (works both locally and in Docker)
+backend_dir = Path(__file__).parent.parent.absolute()
+sys.path.append(str(backend_dir))
+
+from sqlalchemy import text
+
+from models.database import engine
+
+NAMES = 20_000
+SECONDS = 5
+WORKERS = [1, 4]
+
+SETUP_SQL = """
+CREATE TABLE bench_names (
+    id integer PRIMARY KEY,
+    name text NOT NULL
+);
+CREATE TABLE bench_votes (
+    id serial PRIMARY KEY,
+    user_id integer NOT NULL,
+    name_id integer NOT NULL REFERENCES bench_names (id),
+    vote boolean NOT NULL,
+    CONSTRAINT bench_unique_user_name_vote UNIQUE (user_id, name_id)
+);
+INSERT INTO bench_names SELECT i, 'Name' || i FROM generate_series(1, :names) AS i;
+ANALYZE bench_names;
+"""
+
+
+def legacy_vote(conn, user_id: int, name_id: int, vote: bool):
+    conn.execute(text("SELECT * FROM bench_names WHERE id = :id"), {"id": name_id})
+    existing = conn.execute(
+        text("SELECT id FROM bench_votes WHERE user_id = :u AND name_id = :n"),
+        {"u": user_id, "n": name_id},
+    ).first()
+    if existing:
+        conn.execute(
+            text("UPDATE bench_votes SET vote = :v WHERE id = :id"),
+            {"v": vote, "id": existing.id},
+        )
+        vote_id = existing.id
+    else:
+        vote_id = conn.execute(
+            text(
+                "INSERT INTO bench_votes (user_id, name_id, vote) "
+                "VALUES (:u, :n, :v) RETURNING id"
+            ),
+            {"u": user_id, "n": name_id, "v": vote},
+        ).scalar()
+    conn.commit()
+    conn.execute(text("SELECT * FROM bench_votes WHERE id = :id"), {"id": vote_id})
+    conn.commit()
+
+
+def upsert_vote(conn, user_id: int, name_id: int, vote: bool):
+    conn.execute(
+        text(
+            """
+            INSERT INTO bench_votes (user_id, name_id, vote)
+            VALUES (:u, :n, :v)
+            ON CONFLICT ON CONSTRAINT bench_unique_user_name_vote
+            DO UPDATE SET vote = EXCLUDED.vote
+            RETURNING id, name_id, vote
+            """
+        ),
+        {"u": user_id, "n": name_id, "v": vote},
+    ).one()
+    conn.commit()
+
+
+def worker(fn, user_id: int, deadline: float, done: list):
+    rng = random.Random(user_id)
+    with engine.connect() as conn:
+        conn.execute(text("SET search_path TO vote_bench"))
+        votes = 0
+        while time.perf_counter() < deadline:
+            fn(conn, user_id, rng.randint(1, NAMES), rng.random() < 0.5)
+            votes += 1
+    done.append(votes)
+
+
+def run(fn, workers: int, user_offset: int) -> float:
+    done: list = []
+    deadline = time.perf_counter() + SECONDS
+    threads = [
+        threading.Thread(target=worker, args=(fn, user_offset + i, deadline, done))
+        for i in range(workers)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return sum(done) / SECONDS
+
+
+def main():
+    with engine.begin() as conn:
+        conn.execute(text("DROP SCHEMA IF EXISTS vote_bench CASCADE"))
+        conn.execute(text("CREATE SCHEMA vote_bench"))
+        conn.execute(text("SET LOCAL search_path TO vote_bench"))
+        for statement in SETUP_SQL.strip().split(";"):
+            if statement.strip():
+                conn.execute(text(statement), {"names": NAMES})
+
+    try:
+        print(
+            f"{'workers':>8} {'legacy':>10} {'upsert':>10} {'speedup':>8}"
+            "   (votes/s per worker)"
+        )
+        for workers in WORKERS:
+            legacy = run(legacy_vote, workers, user_offset=1000 * workers) / workers
+            upsert = (
+                run(upsert_vote, workers, user_offset=1000 * workers + 500) / workers
+            )
+            print(
+                f"{workers:>8} {legacy:>10.0f} {upsert:>10.0f} {upsert / legacy:>7.2f}x"
+            )
+    finally:
+        with engine.begin() as conn:
+            conn.execute(text("DROP SCHEMA IF EXISTS vote_bench CASCADE"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for the /api/names/random sampling engine.
+
+Compares the alias-table sampler against the previous approach
+(random.choices over the whole eligible list, then dedupe) on synthetic
+catalogs of growing size. Per-request cost of the alias sampler should stay
+flat while the old approach grows linearly with the catalog.
+
+Usage: python benchmarks/weighted_sampler_bench.py
+"""
+
+import random
+import sys
+import time
+from pathlib import Path
+
+# Add the backend directory to Python path (works both locally and in Docker)
+backend_dir = Path(__file__).parent.parent.absolute()
+sys.path.append(str(backend_dir))
+
+from utils.weighted_sampler import AliasTable
+
+SIZES = [10_000, 100_000, 1_000_000]
+N = 10
+VOTED = 2_000
+REQUESTS = 2_000
+LEGACY_REQUESTS = 50
+
+
+def zipf_counts(size: int) -> list:
+    """Name popularity is heavy-tailed: a few names carry most of the weight."""
+    return [max(1, int(5000 / (rank + 1) ** 1.1)) for rank in range(size)]
+
+
+def legacy_sample(rows, weights, voted, n):
+    eligible = [row for row in rows if row not in voted]
+    eligible_weights = [weights[row] for row in eligible]
+    selected = random.choices(eligible, weights=eligible_weights, k=n * 2)
+    return list(dict.fromkeys(selected))[:n]
+
+
+def time_per_request(fn, requests: int) -> float:
+    started = time.perf_counter()
+    for _ in range(requests):
+        fn()
+    return (time.perf_counter() - started) / requests * 1e6
+
+
+def main():
+    print(f"{'names':>10} {'build ms':>10} {'alias us/req':>14} {'legacy us/req':>14}")
+    for size in SIZES:
+        rows = list(range(size))
+        weights = zipf_counts(size)
+        # Voted names skew towards the popular ones, like real users
+        voted = set(random.sample(range(min(size, VOTED * 5)), VOTED))
+
+        started = time.perf_counter()
+        table = AliasTable(rows, weights)
+        build_ms = (time.perf_counter() - started) * 1000
+
+        alias_us = time_per_request(
+            lambda: table.sample(N, is_excluded=voted.__contains__), REQUESTS
+        )
+        legacy_us = time_per_request(
+            lambda: legacy_sample(rows, weights, voted, N), LEGACY_REQUESTS
+        )
+
+        short = sum(
+            len(table.sample(N, is_excluded=voted.__contains__)) < N for _ in range(200)
+        )
+        print(
+            f"{size:>10} {build_ms:>10.1f} {alias_us:>14.1f} {legacy_us:>14.1f}"
+            + (f"  ({short} short samples!)" if short else "")
+        )
+
+
+if __name__ == "__main__":
+    main()
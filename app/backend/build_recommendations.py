@@ -0,0 +1,26 @@
+#!/usr/bin/env python3
+"""
+Offline job for sort_order=recommended: recompute the item-item neighbour
+lists from the votes table and publish them to RECOMMENDATION_PATH.
+Running workers pick up the new file within RECOMMENDATION_RELOAD_SECONDS.
+
+Usage (inside the backend container, e.g. from cron):
+    python build_recommendations.py
+"""
+
+import time
+
+from utils.recommendations import RECOMMENDATION_PATH, build_neighbours_file
+
+
+def main():
+    started = time.perf_counter()
+    names = build_neighbours_file(RECOMMENDATION_PATH)
+    print(
+        f"Wrote neighbours for {names} names to {RECOMMENDATION_PATH} "
+        f"in {time.perf_counter() - started:.1f}s"
+    )
+
+
+if __name__ == "__main__":
+    main()
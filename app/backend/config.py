@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
 import os
 
 
@@ -61,6 +61,29 @@ def get_required_secret(
     return secret_value
 
 
+# secret name -> (file identity, value) for get_cached_secret
+_secret_cache: Dict[str, Tuple[Optional[tuple], str]] = {}
+
+
+def get_cached_secret(secret_name: str, fallback_default: Optional[str] = None) -> str:
+    """
+    Like get_required_secret, but only re-reads the secret when its file
+    changes (inode, mtime or size), e.g. after a key rotation.
+    """
+    try:
+        stat = os.stat(f"/run/secrets/{secret_name}")
+        file_id = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+    except OSError:
+        file_id = None
+
+    cached = _secret_cache.get(secret_name)
+    if cached is not None and cached[0] == file_id:
+        return cached[1]
+    value = get_required_secret(secret_name, fallback_default)
+    _secret_cache[secret_name] = (file_id, value)
+    return value
+
+
 class Settings(BaseSettings):
     # Database (from Docker Compose environment)
     postgres_user: str = get_required_env("POSTGRES_USER")
@@ -6,13 +6,28 @@ Supports both hardcoded data and CSV loading
 import csv
 import os
 from pathlib import Path
+from alembic import command
+from alembic.config import Config
 from sqlalchemy.orm import Session
-from models.database import engine, SessionLocal, Base, User, Name
-from auth.auth_utils import get_password_hash
+from models.database import SessionLocal, User, Name, Source
+from auth.passwords import get_password_hash
+from utils.logging_config import ERROR_LOGGER
+from utils.phonetics import phonetic_keys
+from utils.user_cache import user_cache
 
 
-def load_names_from_csv(file_path: str) -> list:
+def get_source(db: Session, sources: dict, name: str) -> Source:
+    """Return the Source row for `name`, creating it on first use."""
+    source = sources.get(name)
+    if source is None:
+        source = db.query(Source).filter(Source.name == name).first()
+        sources[name] = source or Source(name=name)
+    return sources[name]
+
+
+def load_names_from_csv(db: Session, file_path: str) -> list:
     """Load names from CSV file."""
+    sources = {}
     names = []
     if not os.path.exists(file_path):
         print(f"CSV file not found: {file_path}")
@@ -23,8 +38,9 @@ def load_names_from_csv(file_path: str) -> list:
             reader = csv.DictReader(file)
             for row in reader:
                 name = Name(
-                    source=row["source"],
+                    source_ref=get_source(db, sources, row["source"]),
                     name=row["name"],
+                    phonetic_keys=phonetic_keys(row["name"], row["source"]),
                     gender=row.get("gender", "").lower() if row.get("gender") else None,
                     rank=(
                         int(row["rank"])
@@ -45,34 +61,56 @@ def load_names_from_csv(file_path: str) -> list:
     return names
 
 
-def get_sample_names():
+def get_sample_names(db: Session):
     """Get sample names (fallback if no CSV)."""
+    sources = {}
+    samples = [
+        ("Austria", "Emma", "f", 1, 1200),
+        ("Austria", "Anna", "f", 2, 1100),
+        ("Austria", "Liam", "m", 1, 1300),
+        ("Austria", "Noah", "m", 2, 1250),
+        ("Germany", "Sofia", "f", 1, 2000),
+        ("Germany", "Maria", "f", 2, 1900),
+        ("Germany", "Leon", "m", 1, 2100),
+        ("Germany", "Ben", "m", 2, 2050),
+        ("Switzerland", "Mia", "f", 1, 800),
+        ("Switzerland", "Elena", "f", 2, 750),
+        ("Switzerland", "David", "m", 1, 850),
+        ("Switzerland", "Julian", "m", 2, 800),
+    ]
     return [
-        Name(source="Austria", name="Emma", gender="f", rank=1, count=1200),
-        Name(source="Austria", name="Anna", gender="f", rank=2, count=1100),
-        Name(source="Austria", name="Liam", gender="m", rank=1, count=1300),
-        Name(source="Austria", name="Noah", gender="m", rank=2, count=1250),
-        Name(source="Germany", name="Sofia", gender="f", rank=1, count=2000),
-        Name(source="Germany", name="Maria", gender="f", rank=2, count=1900),
-        Name(source="Germany", name="Leon", gender="m", rank=1, count=2100),
-        Name(source="Germany", name="Ben", gender="m", rank=2, count=2050),
-        Name(source="Switzerland", name="Mia", gender="f", rank=1, count=800),
-        Name(source="Switzerland", name="Elena", gender="f", rank=2, count=750),
-        Name(source="Switzerland", name="David", gender="m", rank=1, count=850),
-        Name(source="Switzerland", name="Julian", gender="m", rank=2, count=800),
+        Name(
+            source_ref=get_source(db, sources, source),
+            name=name,
+            phonetic_keys=phonetic_keys(name, source),
+            gender=gender,
+            rank=rank,
+            count=count,
+        )
+        for source, name, gender, rank, count in samples
     ]
 
 
+def run_migrations():
+    """Upgrade the database schema to the latest Alembic revision."""
+    backend_dir = Path(__file__).parent.absolute()
+    alembic_cfg = Config(str(backend_dir / "alembic.ini"))
+    alembic_cfg.set_main_option("script_location", str(backend_dir / "migrations"))
+    # Keep the app's logging configuration intact
+    alembic_cfg.attributes["configure_logger"] = False
+    command.upgrade(alembic_cfg, "head")
+
+
 def init_db(force_reload: bool = False):
     """Initialize database with tables and sample data."""
-    # Create all tables (with error handling for existing tables)
+    # Create or upgrade the schema through the Alembic migrations
     try:
-        Base.metadata.create_all(bind=engine)
-        print("Database tables created or verified.")
+        run_migrations()
+        print("Database migrations applied.")
     except Exception as e:
-        print(f"Table creation note: {e}")
-        # This might happen if tables already exist, which is usually fine
-        # We'll continue with data initialization
+        # Never start on a half-migrated schema
+        ERROR_LOGGER.error(f"Database migration failed: {e}")
+        raise
 
     db = SessionLocal()
 
@@ -87,8 +125,11 @@ def init_db(force_reload: bool = False):
         if force_reload:
             print("Force reload: Clearing existing data...")
             db.query(Name).delete()
+            user_ids = [user_id for (user_id,) in db.query(User.id)]
             db.query(User).delete()
             db.commit()
+            for user_id in user_ids:
+                user_cache.invalidate(user_id)
 
         # Create sample users
         users = [
@@ -101,11 +142,11 @@ def init_db(force_reload: bool = False):
 
         # Load names from CSV or use sample data
         csv_path = "data/Austria.csv"
-        names = load_names_from_csv(csv_path)
+        names = load_names_from_csv(db, csv_path)
 
         if not names:
             print("No CSV data found, using sample data...")
-            names = get_sample_names()
+            names = get_sample_names(db)
 
         for name in names:
             db.add(name)
@@ -3,15 +3,17 @@ from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy.orm import Session
 import uvicorn
+import asyncio
 from contextlib import asynccontextmanager
 import os
 from datetime import datetime
 from dotenv import load_dotenv
 from datetime import datetime
 
-from models.database import engine, SessionLocal, Base
+from models.database import DATABASE_ASYNC, async_engine, engine, SessionLocal, Base
 from routes import auth, names, votes
 from auth.auth_utils import verify_token
+from auth.passwords import password_hasher
 from init_db import init_db
 
 # Import logging and middleware
@@ -23,8 +25,20 @@ from utils.logging_config import (
     force_log_rotation,
 )
 from utils.middleware import RequestLoggingMiddleware, ErrorHandlingMiddleware
-from utils.exception_handlers import http_exception_handler, general_exception_handler
+from utils.exception_handlers import (
+    general_exception_handler,
+    http_exception_handler,
+    votes_not_flushed_handler,
+)
 from utils.telegram_notifier import telegram_notifier
+from utils.fuzzy_search import fuzzy_search
+from utils.leaderboard import leaderboard
+from utils.name_catalog import name_catalog
+from utils.name_search import name_search
+from utils.name_similarity import name_similarity
+from utils.recommendations import name_neighbours
+from utils.vote_queue import VotesNotFlushed, vote_queue
+from utils.vote_stats import vote_stats
 
 # Load environment variables
 load_dotenv()
@@ -38,10 +52,78 @@ async def lifespan(app: FastAPI):
     APP_LOGGER.info("Starting up: Initializing database...")
     init_db(force_reload=os.getenv("FORCE_DB_RELOAD", "false").lower() == "true")
 
+    # Build (or map) the shared name catalog and keep it in sync with the db
+    catalog_refresh_task = None
+    if name_catalog.enabled:
+        try:
+            name_catalog.refresh()
+        except Exception as e:
+            APP_LOGGER.error(f"Name catalog unavailable, serving from db: {e}")
+        catalog_refresh_task = asyncio.create_task(name_catalog.run_refresh_loop())
+
+    # Build the /names/{id}/similar, /names/search and /names/fuzzy indexes
+    # before the first request; catalog changes rebuild them in the background
+    if name_catalog.get() is not None:
+        name_similarity.rebuild(name_catalog.get())
+        name_search.rebuild(name_catalog.get())
+        fuzzy_search.rebuild(name_catalog.get())
+
+    # Per-name like/dislike snapshot for include_stats, plus drift repair
+    try:
+        vote_stats.refresh()
+    except Exception as e:
+        APP_LOGGER.error(f"Vote stats unavailable until next refresh: {e}")
+    vote_stats_tasks = [
+        asyncio.create_task(vote_stats.run_refresh_loop()),
+        asyncio.create_task(vote_stats.run_reconcile_loop()),
+    ]
+
+    # Most-liked / most-disliked names, patched by vote writes in between
+    try:
+        leaderboard.rebuild()
+    except Exception as e:
+        APP_LOGGER.error(f"Leaderboard unavailable until next rebuild: {e}")
+    leaderboard_task = asyncio.create_task(leaderboard.run_rebuild_loop())
+
+    # Neighbour lists for sort_order=recommended, built by build_recommendations.py
+    try:
+        name_neighbours.load()
+    except Exception as e:
+        APP_LOGGER.error(f"Name neighbours unavailable until next reload: {e}")
+    neighbours_task = asyncio.create_task(name_neighbours.run_reload_loop())
+
+    # bcrypt runs in its own processes, off the request threads
+    await asyncio.to_thread(password_hasher.start)
+
+    # Group-commit queued votes in the background (VOTE_WRITE_BEHIND)
+    vote_flush_task = None
+    if vote_queue.enabled:
+        vote_flush_task = asyncio.create_task(vote_queue.run_flush_loop())
+
     yield
 
     # Shutdown
     APP_LOGGER.info("Shutting down...")
+    if catalog_refresh_task:
+        catalog_refresh_task.cancel()
+    for task in vote_stats_tasks:
+        task.cancel()
+    leaderboard_task.cancel()
+    neighbours_task.cancel()
+    if vote_flush_task:
+        vote_flush_task.cancel()
+        try:
+            await vote_flush_task
+        except asyncio.CancelledError:
+            pass
+        # Don't lose votes that were accepted but not written yet
+        try:
+            await asyncio.to_thread(vote_queue.drain)
+        except Exception as e:
+            APP_LOGGER.error(f"Failed to flush queued votes on shutdown: {e}")
+    password_hasher.shutdown()
+    if async_engine is not None:
+        await async_engine.dispose()
 
 
 app = FastAPI(
@@ -53,6 +135,7 @@ app = FastAPI(
 
 # Add error handlers
 app.add_exception_handler(HTTPException, http_exception_handler)
+app.add_exception_handler(VotesNotFlushed, votes_not_flushed_handler)
 app.add_exception_handler(Exception, general_exception_handler)
 
 # Add custom middleware (order matters - they execute in reverse order of addition)
@@ -81,6 +164,11 @@ def get_db():
 
 # Include routers
 app.include_router(auth.router, prefix="/api/auth", tags=["authentication"])
+if DATABASE_ASYNC:
+    # Matched before the sync routes with the same path; the docs keep
+    # showing the sync versions, which have the same contract
+    app.include_router(names.async_router, prefix="/api/names", include_in_schema=False)
+    app.include_router(votes.async_router, prefix="/api/votes", include_in_schema=False)
 app.include_router(names.router, prefix="/api/names", tags=["names"])
 app.include_router(votes.router, prefix="/api/votes", tags=["votes"])
 
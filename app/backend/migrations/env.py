@@ -0,0 +1,98 @@
+"""
+Alembic environment for the Namo database.
+
+Every gunicorn worker runs `alembic upgrade head` through init_db() on
+startup, so migrations are serialized with a Postgres advisory lock.
+Waiting workers poll with pg_try_advisory_lock outside of a transaction:
+a worker blocked inside a transaction would hold a snapshot that
+CREATE INDEX CONCURRENTLY has to wait for, deadlocking the upgrade.
+"""
+
+import time
+from logging.config import fileConfig
+
+from alembic import context
+from sqlalchemy import create_engine, pool, text
+
+from models.database import Base, DATABASE_URL
+
+config = context.config
+
+# Only configure logging when run from the alembic CLI; when init_db() runs
+# the migrations inside the app, the app's own logging setup must survive.
+if config.config_file_name is not None and config.attributes.get(
+    "configure_logger", True
+):
+    fileConfig(config.config_file_name, disable_existing_loggers=False)
+
+target_metadata = Base.metadata
+
+# Created by migration 0007 only where pg_trgm exists, so not on the models
+OPTIONAL_INDEXES = {"ix_names_name_trgm"}
+
+
+def include_object(obj, name, type_, reflected, compare_to):
+    """Keep autogenerate from dropping indexes that are optional."""
+    return not (type_ == "index" and name in OPTIONAL_INDEXES)
+
+
+# Arbitrary application-wide key for pg_advisory_lock
+MIGRATION_LOCK_KEY = 7_303_656_101
+MIGRATION_LOCK_POLL_SECONDS = 0.5
+
+
+def run_migrations_offline() -> None:
+    """Emit the migration SQL without connecting (alembic upgrade --sql)."""
+    context.configure(
+        url=DATABASE_URL,
+        target_metadata=target_metadata,
+        include_object=include_object,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+        transaction_per_migration=True,
+    )
+
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def _acquire_migration_lock(connection) -> None:
+    while True:
+        locked = connection.execute(
+            text("SELECT pg_try_advisory_lock(:key)"), {"key": MIGRATION_LOCK_KEY}
+        ).scalar()
+        connection.commit()
+        if locked:
+            return
+        time.sleep(MIGRATION_LOCK_POLL_SECONDS)
+
+
+def run_migrations_online() -> None:
+    """Run migrations against the live database."""
+    connectable = create_engine(DATABASE_URL, poolclass=pool.NullPool)
+
+    with connectable.connect() as connection:
+        _acquire_migration_lock(connection)
+        try:
+            context.configure(
+                connection=connection,
+                target_metadata=target_metadata,
+                include_object=include_object,
+                # Lets CREATE INDEX CONCURRENTLY run in an autocommit block
+                transaction_per_migration=True,
+            )
+
+            with context.begin_transaction():
+                context.run_migrations()
+            connection.commit()
+        finally:
+            connection.execute(
+                text("SELECT pg_advisory_unlock(:key)"), {"key": MIGRATION_LOCK_KEY}
+            )
+            connection.commit()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
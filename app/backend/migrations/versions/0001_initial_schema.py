@@ -0,0 +1,71 @@
+"""Initial schema (users, names, votes)
+
+Databases created before migrations existed already have these tables
+from Base.metadata.create_all, so existing tables are left untouched and
+the revision is simply recorded.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = "0001"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    existing_tables = set(sa.inspect(op.get_bind()).get_table_names())
+
+    if "users" not in existing_tables:
+        op.create_table(
+            "users",
+            sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
+            sa.Column("username", sa.String(), nullable=False),
+            sa.Column("password_hash", sa.String(), nullable=False),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_users_id", "users", ["id"])
+        op.create_index("ix_users_username", "users", ["username"], unique=True)
+
+    if "names" not in existing_tables:
+        op.create_table(
+            "names",
+            sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
+            sa.Column("source", sa.String(), nullable=False),
+            sa.Column("name", sa.String(), nullable=False),
+            sa.Column("gender", sa.String(), nullable=True),
+            sa.Column("rank", sa.Integer(), nullable=True),
+            sa.Column("count", sa.Integer(), nullable=True),
+            sa.Column("info", postgresql.JSONB(), nullable=True),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_names_id", "names", ["id"])
+
+    if "votes" not in existing_tables:
+        op.create_table(
+            "votes",
+            sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
+            sa.Column("user_id", sa.Integer(), nullable=False),
+            sa.Column("name_id", sa.Integer(), nullable=False),
+            sa.Column("vote", sa.Boolean(), nullable=False),
+            sa.ForeignKeyConstraint(["name_id"], ["names.id"]),
+            sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+            sa.PrimaryKeyConstraint("id"),
+            sa.UniqueConstraint("user_id", "name_id", name="unique_user_name_vote"),
+        )
+        op.create_index("ix_votes_id", "votes", ["id"])
+
+
+def downgrade() -> None:
+    op.drop_table("votes")
+    op.drop_table("names")
+    op.drop_table("users")
@@ -0,0 +1,61 @@
+"""Composite indexes for the hot name and vote queries
+
+- names (gender, count DESC NULLS LAST, id): most_popular / popular order
+- names (gender, count, id): least_popular / unpopular order
+- names (source, gender, count, id): /api/names/ordered with a source filter
+- votes (user_id, vote, name_id): a user's votes and likes, index-only
+
+Built with CREATE INDEX CONCURRENTLY so production can upgrade without
+blocking writes. IF NOT EXISTS skips indexes that init_db() already
+created before migrations existed.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 10:05:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "0002"
+down_revision: Union[str, None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = [
+    (
+        "ix_names_gender_count_desc_id",
+        "names",
+        ["gender", sa.text("count DESC NULLS LAST"), "id"],
+    ),
+    ("ix_names_gender_count_id", "names", ["gender", "count", "id"]),
+    ("ix_names_source_gender_count_id", "names", ["source", "gender", "count", "id"]),
+    ("ix_votes_user_vote_name", "votes", ["user_id", "vote", "name_id"]),
+]
+
+
+def upgrade() -> None:
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    with op.get_context().autocommit_block():
+        for index_name, table_name, columns in INDEXES:
+            op.create_index(
+                index_name,
+                table_name,
+                columns,
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for index_name, table_name, _columns in reversed(INDEXES):
+            op.drop_index(
+                index_name,
+                table_name=table_name,
+                postgresql_concurrently=True,
+                if_exists=True,
+            )
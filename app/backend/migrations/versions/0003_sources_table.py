@@ -0,0 +1,86 @@
+"""Normalize names.source into a sources lookup table
+
+names.source (free text, filtered with ILIKE '%x%') becomes
+names.source_id, a small integer foreign key to sources. Source filters
+then become exact matches that can use the composite index
+(source_id, gender, count, id).
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "0003"
+down_revision: Union[str, None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "sources",
+        sa.Column("id", sa.SmallInteger(), autoincrement=True, nullable=False),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("name"),
+    )
+    op.execute(
+        "INSERT INTO sources (name) SELECT DISTINCT source FROM names ORDER BY source"
+    )
+
+    op.add_column("names", sa.Column("source_id", sa.SmallInteger(), nullable=True))
+    op.execute(
+        "UPDATE names SET source_id = sources.id "
+        "FROM sources WHERE sources.name = names.source"
+    )
+    op.alter_column("names", "source_id", nullable=False)
+    op.create_foreign_key(
+        "names_source_id_fkey", "names", "sources", ["source_id"], ["id"]
+    )
+
+    # Also drops ix_names_source_gender_count_id
+    op.drop_column("names", "source")
+
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_names_source_id_gender_count_id",
+            "names",
+            ["source_id", "gender", "count", "id"],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_names_source_id_gender_count_id",
+            table_name="names",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+
+    op.add_column("names", sa.Column("source", sa.String(), nullable=True))
+    op.execute(
+        "UPDATE names SET source = sources.name "
+        "FROM sources WHERE sources.id = names.source_id"
+    )
+    op.alter_column("names", "source", nullable=False)
+    op.drop_constraint("names_source_id_fkey", "names", type_="foreignkey")
+    op.drop_column("names", "source_id")
+    op.drop_table("sources")
+
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_names_source_gender_count_id",
+            "names",
+            ["source", "gender", "count", "id"],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
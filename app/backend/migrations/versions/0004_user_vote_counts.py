@@ -0,0 +1,117 @@
+"""Per-user vote counters maintained by triggers
+
+user_vote_counts holds each user's like/dislike totals. Statement-level
+triggers on votes apply the net change of every INSERT, UPDATE and DELETE
+(including multi-row upserts) in the same transaction, so the counters
+never drift and GET /votes/ can report totals without counting rows.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "0004"
+down_revision: Union[str, None] = "0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TRIGGER_FUNCTION = """
+CREATE OR REPLACE FUNCTION user_vote_counts_apply() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO user_vote_counts AS c (user_id, likes, dislikes)
+        SELECT user_id,
+               count(*) FILTER (WHERE vote),
+               count(*) FILTER (WHERE NOT vote)
+        FROM new_votes
+        GROUP BY user_id
+        ORDER BY user_id
+        ON CONFLICT (user_id) DO UPDATE
+        SET likes = c.likes + EXCLUDED.likes,
+            dislikes = c.dislikes + EXCLUDED.dislikes;
+    ELSIF TG_OP = 'DELETE' THEN
+        UPDATE user_vote_counts AS c
+        SET likes = c.likes - d.likes,
+            dislikes = c.dislikes - d.dislikes
+        FROM (
+            SELECT user_id,
+                   count(*) FILTER (WHERE vote) AS likes,
+                   count(*) FILTER (WHERE NOT vote) AS dislikes
+            FROM old_votes
+            GROUP BY user_id
+        ) AS d
+        WHERE c.user_id = d.user_id;
+    ELSE
+        INSERT INTO user_vote_counts AS c (user_id, likes, dislikes)
+        SELECT user_id, sum(likes), sum(dislikes)
+        FROM (
+            SELECT user_id, vote::int AS likes, (NOT vote)::int AS dislikes
+            FROM new_votes
+            UNION ALL
+            SELECT user_id, -(vote::int), -((NOT vote)::int)
+            FROM old_votes
+        ) AS delta
+        GROUP BY user_id
+        ORDER BY user_id
+        ON CONFLICT (user_id) DO UPDATE
+        SET likes = c.likes + EXCLUDED.likes,
+            dislikes = c.dislikes + EXCLUDED.dislikes;
+    END IF;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql
+"""
+
+# Transition tables allow only one event per trigger
+TRIGGERS = {
+    "votes_counts_insert": "AFTER INSERT ON votes REFERENCING NEW TABLE AS new_votes",
+    "votes_counts_update": (
+        "AFTER UPDATE ON votes "
+        "REFERENCING OLD TABLE AS old_votes NEW TABLE AS new_votes"
+    ),
+    "votes_counts_delete": "AFTER DELETE ON votes REFERENCING OLD TABLE AS old_votes",
+}
+
+
+def upgrade() -> None:
+    op.create_table(
+        "user_vote_counts",
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("likes", sa.Integer(), server_default="0", nullable=False),
+        sa.Column("dislikes", sa.Integer(), server_default="0", nullable=False),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("user_id"),
+    )
+
+    op.execute(TRIGGER_FUNCTION)
+    for trigger, definition in TRIGGERS.items():
+        op.execute(
+            f"CREATE TRIGGER {trigger} {definition} "
+            "FOR EACH STATEMENT EXECUTE FUNCTION user_vote_counts_apply()"
+        )
+
+    # Backfill while holding off writers, so no vote is counted twice or lost
+    op.execute("LOCK TABLE votes IN SHARE MODE")
+    op.execute(
+        """
+        INSERT INTO user_vote_counts (user_id, likes, dislikes)
+        SELECT user_id,
+               count(*) FILTER (WHERE vote),
+               count(*) FILTER (WHERE NOT vote)
+        FROM votes
+        GROUP BY user_id
+        """
+    )
+
+
+def downgrade() -> None:
+    for trigger in TRIGGERS:
+        op.execute(f"DROP TRIGGER IF EXISTS {trigger} ON votes")
+    op.execute("DROP FUNCTION IF EXISTS user_vote_counts_apply()")
+    op.drop_table("user_vote_counts")
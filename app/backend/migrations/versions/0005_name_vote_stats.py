@@ -0,0 +1,124 @@
+"""Per-name vote aggregates maintained by triggers
+
+name_vote_stats holds like/dislike totals for every voted name, updated
+by statement-level triggers on votes in the same transaction as the vote
+write (flips move one vote from likes to dislikes or back). Drift from
+writes that bypass the triggers is corrected by
+utils.vote_stats.reconcile_name_vote_stats.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "0005"
+down_revision: Union[str, None] = "0004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TRIGGER_FUNCTION = """
+CREATE OR REPLACE FUNCTION name_vote_stats_apply() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO name_vote_stats AS s (name_id, likes, dislikes)
+        SELECT name_id,
+               count(*) FILTER (WHERE vote),
+               count(*) FILTER (WHERE NOT vote)
+        FROM new_votes
+        GROUP BY name_id
+        ORDER BY name_id
+        ON CONFLICT (name_id) DO UPDATE
+        SET likes = s.likes + EXCLUDED.likes,
+            dislikes = s.dislikes + EXCLUDED.dislikes;
+    ELSIF TG_OP = 'DELETE' THEN
+        UPDATE name_vote_stats AS s
+        SET likes = s.likes - d.likes,
+            dislikes = s.dislikes - d.dislikes
+        FROM (
+            SELECT name_id,
+                   count(*) FILTER (WHERE vote) AS likes,
+                   count(*) FILTER (WHERE NOT vote) AS dislikes
+            FROM old_votes
+            GROUP BY name_id
+        ) AS d
+        WHERE s.name_id = d.name_id;
+    ELSE
+        -- Only flips change the totals; re-votes with the same value net to 0
+        INSERT INTO name_vote_stats AS s (name_id, likes, dislikes)
+        SELECT name_id, sum(likes), sum(dislikes)
+        FROM (
+            SELECT name_id, vote::int AS likes, (NOT vote)::int AS dislikes
+            FROM new_votes
+            UNION ALL
+            SELECT name_id, -(vote::int), -((NOT vote)::int)
+            FROM old_votes
+        ) AS delta
+        GROUP BY name_id
+        HAVING sum(likes) <> 0 OR sum(dislikes) <> 0
+        ORDER BY name_id
+        ON CONFLICT (name_id) DO UPDATE
+        SET likes = s.likes + EXCLUDED.likes,
+            dislikes = s.dislikes + EXCLUDED.dislikes;
+    END IF;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql
+"""
+
+# Transition tables allow only one event per trigger
+TRIGGERS = {
+    "votes_name_stats_insert": (
+        "AFTER INSERT ON votes REFERENCING NEW TABLE AS new_votes"
+    ),
+    "votes_name_stats_update": (
+        "AFTER UPDATE ON votes "
+        "REFERENCING OLD TABLE AS old_votes NEW TABLE AS new_votes"
+    ),
+    "votes_name_stats_delete": (
+        "AFTER DELETE ON votes REFERENCING OLD TABLE AS old_votes"
+    ),
+}
+
+
+def upgrade() -> None:
+    op.create_table(
+        "name_vote_stats",
+        sa.Column("name_id", sa.Integer(), nullable=False),
+        sa.Column("likes", sa.Integer(), server_default="0", nullable=False),
+        sa.Column("dislikes", sa.Integer(), server_default="0", nullable=False),
+        sa.ForeignKeyConstraint(["name_id"], ["names.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("name_id"),
+    )
+
+    op.execute(TRIGGER_FUNCTION)
+    for trigger, definition in TRIGGERS.items():
+        op.execute(
+            f"CREATE TRIGGER {trigger} {definition} "
+            "FOR EACH STATEMENT EXECUTE FUNCTION name_vote_stats_apply()"
+        )
+
+    # Backfill while holding off writers, so no vote is counted twice or lost
+    op.execute("LOCK TABLE votes IN SHARE MODE")
+    op.execute(
+        """
+        INSERT INTO name_vote_stats (name_id, likes, dislikes)
+        SELECT name_id,
+               count(*) FILTER (WHERE vote),
+               count(*) FILTER (WHERE NOT vote)
+        FROM votes
+        GROUP BY name_id
+        """
+    )
+
+
+def downgrade() -> None:
+    for trigger in TRIGGERS:
+        op.execute(f"DROP TRIGGER IF EXISTS {trigger} ON votes")
+    op.execute("DROP FUNCTION IF EXISTS name_vote_stats_apply()")
+    op.drop_table("name_vote_stats")
@@ -0,0 +1,146 @@
+"""Phonetic keys for sound-alike name lookup
+
+names.phonetic_keys holds the Kölner Phonetik code of every name, plus
+Double Metaphone codes for names from English-language sources (see
+utils/phonetics.py). A GIN index makes "all names sharing a key" a single
+index lookup. Existing names are backfilled here; init_db fills the column
+for names loaded later.
+
+The backfill uses a frozen copy of utils.phonetics.phonetic_keys as of this
+revision (with the default PHONETIC_ENGLISH_SOURCES), so later changes to
+the application code cannot change what this migration does.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+from typing import List, Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from metaphone import doublemetaphone
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = "0006"
+down_revision: Union[str, None] = "0005"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+_ENGLISH_SOURCES = {
+    "usa",
+    "united states",
+    "uk",
+    "united kingdom",
+    "england",
+    "ireland",
+    "scotland",
+    "wales",
+    "australia",
+    "canada",
+    "new zealand",
+}
+
+_VOWELS = set("AEIJOUYÄÖÜ")
+_CODES = {
+    **{c: "1" for c in "B"},
+    **{c: "3" for c in "FVW"},
+    **{c: "4" for c in "GKQ"},
+    "L": "5",
+    **{c: "6" for c in "MN"},
+    "R": "7",
+    **{c: "8" for c in "SZß"},
+}
+
+
+def _cologne_phonetic(name: str) -> str:
+    letters = [c for c in name.upper() if c.isalpha()]
+    digits = []
+    for i, c in enumerate(letters):
+        prev = letters[i - 1] if i else ""
+        nxt = letters[i + 1] if i + 1 < len(letters) else ""
+        if c in _VOWELS:
+            code = "0"
+        elif c == "H":
+            code = ""
+        elif c == "P":
+            code = "3" if nxt == "H" else "1"
+        elif c in "DT":
+            code = "8" if nxt in ("C", "S", "Z", "ß") else "2"
+        elif c == "C":
+            if i == 0:
+                code = "4" if nxt and nxt in "AHKLOQRUX" else "8"
+            elif prev in ("S", "Z", "ß"):
+                code = "8"
+            else:
+                code = "4" if nxt and nxt in "AHKOQUX" else "8"
+        elif c == "X":
+            code = "8" if prev in ("C", "K", "Q") else "48"
+        else:
+            code = _CODES.get(c, "")
+        digits.append(code)
+
+    collapsed = []
+    for code in "".join(digits):
+        if not collapsed or collapsed[-1] != code:
+            collapsed.append(code)
+    return "".join(code for i, code in enumerate(collapsed) if code != "0" or i == 0)
+
+
+def _phonetic_keys(name: str, source: str) -> List[str]:
+    keys = []
+    cologne = _cologne_phonetic(name)
+    if cologne:
+        keys.append(f"k:{cologne}")
+    if source.lower() in _ENGLISH_SOURCES:
+        keys.extend(
+            f"m:{code}" for code in dict.fromkeys(doublemetaphone(name)) if code
+        )
+    return keys
+
+
+def upgrade() -> None:
+    op.add_column(
+        "names",
+        sa.Column("phonetic_keys", postgresql.ARRAY(sa.String()), nullable=True),
+    )
+
+    conn = op.get_bind()
+    rows = conn.execute(
+        sa.text(
+            "SELECT names.id, names.name, sources.name AS source "
+            "FROM names JOIN sources ON sources.id = names.source_id"
+        )
+    ).all()
+    update = sa.text("UPDATE names SET phonetic_keys = :keys WHERE id = :id")
+    for start in range(0, len(rows), 1000):
+        conn.execute(
+            update,
+            [
+                {"id": row.id, "keys": _phonetic_keys(row.name, row.source)}
+                for row in rows[start : start + 1000]
+            ],
+        )
+
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_names_phonetic_keys",
+            "names",
+            ["phonetic_keys"],
+            postgresql_using="gin",
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_names_phonetic_keys",
+            table_name="names",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+    op.drop_column("names", "phonetic_keys")
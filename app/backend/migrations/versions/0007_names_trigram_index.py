@@ -0,0 +1,58 @@
+"""Optional pg_trgm index for NAME_FUZZY_ENGINE=trgm
+
+Creates the pg_trgm extension and a trigram GIN index on lower(name), used
+by the fuzzy name search when it runs in Postgres. Servers without the
+extension (it ships with the contrib package) skip this; the default
+in-memory fuzzy search does not need it. The index is not declared on the
+model, see `include_object` in env.py.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18 17:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "0007"
+down_revision: Union[str, None] = "0006"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    available = (
+        op.get_bind()
+        .execute(
+            sa.text("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")
+        )
+        .scalar()
+    )
+    if not available:
+        print("pg_trgm is not available; skipping ix_names_name_trgm")
+        return
+
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_names_name_trgm",
+            "names",
+            [sa.text("lower(name) gin_trgm_ops")],
+            postgresql_using="gin",
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_names_name_trgm",
+            table_name="names",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
@@ -0,0 +1,56 @@
+"""(count, id) indexes for /api/names/ordered without a gender filter
+
+The popular / unpopular keyset order (count DESC, id DESC / count ASC,
+id ASC) was only backed by (gender, count, id) and (source_id, gender,
+count, id). Without a gender filter every page had to sort all matching
+names; these turn it into one range scan in either direction:
+
+- names (count, id): no filter
+- names (source_id, count, id): source filter only
+
+Built with CREATE INDEX CONCURRENTLY so production can upgrade without
+blocking writes.
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0008"
+down_revision: Union[str, None] = "0007"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = [
+    ("ix_names_count_id", ["count", "id"]),
+    ("ix_names_source_id_count_id", ["source_id", "count", "id"]),
+]
+
+
+def upgrade() -> None:
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    with op.get_context().autocommit_block():
+        for index_name, columns in INDEXES:
+            op.create_index(
+                index_name,
+                "names",
+                columns,
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for index_name, _columns in reversed(INDEXES):
+            op.drop_index(
+                index_name,
+                table_name="names",
+                postgresql_concurrently=True,
+                if_exists=True,
+            )
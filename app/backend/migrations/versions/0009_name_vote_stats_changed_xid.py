@@ -0,0 +1,64 @@
+"""Track which transaction last changed each name_vote_stats row
+
+name_vote_stats.changed_xid is set to the writing transaction's id on
+insert (column default) and on every update (row trigger), so workers can
+reload only the rows changed since their previous refresh instead of the
+whole table (see VoteStatsSnapshot.refresh).
+
+Adding a nullable column and then a default does not rewrite the table;
+existing rows keep NULL, which only the initial full load reads.
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "0009"
+down_revision: Union[str, None] = "0008"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+class XID8(sa.types.UserDefinedType):
+    """Postgres xid8, defined here so the migration does not import models."""
+
+    cache_ok = True
+
+    def get_col_spec(self, **kw):
+        return "xid8"
+
+
+TOUCH_FUNCTION = """
+CREATE OR REPLACE FUNCTION name_vote_stats_touch() RETURNS trigger AS $$
+BEGIN
+    NEW.changed_xid := pg_current_xact_id();
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql
+"""
+
+
+def upgrade() -> None:
+    op.add_column("name_vote_stats", sa.Column("changed_xid", XID8(), nullable=True))
+    op.alter_column(
+        "name_vote_stats",
+        "changed_xid",
+        server_default=sa.text("pg_current_xact_id()"),
+    )
+    op.execute(TOUCH_FUNCTION)
+    op.execute(
+        "CREATE TRIGGER name_vote_stats_touch BEFORE UPDATE ON name_vote_stats "
+        "FOR EACH ROW EXECUTE FUNCTION name_vote_stats_touch()"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER IF EXISTS name_vote_stats_touch ON name_vote_stats")
+    op.execute("DROP FUNCTION IF EXISTS name_vote_stats_touch()")
+    op.drop_column("name_vote_stats", "changed_xid")
@@ -0,0 +1,65 @@
+"""Change marker for the shared name catalog
+
+name_catalog_version is a single row whose changed_xid is set to the
+writing transaction's id by statement-level triggers on names and sources.
+The catalog refresh compares it with the value stored in the catalog file
+instead of hashing every row of both tables; xid8 values are never reused,
+so a recreated table cannot bring back an old marker.
+
+The row is updated once per statement, so writers to names and sources
+queue on it; those tables only change on data imports.
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-20 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0010"
+down_revision: Union[str, None] = "0009"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TOUCH_FUNCTION = """
+CREATE OR REPLACE FUNCTION name_catalog_touch() RETURNS trigger AS $$
+BEGIN
+    UPDATE name_catalog_version SET changed_xid = pg_current_xact_id();
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql
+"""
+
+TABLES = ("names", "sources")
+
+
+def upgrade() -> None:
+    op.execute(
+        """
+        CREATE TABLE name_catalog_version (
+            id smallint PRIMARY KEY CHECK (id = 1),
+            changed_xid xid8 NOT NULL
+        )
+        """
+    )
+    op.execute(
+        "INSERT INTO name_catalog_version (id, changed_xid) "
+        "VALUES (1, pg_current_xact_id())"
+    )
+    op.execute(TOUCH_FUNCTION)
+    for table in TABLES:
+        op.execute(
+            f"CREATE TRIGGER {table}_catalog_touch "
+            f"AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON {table} "
+            "FOR EACH STATEMENT EXECUTE FUNCTION name_catalog_touch()"
+        )
+
+
+def downgrade() -> None:
+    for table in TABLES:
+        op.execute(f"DROP TRIGGER IF EXISTS {table}_catalog_touch ON {table}")
+    op.execute("DROP FUNCTION IF EXISTS name_catalog_touch()")
+    op.drop_table("name_catalog_version")
@@ -2,15 +2,21 @@ from sqlalchemy import (
     create_engine,
     Column,
     Integer,
+    SmallInteger,
     String,
     Boolean,
     Text,
     ForeignKey,
+    Index,
     UniqueConstraint,
+    text,
 )
-from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB
+from sqlalchemy.ext.associationproxy import association_proxy
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, relationship
+from sqlalchemy.types import UserDefinedType
 
 # Import helper functions from config
 from config import get_required_env, get_required_secret
@@ -29,9 +35,29 @@ DATABASE_URL = f"postgresql://{POSTGRES_USER}:{POSTGRES_PASSWORD}@{DATABASE_HOST
 engine = create_engine(DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# DATABASE_ASYNC=true serves the hot name and vote routes from an asyncpg
+# engine as well (see routes/names.py and routes/votes.py); everything else,
+# including init_db and the background jobs, keeps using the engine above.
+DATABASE_ASYNC = get_required_env("DATABASE_ASYNC", "false").lower() == "true"
+ASYNC_DATABASE_URL = f"postgresql+asyncpg://{POSTGRES_USER}:{POSTGRES_PASSWORD}@{DATABASE_HOST}:5432/{POSTGRES_DB}"
+
+async_engine = create_async_engine(ASYNC_DATABASE_URL) if DATABASE_ASYNC else None
+AsyncSessionLocal = (
+    async_sessionmaker(async_engine, autoflush=False) if DATABASE_ASYNC else None
+)
+
 Base = declarative_base()
 
 
+class XID8(UserDefinedType):
+    """Postgres 64-bit transaction id; compare it with CAST(:value AS xid8)."""
+
+    cache_ok = True
+
+    def get_col_spec(self, **kw):
+        return "xid8"
+
+
 class User(Base):
     __tablename__ = "users"
 
@@ -43,20 +69,82 @@ class User(Base):
     votes = relationship("Vote", back_populates="user")
 
 
+class UserVoteCounts(Base):
+    """Per-user like/dislike totals, kept current by triggers on votes."""
+
+    __tablename__ = "user_vote_counts"
+
+    user_id = Column(
+        Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True
+    )
+    likes = Column(Integer, nullable=False, default=0, server_default="0")
+    dislikes = Column(Integer, nullable=False, default=0, server_default="0")
+
+
+class NameVoteStats(Base):
+    """Per-name like/dislike totals, kept current by triggers on votes."""
+
+    __tablename__ = "name_vote_stats"
+
+    name_id = Column(
+        Integer, ForeignKey("names.id", ondelete="CASCADE"), primary_key=True
+    )
+    likes = Column(Integer, nullable=False, default=0, server_default="0")
+    dislikes = Column(Integer, nullable=False, default=0, server_default="0")
+    # Transaction that last changed the row, kept by a trigger (migration 0009)
+    changed_xid = Column(
+        XID8, nullable=True, server_default=text("pg_current_xact_id()")
+    )
+
+
+class NameCatalogVersion(Base):
+    """Single row marking the last change to names or sources (migration 0010)."""
+
+    __tablename__ = "name_catalog_version"
+
+    id = Column(SmallInteger, primary_key=True, autoincrement=False)
+    # Transaction that last wrote names or sources, set by statement triggers
+    changed_xid = Column(XID8, nullable=False)
+
+
+class Source(Base):
+    __tablename__ = "sources"
+
+    id = Column(SmallInteger, primary_key=True, autoincrement=True)
+    name = Column(String, unique=True, nullable=False)  # e.g. 'Austria'
+
+
 class Name(Base):
     __tablename__ = "names"
 
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
-    source = Column(String, nullable=False)  # e.g. 'Austria'
+    source_id = Column(SmallInteger, ForeignKey("sources.id"), nullable=False)
     name = Column(String, nullable=False)
     gender = Column(String, nullable=True)  # 'm' or 'f'
     rank = Column(Integer, nullable=True)
     count = Column(Integer, nullable=True)
     info = Column(JSONB, nullable=True)
+    # Sound-alike keys from utils.phonetics, e.g. ['k:83'] for Sophie/Sofie
+    phonetic_keys = Column(ARRAY(String), nullable=True)
+
+    # The source row is tiny and always needed for responses, so join it eagerly
+    source_ref = relationship("Source", lazy="joined", innerjoin=True)
+    source = association_proxy("source_ref", "name")
 
     # Relationship with votes
     votes = relationship("Vote", back_populates="name")
 
+    # Popularity ordering (ORDER BY count, id LIMIT n) per gender/source.
+    # Indexes are created by the Alembic migrations in migrations/versions.
+    __table_args__ = (
+        Index("ix_names_gender_count_desc_id", gender, count.desc().nullslast(), id),
+        Index("ix_names_gender_count_id", gender, count, id),
+        Index("ix_names_source_id_gender_count_id", source_id, gender, count, id),
+        Index("ix_names_count_id", count, id),
+        Index("ix_names_source_id_count_id", source_id, count, id),
+        Index("ix_names_phonetic_keys", phonetic_keys, postgresql_using="gin"),
+    )
+
 
 class Vote(Base):
     __tablename__ = "votes"
@@ -73,4 +161,5 @@ class Vote(Base):
     # Unique constraint: one vote per name per user
     __table_args__ = (
         UniqueConstraint("user_id", "name_id", name="unique_user_name_vote"),
+        Index("ix_votes_user_vote_name", user_id, vote, name_id),
     )
@@ -1,14 +1,18 @@
+import asyncio
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from datetime import timedelta
 
 from auth.auth_utils import (
-    get_password_hash,
-    verify_password,
     create_access_token,
     get_db,
     ACCESS_TOKEN_EXPIRE_MINUTES,
 )
+from auth.passwords import (
+    PASSWORD_HASH_RETRY_AFTER_SECONDS,
+    PasswordHashingBusy,
+    password_hasher,
+)
 from models.database import User
 from schemas.schemas import UserCreate, UserResponse, UserLogin, Token
 from utils.logging_config import APP_LOGGER
@@ -16,15 +20,38 @@ from utils.logging_config import APP_LOGGER
 router = APIRouter()
 
 
+def _too_many_attempts(username: str) -> HTTPException:
+    APP_LOGGER.warning(f"Password hashing pool busy, rejecting request for: {username}")
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail="Too many login attempts in progress, try again shortly",
+        headers={"Retry-After": str(PASSWORD_HASH_RETRY_AFTER_SECONDS)},
+    )
+
+
+def _find_user(db: Session, username: str):
+    return db.query(User).filter(User.username == username).first()
+
+
+def _create_user(db: Session, username: str, password_hash: str) -> User:
+    new_user = User(username=username, password_hash=password_hash)
+    db.add(new_user)
+    db.commit()
+    db.refresh(new_user)
+    return new_user
+
+
+# Async so that waiting for bcrypt holds no request thread; the (sync)
+# database calls run via asyncio.to_thread
 @router.post("/register", response_model=Token)
-def register_user(user: UserCreate, db: Session = Depends(get_db)):
+async def register_user(user: UserCreate, db: Session = Depends(get_db)):
     """Register a new user and return an access token."""
 
     APP_LOGGER.info(f"Registration attempt for user: {user.username}")
 
     try:
         # Check if user already exists
-        db_user = db.query(User).filter(User.username == user.username).first()
+        db_user = await asyncio.to_thread(_find_user, db, user.username)
         if db_user:
             APP_LOGGER.warning(
                 f"Registration failed - user already exists: {user.username}"
@@ -35,11 +62,10 @@ def register_user(user: UserCreate, db: Session = Depends(get_db)):
             )
 
         # Hash password and create user
-        hashed_password = get_password_hash(user.password)
-        new_user = User(username=user.username, password_hash=hashed_password)
-        db.add(new_user)
-        db.commit()
-        db.refresh(new_user)
+        hashed_password = await asyncio.wrap_future(password_hasher.hash(user.password))
+        new_user = await asyncio.to_thread(
+            _create_user, db, user.username, hashed_password
+        )
 
         APP_LOGGER.info(
             f"User created successfully: {user.username} (ID: {new_user.id})"
@@ -56,9 +82,11 @@ def register_user(user: UserCreate, db: Session = Depends(get_db)):
 
     except HTTPException:
         raise
+    except PasswordHashingBusy:
+        raise _too_many_attempts(user.username)
     except Exception as e:
         APP_LOGGER.error(f"Registration error for user {user.username}: {str(e)}")
-        db.rollback()
+        await asyncio.to_thread(db.rollback)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Registration failed",
@@ -66,14 +94,14 @@ def register_user(user: UserCreate, db: Session = Depends(get_db)):
 
 
 @router.post("/login", response_model=Token)
-def login_user(user: UserLogin, db: Session = Depends(get_db)):
+async def login_user(user: UserLogin, db: Session = Depends(get_db)):
     """Login user and return access token."""
 
     APP_LOGGER.info(f"Login attempt for user: {user.username}")
 
     try:
         # Authenticate user
-        db_user = db.query(User).filter(User.username == user.username).first()
+        db_user = await asyncio.to_thread(_find_user, db, user.username)
         if not db_user:
             APP_LOGGER.warning(f"Login failed - user not found: {user.username}")
             raise HTTPException(
@@ -82,7 +110,10 @@ def login_user(user: UserLogin, db: Session = Depends(get_db)):
                 headers={"WWW-Authenticate": "Bearer"},
             )
 
-        if not verify_password(user.password, str(db_user.password_hash)):
+        verified = await asyncio.wrap_future(
+            password_hasher.verify(user.password, str(db_user.password_hash))
+        )
+        if not verified:
             APP_LOGGER.warning(
                 f"Login failed - invalid password for user: {user.username}"
             )
@@ -107,6 +138,8 @@ def login_user(user: UserLogin, db: Session = Depends(get_db)):
 
     except HTTPException:
         raise
+    except PasswordHashingBusy:
+        raise _too_many_attempts(user.username)
     except Exception as e:
         APP_LOGGER.error(f"Login error for user {user.username}: {str(e)}")
         raise HTTPException(
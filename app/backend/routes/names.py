@@ -1,33 +1,335 @@
+import asyncio
 from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
-from typing import List, Optional
-import random
+from sqlalchemy import Integer, bindparam, func, select, tuple_, union_all
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, aliased
+from typing import Iterator, List, Optional, Tuple
+from itertools import chain, islice
 
-from auth.auth_utils import get_db, get_current_user
-from models.database import Name, User, Vote
-from schemas.schemas import NameResponse, NameCreate, NameInfoResponse
+import numpy as np
+
+from auth.auth_utils import (
+    CurrentUser,
+    get_async_db,
+    get_current_user,
+    get_current_user_async,
+    get_db,
+)
+from config import get_required_env
+from models.database import Name, Source, Vote
+from schemas.schemas import (
+    LeaderboardResponse,
+    NameResponse,
+    NameCreate,
+    NameInfoResponse,
+    FuzzyMatch,
+    NamePage,
+    SimilarName,
+)
 from utils.wikionary_fetcher import extract_name_info
+from utils.cursor import InvalidCursor, decode_cursor, encode_cursor
 from utils.error_utils import handle_error, log_info, log_warning
+from utils.fuzzy_search import NAME_FUZZY_MAX_DISTANCE, fuzzy_search
+from utils.leaderboard import LEADERBOARD_MAX_LIMIT, leaderboard
+from utils.name_catalog import NameCatalog, name_catalog
+from utils.name_search import NAME_SEARCH_MAX_LIMIT, name_search
+from utils.name_similarity import SIMILAR_NAMES_MAX_LIMIT, name_similarity
+from utils.phonetics import phonetic_keys
+from utils.recommendations import name_neighbours
+from utils.vote_cache import UserVotes, vote_cache
+from utils.vote_queue import vote_queue
+from utils.vote_stats import vote_stats
+from utils.weighted_sampler import weighted_sampler
 
 router = APIRouter()
+# Async variants of the hot routes, mounted ahead of `router` by main.py when
+# DATABASE_ASYNC=true. They share the sync routes' helpers but keep the event
+# loop free: queries are awaited on the request's AsyncSession (run_sync only
+# wraps helpers that do nothing but query), while the vote cache, catalog
+# filtering, sampling and building the records run via asyncio.to_thread.
+async_router = APIRouter()
+
+# Engine for sort_order=random: "catalog" samples from the in-memory alias
+# tables, "sql" pushes weighted sampling into Postgres (Efraimidis-Spirakis)
+RANDOM_SAMPLING_ENGINE = get_required_env("RANDOM_SAMPLING_ENGINE", "catalog").lower()
+if RANDOM_SAMPLING_ENGINE not in ("catalog", "sql"):
+    raise RuntimeError(
+        f"Invalid RANDOM_SAMPLING_ENGINE {RANDOM_SAMPLING_ENGINE!r}, "
+        "expected 'catalog' or 'sql'"
+    )
+
+POPULARITY_ORDERS = ("most_popular", "least_popular")
+# Orders served by walking a precomputed ranking rather than by sampling
+RANKED_ORDERS = POPULARITY_ORDERS + ("recommended",)
+
+
+def _parse_genders(genders: Optional[str]) -> List[str]:
+    """Convert frontend gender names (male,female) to database format."""
+    if not genders:
+        return []
+
+    db_genders = []
+    for gender in [g.strip().lower() for g in genders.split(",")]:
+        if gender == "male":
+            db_genders.append("m")
+        elif gender == "female":
+            db_genders.append("f")
+    return db_genders
+
+
+def _parse_sources(source: Optional[str]) -> List[str]:
+    """Split a comma-separated `source` filter into exact source names."""
+    if not source:
+        return []
+    return list(dict.fromkeys(s.strip() for s in source.split(",") if s.strip()))
+
+
+def _with_stats(names: list) -> List[dict]:
+    """Attach likes/dislikes from the in-memory vote stats snapshot."""
+    results = []
+    for name in names:
+        if not isinstance(name, dict):
+            name = NameResponse.model_validate(name).model_dump()
+        likes, dislikes = vote_stats.get(name["id"])
+        results.append({**name, "likes": likes, "dislikes": dislikes})
+    return results
 
 
-# GET /names/random?n=10&genders=male,female&sort_order=random&exclude_voted=true
+def _source_ids_from_db(db: Session, sources: List[str]) -> List[int]:
+    """Resolve source names (case-insensitive, exact) to sources.id values."""
+    lowered = [s.lower() for s in sources]
+    return [
+        source_id
+        for (source_id,) in db.query(Source.id).filter(
+            func.lower(Source.name).in_(lowered)
+        )
+    ]
+
+
+# GET /names/random?n=10&genders=male,female&source=Austria,Germany&sort_order=random&exclude_voted=true
 @router.get("/random", response_model=List[NameResponse])
 def get_random_names(
     n: int = Query(1, ge=1, le=100),
     genders: Optional[str] = None,
+    source: Optional[str] = None,
     sort_order: Optional[str] = Query("random"),
     exclude_voted: bool = Query(True),
+    include_stats: bool = Query(False),
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
 ):
     """Get up to n weighted random names the user hasn't voted on yet."""
+    _log_random_request(n, genders, sort_order, current_user)
+    if exclude_voted:
+        # Read-your-writes with VOTE_WRITE_BEHIND
+        vote_queue.wait_until_flushed(current_user.id)
+
+    db_genders = _parse_genders(genders)
+    sources = _parse_sources(source)
+
+    catalog = name_catalog.get()
+    if catalog is None or _samples_in_sql(sort_order):
+        source_ids = _source_ids_from_db(db, sources) if sources else None
+        ranked = None
+        if sort_order == "recommended":
+            ranked = _ranked(vote_cache.get(db, current_user.id))
+        selected = _random_names_from_db(
+            db,
+            current_user,
+            n,
+            db_genders,
+            source_ids,
+            sort_order,
+            exclude_voted,
+            ranked,
+        )
+    else:
+        source_ids = catalog.source_ids_for(sources) if sources else None
+        user_votes = None
+        if exclude_voted or sort_order == "recommended":
+            user_votes = vote_cache.get(db, current_user.id)
+        selected = _random_names_from_catalog(
+            catalog, user_votes, n, db_genders, source_ids, sort_order, exclude_voted
+        )
+
+    return _random_names_response(selected, include_stats)
+
+
+@async_router.get("/random", response_model=List[NameResponse])
+async def get_random_names_async(
+    n: int = Query(1, ge=1, le=100),
+    genders: Optional[str] = None,
+    source: Optional[str] = None,
+    sort_order: Optional[str] = Query("random"),
+    exclude_voted: bool = Query(True),
+    include_stats: bool = Query(False),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CurrentUser = Depends(get_current_user_async),
+):
+    """get_random_names on the async engine."""
+    _log_random_request(n, genders, sort_order, current_user)
+    if exclude_voted:
+        await vote_queue.wait_until_flushed_async(current_user.id)
+
+    db_genders = _parse_genders(genders)
+    sources = _parse_sources(source)
+
+    catalog = name_catalog.get()
+    if catalog is None or _samples_in_sql(sort_order):
+        source_ids = None
+        if sources:
+            source_ids = await db.run_sync(_source_ids_from_db, sources)
+        ranked = None
+        if sort_order == "recommended":
+            user_votes = await vote_cache.get_async(db, current_user.id)
+            ranked = await asyncio.to_thread(_ranked, user_votes)
+        selected = await db.run_sync(
+            _random_names_from_db,
+            current_user,
+            n,
+            db_genders,
+            source_ids,
+            sort_order,
+            exclude_voted,
+            ranked,
+        )
+    else:
+        source_ids = catalog.source_ids_for(sources) if sources else None
+        user_votes = None
+        if exclude_voted or sort_order == "recommended":
+            user_votes = await vote_cache.get_async(db, current_user.id)
+        selected = await asyncio.to_thread(
+            _random_names_from_catalog,
+            catalog,
+            user_votes,
+            n,
+            db_genders,
+            source_ids,
+            sort_order,
+            exclude_voted,
+        )
+
+    return await asyncio.to_thread(_random_names_response, selected, include_stats)
+
+
+def _log_random_request(
+    n: int, genders: Optional[str], sort_order: Optional[str], user: CurrentUser
+):
     log_info(
-        f"Requesting {n} random names, genders={genders}, sort_order={sort_order}, user={current_user.username}",
+        f"Requesting {n} random names, genders={genders}, sort_order={sort_order}, user={user.username}",
         "get_random_names",
     )
 
+
+def _samples_in_sql(sort_order: Optional[str]) -> bool:
+    return RANDOM_SAMPLING_ENGINE == "sql" and sort_order not in RANKED_ORDERS
+
+
+def _ranked(user_votes: UserVotes) -> np.ndarray:
+    """Name ids by collaborative-filtering score for the user, best first."""
+    return name_neighbours.ranked(user_votes.like_mask(), user_votes.dislike_mask())
+
+
+def _random_names_response(selected: list, include_stats: bool) -> list:
+    if not selected:
+        log_warning("No names available for user to vote on", "get_random_names")
+        raise HTTPException(status_code=status.HTTP_204_NO_CONTENT)
+
+    log_info(f"Returning {len(selected)} random names", "get_random_names")
+    return _with_stats(selected) if include_stats else selected
+
+
+def _unique(rows: Iterator[int]) -> Iterator[int]:
+    """Drop repeated rows, keeping the first occurrence."""
+    seen = set()
+    for row in rows:
+        if row not in seen:
+            seen.add(row)
+            yield row
+
+
+def _random_names_from_catalog(
+    catalog: NameCatalog,
+    user_votes: Optional[UserVotes],
+    n: int,
+    db_genders: List[str],
+    source_ids: Optional[set],
+    sort_order: Optional[str],
+    exclude_voted: bool,
+) -> List[dict]:
+    """
+    Select names from the shared in-memory catalog. `user_votes` is needed
+    to exclude voted names and for sort_order=recommended.
+    """
+    if source_ids is not None and not source_ids:
+        return []  # None of the requested sources exist
+
+    ids = catalog.ids
+    is_excluded = None
+
+    # Exclude names the user has voted on if exclude_voted is True
+    if exclude_voted:
+        is_excluded = lambda row: user_votes.has_voted(ids[row])
+
+    if sort_order in POPULARITY_ORDERS:
+        # Walk the precomputed popularity order instead of sorting per request
+        rows = catalog.rows_by_popularity(
+            sort_order == "most_popular", db_genders, source_ids
+        )
+        if is_excluded:
+            rows = (row for row in rows if not is_excluded(row))
+        selected = list(islice(rows, n))
+    elif sort_order == "recommended":
+        # Names without a score (e.g. for new users) follow by popularity
+        rows = chain(
+            catalog.rows_for_ids(_ranked(user_votes), db_genders, source_ids),
+            catalog.rows_by_popularity(True, db_genders, source_ids),
+        )
+        rows = _unique(rows)
+        if is_excluded:
+            rows = (row for row in rows if not is_excluded(row))
+        selected = list(islice(rows, n))
+    else:  # random (default)
+        table = weighted_sampler.table_for(catalog, db_genders, source_ids)
+        selected = table.sample(n, is_excluded=is_excluded)
+
+    return catalog.records(selected)
+
+
+def _random_names_from_db(
+    db: Session,
+    current_user: CurrentUser,
+    n: int,
+    db_genders: List[str],
+    source_ids: Optional[List[int]],
+    sort_order: Optional[str],
+    exclude_voted: bool,
+    ranked: Optional[np.ndarray] = None,
+) -> List[Name]:
+    """
+    Select names straight from the database. sort_order=recommended takes
+    the user's `ranked` name ids (see _ranked).
+    """
+    if source_ids is not None and not source_ids:
+        return []  # None of the requested sources exist
+
+    if sort_order in POPULARITY_ORDERS:
+        return _popular_names_from_db(
+            db,
+            current_user,
+            n,
+            db_genders,
+            source_ids,
+            sort_order == "most_popular",
+            exclude_voted,
+        )
+
+    if sort_order == "recommended":
+        return _recommended_names_from_db(
+            db, current_user, ranked, n, db_genders, source_ids, exclude_voted
+        )
+
     # Base query
     query = db.query(Name)
 
@@ -37,124 +339,515 @@ def get_random_names(
         query = query.filter(~Name.id.in_(voted_subq))
 
     # Apply gender filter if valid
-    if genders:
-        gender_list = [g.strip().lower() for g in genders.split(",")]
-        # Convert frontend gender names to database format
-        db_genders = []
-        for gender in gender_list:
-            if gender == "male":
-                db_genders.append("m")
-            elif gender == "female":
-                db_genders.append("f")
+    if db_genders:
+        query = query.filter(Name.gender.in_(db_genders))
+
+    if source_ids:
+        query = query.filter(Name.source_id.in_(source_ids))
+
+    # Weighted sampling without replacement in one statement: every row gets
+    # the key -ln(u)/count and the n smallest keys win (Efraimidis-Spirakis).
+    # 1 - random() is in (0, 1], and names without a positive count go last.
+    sampling_key = -func.ln(1.0 - func.random()) / func.nullif(
+        func.greatest(Name.count, 0), 0
+    )
+    return query.order_by(sampling_key.asc().nullslast()).limit(n).all()
+
 
+def _recommended_names_from_db(
+    db: Session,
+    current_user: CurrentUser,
+    ranked: np.ndarray,
+    n: int,
+    db_genders: List[str],
+    source_ids: Optional[List[int]],
+    exclude_voted: bool,
+) -> List[Name]:
+    """
+    Top n names by collaborative-filtering score, topped up with the most
+    popular names when fewer than n have a score.
+    """
+    selected: List[Name] = []
+    if len(ranked):
+        # Keep the ranking in SQL so only the n rows returned are loaded
+        ranked_ids = (
+            func.unnest(bindparam("ranked_ids", ranked.tolist(), type_=ARRAY(Integer)))
+            .table_valued("name_id", with_ordinality="position")
+            .render_derived("ranked")
+        )
+        query = db.query(Name).join(ranked_ids, Name.id == ranked_ids.c.name_id)
+        if exclude_voted:
+            voted_subq = select(Vote.name_id).where(Vote.user_id == current_user.id)
+            query = query.filter(~Name.id.in_(voted_subq))
         if db_genders:
             query = query.filter(Name.gender.in_(db_genders))
+        if source_ids:
+            query = query.filter(Name.source_id.in_(source_ids))
+        selected = query.order_by(ranked_ids.c.position).limit(n).all()
 
-    # Pull all eligible names into memory (OK up to ~10k rows)
-    eligible_names = query.all()
+    if len(selected) < n:
+        picked = {name.id for name in selected}
+        popular = _popular_names_from_db(
+            db,
+            current_user,
+            n + len(picked),
+            db_genders,
+            source_ids,
+            True,
+            exclude_voted,
+        )
+        selected += [name for name in popular if name.id not in picked]
+    return selected[:n]
 
-    if not eligible_names:
-        log_warning("No names available for user to vote on", "get_random_names")
-        raise HTTPException(status_code=status.HTTP_204_NO_CONTENT)
 
-    # Apply sorting based on sort_order
-    if sort_order == "most_popular":
-        eligible_names.sort(key=lambda name: name.count, reverse=True)
-        selected = eligible_names[:n]
-    elif sort_order == "least_popular":
-        eligible_names.sort(key=lambda name: name.count)
-        selected = eligible_names[:n]
-    else:  # random (default)
-        if len(eligible_names) <= n:
-            selected = eligible_names
-        else:
-            # Sample without replacement using weights
-            weights = [name.count for name in eligible_names]
-            selected = random.choices(
-                population=eligible_names,
-                weights=weights,
-                k=n * 2,  # oversample to avoid dupes
+def _popularity_order(entity, most_popular: bool) -> tuple:
+    """ORDER BY matching the ix_names_gender_count(_desc)_id indexes."""
+    if most_popular:
+        return (entity.count.desc().nullslast(), entity.id.asc())
+    return (entity.count.asc().nullslast(), entity.id.asc())
+
+
+def _popular_names_from_db(
+    db: Session,
+    current_user: CurrentUser,
+    n: int,
+    db_genders: List[str],
+    source_ids: Optional[List[int]],
+    most_popular: bool,
+    exclude_voted: bool,
+) -> List[Name]:
+    """
+    Top n names by count, read straight off the (gender, count, id) indexes.
+    Each gender (and source, if filtered) gets its own ORDER BY ... LIMIT n
+    branch, which Postgres answers with an index range scan on
+    (gender, count, id) or (source_id, gender, count, id), and the branches
+    are merged. Without a gender filter the NULL gender is a branch of its own.
+    """
+    voted_subq = select(Vote.name_id).where(Vote.user_id == current_user.id)
+
+    branches = []
+    for gender in dict.fromkeys(db_genders or ["m", "f", None]):
+        for source_id in source_ids or [None]:
+            branch = select(Name).where(
+                Name.gender == gender if gender else Name.gender.is_(None)
+            )
+            if source_id is not None:
+                branch = branch.where(Name.source_id == source_id)
+            if exclude_voted:
+                branch = branch.where(~Name.id.in_(voted_subq))
+            branches.append(
+                branch.order_by(*_popularity_order(Name, most_popular)).limit(n)
             )
 
-            # Remove duplicates and trim to `n`
-            seen = set()
-            unique_selected = []
-            for name in selected:
-                if name.id not in seen:
-                    unique_selected.append(name)
-                    seen.add(name.id)
-                if len(unique_selected) == n:
-                    break
-            selected = unique_selected
+    ranked = aliased(Name, union_all(*branches).subquery())
+    return (
+        db.query(ranked)
+        .order_by(*_popularity_order(ranked, most_popular))
+        .limit(n)
+        .all()
+    )
 
-    log_info(f"Returning {len(selected)} random names", "get_random_names")
-    return selected
+
+def _ordered_cursor(
+    direction: str, source: Optional[str], gender: Optional[str], last
+) -> str:
+    """Cursor pointing just past `last` (a catalog record or Name row)."""
+    if isinstance(last, dict):
+        count, name_id = last["count"], last["id"]
+    else:
+        count, name_id = last.count, last.id
+    return encode_cursor(
+        {"d": direction, "s": source, "g": gender, "c": count, "i": name_id}
+    )
 
 
-# GET /names/ordered?direction=popular&after=123&limit=10&source=source_name&gender=m
-@router.get("/ordered", response_model=List[NameResponse])
+# GET /names/ordered?direction=popular&limit=10&source=Austria,Germany&gender=m&cursor=...
+@router.get("/ordered", response_model=NamePage)
 def get_ordered_names(
-    direction: str = Query("popular", regex="^(popular|unpopular)$"),
-    after: Optional[int] = None,  # name_id
+    direction: Optional[str] = Query(None, regex="^(popular|unpopular)$"),
+    cursor: Optional[str] = None,
     limit: int = Query(1, ge=1, le=100),
     source: Optional[str] = None,
     gender: Optional[str] = None,
+    include_stats: bool = Query(False),
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
 ):
     """
     Return names ordered by count (popular/unpopular), filtered by source/gender,
-    excluding names already voted on by the user.
-    Supports keyset pagination via `after` (name.id).
+    excluding names already voted on by the user. `source` takes one or more
+    comma-separated source names, matched exactly (case-insensitive).
+    Pages with an opaque keyset cursor: pass the previous page's `next_cursor`
+    to continue. The cursor carries the direction and filters it was issued for.
     """
+    direction, source, gender, after = _ordered_position(
+        direction, cursor, source, gender
+    )
+    descending = direction == "popular"
+    sources = _parse_sources(source)
+    vote_queue.wait_until_flushed(current_user.id)
 
-    # Validate direction
-    asc = direction == "unpopular"
+    catalog = name_catalog.get()
+    if catalog is None:
+        source_ids = _source_ids_from_db(db, sources) if sources else None
+        results = _ordered_names_from_db(
+            db, current_user, descending, after, limit, source_ids, gender
+        )
+    else:
+        source_ids = catalog.source_ids_for(sources) if sources else None
+        user_votes = vote_cache.get(db, current_user.id)
+        results = _ordered_names_from_catalog(
+            catalog, user_votes, descending, after, limit, source_ids, gender
+        )
 
-    # Base query: exclude already voted names
-    voted_subq = db.query(Vote.name_id).filter(Vote.user_id == current_user.id)
-    query = db.query(Name).filter(~Name.id.in_(voted_subq))
+    return _ordered_page(results, direction, source, gender, limit, include_stats)
 
-    # Apply filters
-    if source:
-        query = query.filter(Name.source.ilike(f"%{source}%"))
 
-    if gender and gender.lower() in ["m", "f"]:
-        query = query.filter(Name.gender == gender.lower())
+@async_router.get("/ordered", response_model=NamePage)
+async def get_ordered_names_async(
+    direction: Optional[str] = Query(None, regex="^(popular|unpopular)$"),
+    cursor: Optional[str] = None,
+    limit: int = Query(1, ge=1, le=100),
+    source: Optional[str] = None,
+    gender: Optional[str] = None,
+    include_stats: bool = Query(False),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CurrentUser = Depends(get_current_user_async),
+):
+    """get_ordered_names on the async engine."""
+    direction, source, gender, after = _ordered_position(
+        direction, cursor, source, gender
+    )
+    descending = direction == "popular"
+    sources = _parse_sources(source)
+    await vote_queue.wait_until_flushed_async(current_user.id)
 
-    # If `after` is given, use keyset pagination
-    if after:
-        anchor = db.query(Name).filter(Name.id == after).first()
-        if not anchor:
-            raise HTTPException(status_code=400, detail="Invalid `after` value")
+    catalog = name_catalog.get()
+    if catalog is None:
+        source_ids = None
+        if sources:
+            source_ids = await db.run_sync(_source_ids_from_db, sources)
+        results = await db.run_sync(
+            _ordered_names_from_db,
+            current_user,
+            descending,
+            after,
+            limit,
+            source_ids,
+            gender,
+        )
+    else:
+        source_ids = catalog.source_ids_for(sources) if sources else None
+        user_votes = await vote_cache.get_async(db, current_user.id)
+        results = await asyncio.to_thread(
+            _ordered_names_from_catalog,
+            catalog,
+            user_votes,
+            descending,
+            after,
+            limit,
+            source_ids,
+            gender,
+        )
 
-        anchor_count = anchor.count
-        anchor_id = anchor.id
+    return await asyncio.to_thread(
+        _ordered_page, results, direction, source, gender, limit, include_stats
+    )
 
-        if asc:
-            query = query.filter(
-                (Name.count > anchor_count)
-                | ((Name.count == anchor_count) & (Name.id > anchor_id))
-            )
-        else:
-            query = query.filter(
-                (Name.count < anchor_count)
-                | ((Name.count == anchor_count) & (Name.id > anchor_id))
+
+def _ordered_position(
+    direction: Optional[str],
+    cursor: Optional[str],
+    source: Optional[str],
+    gender: Optional[str],
+) -> Tuple[str, Optional[str], Optional[str], Optional[Tuple[int, int]]]:
+    """
+    (direction, source, gender, (count, id) to continue after) for a page of
+    /names/ordered, taken from the cursor if there is one.
+    """
+    gender = gender.lower() if gender and gender.lower() in ["m", "f"] else None
+
+    after = None
+    if cursor:
+        try:
+            position = decode_cursor(cursor)
+            after = (int(position["c"]), int(position["i"]))
+        except (InvalidCursor, KeyError, TypeError, ValueError):
+            raise HTTPException(status_code=400, detail="Invalid `cursor` value")
+
+        requested = {"d": direction, "s": source, "g": gender}
+        if any(
+            value is not None and value != position.get(key)
+            for key, value in requested.items()
+        ):
+            raise HTTPException(
+                status_code=400,
+                detail="`cursor` was issued for a different direction or filters",
             )
+        direction, source, gender = position["d"], position["s"], position["g"]
 
-    # Apply ordering
-    if asc:
-        query = query.order_by(Name.count.asc(), Name.id.asc())
-    else:
-        query = query.order_by(Name.count.desc(), Name.id.asc())
+    # popular = count DESC, id DESC; unpopular = count ASC, id ASC. Both are a
+    # single range scan over ([source_id,] [gender,] count, id), see migrations
+    # 0002 and 0008.
+    return direction or "popular", source, gender, after
 
-    # Limit results
-    results = query.limit(limit).all()
 
+def _ordered_page(
+    results: list,
+    direction: str,
+    source: Optional[str],
+    gender: Optional[str],
+    limit: int,
+    include_stats: bool,
+) -> dict:
     if not results:
         raise HTTPException(status_code=status.HTTP_204_NO_CONTENT)
 
-    return results
+    next_cursor = None
+    if len(results) == limit:
+        next_cursor = _ordered_cursor(direction, source, gender, results[-1])
+
+    if include_stats:
+        results = _with_stats(results)
+
+    return {"items": results, "next_cursor": next_cursor}
+
+
+def _ordered_names_from_catalog(
+    catalog: NameCatalog,
+    user_votes: UserVotes,
+    descending: bool,
+    after: Optional[Tuple[int, int]],
+    limit: int,
+    source_ids: Optional[set],
+    gender: Optional[str],
+) -> List[dict]:
+    """Keyset-ordered names served from the shared in-memory catalog."""
+    if source_ids is not None and not source_ids:
+        return []  # None of the requested sources exist
+
+    rows = catalog.rows_by_count(
+        descending, [gender] if gender else None, after, source_ids
+    )
+
+    ids = catalog.ids
+    rows = (row for row in rows if not user_votes.has_voted(ids[row]))
+
+    return catalog.records(list(islice(rows, limit)))
+
+
+def _ordered_names_from_db(
+    db: Session,
+    current_user: CurrentUser,
+    descending: bool,
+    after: Optional[Tuple[int, int]],
+    limit: int,
+    source_ids: Optional[List[int]],
+    gender: Optional[str],
+) -> List[Name]:
+    """
+    Keyset-ordered names straight from the database. With several sources
+    every source gets its own ORDER BY ... LIMIT branch (a range scan on
+    (source_id, [gender,] count, id)) and the branches are merged.
+    """
+    if source_ids is not None and not source_ids:
+        return []  # None of the requested sources exist
+
+    voted_subq = select(Vote.name_id).where(Vote.user_id == current_user.id)
+
+    def ordered(entity) -> tuple:
+        if descending:
+            return (entity.count.desc(), entity.id.desc())
+        return (entity.count.asc(), entity.id.asc())
+
+    branches = []
+    for source_id in source_ids or [None]:
+        # Base query: exclude already voted names
+        branch = select(Name).where(~Name.id.in_(voted_subq), Name.count.isnot(None))
+
+        # Apply filters
+        if source_id is not None:
+            branch = branch.where(Name.source_id == source_id)
+
+        if gender:
+            branch = branch.where(Name.gender == gender)
+
+        # Keyset pagination: one row-value comparison, no anchor lookup
+        if after:
+            position = tuple_(Name.count, Name.id)
+            if descending:
+                branch = branch.where(position < tuple_(*after))
+            else:
+                branch = branch.where(position > tuple_(*after))
+
+        branches.append(branch.order_by(*ordered(Name)).limit(limit))
+
+    if len(branches) == 1:
+        return db.scalars(branches[0]).all()
+
+    merged = aliased(Name, union_all(*branches).subquery())
+    return db.query(merged).order_by(*ordered(merged)).limit(limit).all()
+
+
+# GET /names/leaderboard?limit=10&genders=male,female&source=Austria,Germany
+@router.get("/leaderboard", response_model=LeaderboardResponse)
+def get_leaderboard(
+    limit: int = Query(10, ge=1, le=LEADERBOARD_MAX_LIMIT),
+    genders: Optional[str] = None,
+    source: Optional[str] = None,
+    db: Session = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_user),
+):
+    """
+    The most-liked and most-disliked names across all users, optionally
+    filtered by gender and source, with their like/dislike totals. Served
+    from the in-memory leaderboard, not from the votes table.
+    """
+    db_genders = _parse_genders(genders)
+    sources = _parse_sources(source)
+
+    catalog = name_catalog.get()
+    source_ids = None
+    if sources:
+        if catalog is not None:
+            source_ids = catalog.source_ids_for(sources)
+        else:
+            source_ids = _source_ids_from_db(db, sources)
+
+    ranked = {
+        metric: leaderboard.top(metric, limit, db_genders, source_ids)
+        for metric in ("likes", "dislikes")
+    }
+
+    name_ids = {name_id for top in ranked.values() for name_id, _ in top}
+    if catalog is not None:
+        rows = [catalog.index_of(name_id) for name_id in name_ids]
+        records = catalog.records([row for row in rows if row is not None])
+    else:
+        records = db.query(Name).filter(Name.id.in_(name_ids)).all()
+    by_id = {record["id"]: record for record in _with_stats(records)}
+
+    return {
+        "most_liked": [by_id[n] for n, _ in ranked["likes"] if n in by_id],
+        "most_disliked": [by_id[n] for n, _ in ranked["dislikes"] if n in by_id],
+    }
+
+
+# GET /names/search?prefix=Emi&limit=10
+@router.get("/search", response_model=List[NameResponse])
+def search_names(
+    prefix: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(10, ge=1, le=NAME_SEARCH_MAX_LIMIT),
+    db: Session = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_user),
+):
+    """
+    Autocomplete: the most popular names starting with `prefix`, ignoring
+    case, diacritics and punctuation. Served from an in-memory index.
+    """
+    catalog = name_catalog.get()
+    ids = name_search.index(db, catalog).complete(prefix, limit)
+    if catalog is not None:
+        # The index may predate the catalog: skip names it no longer has
+        rows = [catalog.index_of(name_id) for name_id in ids]
+        return catalog.records([row for row in rows if row is not None])
+
+    position = {name_id: i for i, name_id in enumerate(ids)}
+    names = db.query(Name).filter(Name.id.in_(ids)).all() if ids else []
+    return sorted(names, key=lambda name: position[name.id])
+
+
+# GET /names/fuzzy?name=Jaqueline&max_distance=2&limit=20
+@router.get("/fuzzy", response_model=List[FuzzyMatch])
+def fuzzy_search_names(
+    name: str = Query(..., min_length=1, max_length=100),
+    max_distance: int = Query(2, ge=0, le=NAME_FUZZY_MAX_DISTANCE),
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_user),
+):
+    """
+    Names within `max_distance` edits of `name` (Jaqueline -> Jacqueline,
+    Jaquelin), closest first, then most popular. Case and diacritics are
+    ignored.
+    """
+    catalog = name_catalog.get()
+    matches = fuzzy_search.search(db, catalog, name, max_distance, limit)
+    ids = [name_id for name_id, _ in matches]
+    if catalog is not None:
+        rows = [catalog.index_of(name_id) for name_id in ids]
+        records = catalog.records([row for row in rows if row is not None])
+    else:
+        records = [
+            NameResponse.model_validate(row).model_dump()
+            for row in (db.query(Name).filter(Name.id.in_(ids)) if ids else [])
+        ]
+    by_id = {record["id"]: record for record in records}
+    return [
+        {**by_id[name_id], "distance": distance}
+        for name_id, distance in matches
+        if name_id in by_id
+    ]
+
+
+# GET /names/sounds-like?name=Sofie&genders=female&limit=100
+@router.get("/sounds-like", response_model=List[NameResponse])
+def get_sound_alike_names(
+    name: str = Query(..., min_length=1, max_length=100),
+    genders: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=500),
+    db: Session = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_user),
+):
+    """
+    Names that sound like `name` (Sophie/Sofie/Sophia, Maik/Mike/Meik),
+    most popular first. One lookup on the GIN index over names.phonetic_keys.
+    """
+    keys = phonetic_keys(name)
+    if not keys:
+        return []
+
+    query = db.query(Name).filter(Name.phonetic_keys.overlap(keys))
+    db_genders = _parse_genders(genders)
+    if db_genders:
+        query = query.filter(Name.gender.in_(db_genders))
+    return (
+        query.order_by(*_popularity_order(Name, most_popular=True)).limit(limit).all()
+    )
+
+
+# GET /names/123/similar?limit=10
+@router.get("/{name_id:int}/similar", response_model=List[SimilarName])
+def get_similar_names(
+    name_id: int,
+    limit: int = Query(10, ge=1, le=SIMILAR_NAMES_MAX_LIMIT),
+    db: Session = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_user),
+):
+    """
+    Names similar in form to the given one: shared letter sequences,
+    endings, length, syllable shape and origin. Most similar first.
+    """
+    catalog = name_catalog.get()
+    similar = name_similarity.index(db, catalog).similar(name_id, limit)
+    if similar is None:
+        raise HTTPException(status_code=404, detail="Name not found")
+
+    ids = [similar_id for similar_id, _ in similar]
+    if catalog is not None:
+        rows = [catalog.index_of(i) for i in ids]
+        records = catalog.records([row for row in rows if row is not None])
+    else:
+        records = [
+            NameResponse.model_validate(name).model_dump()
+            for name in db.query(Name).filter(Name.id.in_(ids))
+        ]
+    by_id = {record["id"]: record for record in records}
+    return [
+        {**by_id[similar_id], "similarity": similarity}
+        for similar_id, similarity in similar
+        if similar_id in by_id
+    ]
 
 
 # GET /names/info/{name}
@@ -1,12 +1,70 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy import and_, except_, func, intersect, or_, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, aliased, contains_eager
+import asyncio
+import heapq
 from typing import List, Optional
 
-from auth.auth_utils import get_db, get_current_user
-from models.database import Vote, User, Name
-from schemas.schemas import VoteCreate, VoteResponse, VoteWithName
+from auth.auth_utils import (
+    CurrentUser,
+    get_async_db,
+    get_current_user,
+    get_current_user_async,
+    get_db,
+)
+from config import get_required_env
+from models.database import Vote, User, Name, UserVoteCounts
+from schemas.schemas import (
+    CompareResponse,
+    GroupMatchResponse,
+    VoteBatch,
+    VoteBatchResponse,
+    VoteCreate,
+    VotePage,
+    VoteResponse,
+)
+from utils.cursor import InvalidCursor, decode_cursor, encode_cursor
+from utils.bitsets import count_planes, exactly, iter_bits
+from utils.leaderboard import leaderboard
+from utils.name_catalog import name_catalog
+from utils.vote_cache import vote_cache
+from utils.vote_queue import upsert_votes, vote_queue
+from utils.vote_stats import vote_stats
 
 router = APIRouter()
+# Async variants of the hot routes (DATABASE_ASYNC=true), see routes/names.py:
+# queries run on the request's AsyncSession (run_sync only wraps helpers that
+# do nothing but query), updating the vote caches and stats runs via
+# asyncio.to_thread, so neither blocks the event loop
+async_router = APIRouter()
+
+# SQLSTATE raised when votes.name_id points at a missing name
+FOREIGN_KEY_VIOLATION = "23503"
+
+# Upper bound on members (including the caller) for GET /votes/group
+VOTE_GROUP_MAX_USERS = int(get_required_env("VOTE_GROUP_MAX_USERS", "20"))
+
+
+def _name_in_catalog(name_id: int) -> bool:
+    catalog = name_catalog.get()
+    return catalog is not None and catalog.index_of(name_id) is not None
+
+
+def _name_in_db(db: Session, name_id: int) -> bool:
+    return db.query(Name.id).filter(Name.id == name_id).first() is not None
+
+
+def _name_exists(db: Session, name_id: int) -> bool:
+    """Check the shared catalog first; only unknown ids hit the database."""
+    return _name_in_catalog(name_id) or _name_in_db(db, name_id)
+
+
+def _queued_vote(user_id: int, vote: VoteCreate) -> dict:
+    vote_queue.submit(user_id, vote.name_id, vote.vote)
+    return {"id": None, "name_id": vote.name_id, "vote": vote.vote}
 
 
 # POST /votes/
@@ -14,54 +72,245 @@ router = APIRouter()
 def create_or_update_vote(
     vote: VoteCreate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
 ):
-    """Create or update a vote for a name."""
-    name = db.query(Name).filter(Name.id == vote.name_id).first()
-    if not name:
-        raise HTTPException(status_code=404, detail="Name not found")
+    """
+    Create or update a vote for a name in a single round trip:
+    INSERT ... ON CONFLICT (user_id, name_id) DO UPDATE ... RETURNING.
+    The votes.name_id foreign key takes the place of a Name lookup.
+    With VOTE_WRITE_BEHIND the vote is queued instead and written by the
+    next group commit; the response then has no id yet.
+    """
+    if vote_queue.enabled:
+        if not _name_exists(db, vote.name_id):
+            raise HTTPException(status_code=404, detail="Name not found")
+        return _queued_vote(current_user.id, vote)
 
-    existing = (
-        db.query(Vote)
-        .filter(Vote.user_id == current_user.id, Vote.name_id == vote.name_id)
-        .first()
+    saved = _upsert_vote(db, current_user.id, vote)
+    _record_vote(current_user.id, saved)
+    return saved
+
+
+def _upsert_vote(db: Session, user_id: int, vote: VoteCreate):
+    """Upsert and commit one vote; returns the row with its previous value."""
+    # RETURNING subqueries see the row as it was before the statement
+    prior = aliased(Vote)
+    previous = (
+        select(prior.vote)
+        .where(prior.user_id == user_id, prior.name_id == vote.name_id)
+        .scalar_subquery()
     )
+    stmt = insert(Vote).values(user_id=user_id, name_id=vote.name_id, vote=vote.vote)
+    stmt = stmt.on_conflict_do_update(
+        constraint="unique_user_name_vote", set_={"vote": stmt.excluded.vote}
+    ).returning(Vote.id, Vote.name_id, Vote.vote, previous.label("previous"))
 
-    if existing:
-        existing.vote = vote.vote
+    try:
+        saved = db.execute(stmt).one()
         db.commit()
-        db.refresh(existing)
-        return existing
-    else:
-        new_vote = Vote(user_id=current_user.id, name_id=vote.name_id, vote=vote.vote)
-        db.add(new_vote)
-        db.commit()
-        db.refresh(new_vote)
-        return new_vote
+    except IntegrityError as e:
+        db.rollback()
+        if getattr(e.orig, "pgcode", None) == FOREIGN_KEY_VIOLATION:
+            raise HTTPException(status_code=404, detail="Name not found")
+        raise
+    return saved
+
+
+def _record_vote(user_id: int, saved):
+    """Apply a committed vote to the vote cache, stats and leaderboard."""
+    vote_cache.record_vote(user_id, saved.name_id, saved.vote)
+    leaderboard.update(
+        vote_stats.record_votes([(saved.name_id, saved.previous, saved.vote)])
+    )
+
+
+@async_router.post("/", response_model=VoteResponse)
+async def create_or_update_vote_async(
+    vote: VoteCreate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CurrentUser = Depends(get_current_user_async),
+):
+    """create_or_update_vote on the async engine."""
+    if vote_queue.enabled:
+        if not (
+            _name_in_catalog(vote.name_id)
+            or await db.run_sync(_name_in_db, vote.name_id)
+        ):
+            raise HTTPException(status_code=404, detail="Name not found")
+        return _queued_vote(current_user.id, vote)
+
+    saved = await db.run_sync(_upsert_vote, current_user.id, vote)
+    await asyncio.to_thread(_record_vote, current_user.id, saved)
+    return saved
+
+
+# POST /votes/batch
+@router.post("/batch", response_model=VoteBatchResponse)
+def create_or_update_votes(
+    batch: VoteBatch,
+    db: Session = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_user),
+):
+    """
+    Create or update many votes in one transaction and one statement.
+    Items are upserted with INSERT ... SELECT FROM unnest(...) JOIN names,
+    so unknown names are skipped instead of failing the whole batch. If a
+    name appears more than once, its last item wins.
+    """
+    # Queued single votes must not land on top of this batch later
+    vote_queue.wait_until_flushed(current_user.id)
+    saved = _upsert_batch(db, current_user.id, batch)
+    return _record_batch(current_user.id, batch, saved)
 
 
-# GET /votes?vote=true&skip=0&limit=100
-@router.get("/", response_model=List[VoteWithName])
+def _upsert_batch(db: Session, user_id: int, batch: VoteBatch) -> dict:
+    """Upsert and commit a batch; returns the saved rows by name id."""
+    # One row per name: ON CONFLICT cannot touch the same row twice
+    latest = {item.name_id: item.vote for item in batch.votes}
+
+    rows = upsert_votes(
+        db, [(user_id, name_id, vote) for name_id, vote in latest.items()]
+    )
+    saved = {row.name_id: row for row in rows}
+    db.commit()
+    return saved
+
+
+def _record_batch(user_id: int, batch: VoteBatch, saved: dict) -> dict:
+    """Apply a committed batch to the caches and build the response."""
+    vote_cache.record_votes(
+        user_id, [(row.name_id, row.vote) for row in saved.values()]
+    )
+    leaderboard.update(
+        vote_stats.record_votes(
+            [(row.name_id, row.previous, row.vote) for row in saved.values()]
+        )
+    )
+
+    results = []
+    for item in batch.votes:
+        row = saved.get(item.name_id)
+        if row is None:
+            results.append(
+                {"name_id": item.name_id, "vote": item.vote, "status": "not_found"}
+            )
+        else:
+            results.append(
+                {
+                    "id": row.id,
+                    "name_id": row.name_id,
+                    "vote": row.vote,
+                    "status": "saved",
+                }
+            )
+
+    return {"saved": len(saved), "results": results}
+
+
+@async_router.post("/batch", response_model=VoteBatchResponse)
+async def create_or_update_votes_async(
+    batch: VoteBatch,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CurrentUser = Depends(get_current_user_async),
+):
+    """create_or_update_votes on the async engine."""
+    await vote_queue.wait_until_flushed_async(current_user.id)
+    saved = await db.run_sync(_upsert_batch, current_user.id, batch)
+    return await asyncio.to_thread(_record_batch, current_user.id, batch, saved)
+
+
+def _vote_counts(db: Session, user_id: int) -> dict:
+    """Totals from the trigger-maintained user_vote_counts row."""
+    counts = db.get(UserVoteCounts, user_id)
+    likes = counts.likes if counts else 0
+    dislikes = counts.dislikes if counts else 0
+    return {"total": likes + dislikes, "likes": likes, "dislikes": dislikes}
+
+
+# GET /votes?vote=true&limit=100&cursor=...&include_counts=true
+@router.get("/", response_model=VotePage)
 def get_votes(
     vote: Optional[bool] = Query(None),
-    skip: int = 0,
-    limit: int = Query(100, le=100),
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=100),
+    include_counts: bool = Query(False),
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
 ):
-    """Get current user's votes, optionally filtered by vote type."""
+    """
+    Get current user's votes, optionally filtered by vote type, ordered
+    alphabetically by name. Pages with an opaque keyset cursor on
+    (name, vote id): pass the previous page's `next_cursor` to continue.
+    """
+    vote_queue.wait_until_flushed(current_user.id)
+    return _votes_page(db, current_user, vote, cursor, limit, include_counts)
+
+
+def _votes_page(
+    db: Session,
+    current_user: CurrentUser,
+    vote: Optional[bool],
+    cursor: Optional[str],
+    limit: int,
+    include_counts: bool,
+) -> dict:
+    """Body of GET /votes; the caller has waited for queued votes."""
+    after = None
+    if cursor:
+        try:
+            position = decode_cursor(cursor)
+            after = (str(position["n"]), int(position["i"]))
+        except (InvalidCursor, KeyError, TypeError, ValueError):
+            raise HTTPException(status_code=400, detail="Invalid `cursor` value")
+        if vote is not None and vote != position.get("v"):
+            raise HTTPException(
+                status_code=400, detail="`cursor` was issued for a different filter"
+            )
+        vote = position.get("v")
+
+    # One join, reused to populate Vote.name
     query = (
         db.query(Vote)
+        .join(Vote.name)
+        .options(contains_eager(Vote.name))
         .filter(Vote.user_id == current_user.id)
-        .options(joinedload(Vote.name))
-        .join(Name)
-        .order_by(Name.name.asc())  # Order alphabetically by name
     )
 
     if vote is not None:
         query = query.filter(Vote.vote == vote)
 
-    return query.offset(skip).limit(limit).all()
+    if after:
+        query = query.filter(tuple_(Name.name, Vote.id) > tuple_(*after))
+
+    # Order alphabetically by name
+    votes = query.order_by(Name.name.asc(), Vote.id.asc()).limit(limit).all()
+
+    next_cursor = None
+    if len(votes) == limit:
+        last = votes[-1]
+        next_cursor = encode_cursor({"v": vote, "n": last.name.name, "i": last.id})
+
+    return {
+        "items": votes,
+        "next_cursor": next_cursor,
+        "counts": _vote_counts(db, current_user.id) if include_counts else None,
+    }
+
+
+@async_router.get("/", response_model=VotePage)
+async def get_votes_async(
+    vote: Optional[bool] = Query(None),
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=100),
+    include_counts: bool = Query(False),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CurrentUser = Depends(get_current_user_async),
+):
+    """get_votes on the async engine."""
+    await vote_queue.wait_until_flushed_async(current_user.id)
+    return await db.run_sync(
+        _votes_page, current_user, vote, cursor, limit, include_counts
+    )
 
 
 # DELETE /votes/by-name/{name_id}
@@ -69,13 +318,19 @@ def get_votes(
 def delete_vote_by_name(
     name_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
 ):
     """Delete a vote by name ID for the current user."""
+    vote_queue.wait_until_flushed(current_user.id)
+    previous = _delete_vote(db, current_user.id, name_id)
+    _record_delete(current_user.id, name_id, previous)
+    return {"message": "Vote deleted successfully"}
+
+
+def _delete_vote(db: Session, user_id: int, name_id: int) -> bool:
+    """Delete and commit the user's vote on a name; returns what it was."""
     vote = (
-        db.query(Vote)
-        .filter(Vote.user_id == current_user.id, Vote.name_id == name_id)
-        .first()
+        db.query(Vote).filter(Vote.user_id == user_id, Vote.name_id == name_id).first()
     )
 
     if not vote:
@@ -83,55 +338,259 @@ def delete_vote_by_name(
 
     db.delete(vote)
     db.commit()
+    return vote.vote
+
+
+def _record_delete(user_id: int, name_id: int, previous: bool):
+    """Apply a committed delete to the vote cache, stats and leaderboard."""
+    vote_cache.record_delete(user_id, name_id)
+    leaderboard.update(vote_stats.record_votes([(name_id, previous, None)]))
+
+
+@async_router.delete("/by-name/{name_id}")
+async def delete_vote_by_name_async(
+    name_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CurrentUser = Depends(get_current_user_async),
+):
+    """delete_vote_by_name on the async engine."""
+    await vote_queue.wait_until_flushed_async(current_user.id)
+    previous = await db.run_sync(_delete_vote, current_user.id, name_id)
+    await asyncio.to_thread(_record_delete, current_user.id, name_id, previous)
     return {"message": "Vote deleted successfully"}
 
 
-# GET /votes/compare?other_username=jessica
-@router.get("/compare", response_model=dict)
+COMPARE_BUCKETS = ("both", "only_you", "only_other")
+
+
+def _liked_subquery(user_id: int):
+    """Liked name ids, an index-only scan on ix_votes_user_vote_name."""
+    return select(Vote.name_id).where(Vote.user_id == user_id, Vote.vote.is_(True))
+
+
+def _bucket_query(bucket: str, user_id: int, other_id: int):
+    """Name ids in a compare bucket, as INTERSECT / EXCEPT of liked ids."""
+    mine, theirs = _liked_subquery(user_id), _liked_subquery(other_id)
+    if bucket == "both":
+        return intersect(mine, theirs)
+    if bucket == "only_you":
+        return except_(mine, theirs)
+    return except_(theirs, mine)
+
+
+def _compare_page(
+    db: Session,
+    bucket: str,
+    user_id: int,
+    other_id: int,
+    sort: str,
+    after: Optional[list],
+    limit: int,
+) -> dict:
+    """One keyset-paged, sorted page of a compare bucket."""
+    ids = _bucket_query(bucket, user_id, other_id).subquery()
+    query = db.query(Name).join(ids, Name.id == ids.c.name_id)
+
+    if sort == "popular":
+        # count DESC NULLS LAST, id ASC; NULL counts sort as -1
+        count = func.coalesce(Name.count, -1)
+        if after:
+            query = query.filter(
+                or_(
+                    count < after[0],
+                    and_(count == after[0], Name.id > after[1]),
+                )
+            )
+        query = query.order_by(count.desc(), Name.id.asc())
+    else:
+        if after:
+            query = query.filter(tuple_(Name.name, Name.id) > tuple_(*after))
+        query = query.order_by(Name.name.asc(), Name.id.asc())
+
+    names = query.limit(limit).all()
+
+    next_cursor = None
+    if len(names) == limit:
+        last = names[-1]
+        if sort == "popular":
+            key = [last.count if last.count is not None else -1, last.id]
+        else:
+            key = [last.name, last.id]
+        next_cursor = encode_cursor({"b": bucket, "s": sort, "o": other_id, "k": key})
+
+    return {"items": names, "next_cursor": next_cursor}
+
+
+# GET /votes/compare?other_username=jessica&bucket=both&sort=name&limit=50&cursor=...
+@router.get("/compare", response_model=CompareResponse)
 def compare_votes(
     other_username: str,
+    bucket: Optional[str] = Query(None, regex="^(both|only_you|only_other)$"),
+    sort: Optional[str] = Query(None, regex="^(name|popular)$"),
+    limit: int = Query(50, ge=1, le=100),
+    cursor: Optional[str] = None,
+    counts_only: bool = Query(False),
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
 ):
-    """Compare mutual and unique likes between current user and another user."""
+    """
+    Compare mutual and unique likes between current user and another user.
+    Counts come from AND / AND NOT of the cached like bitsets. Names are
+    returned a page at a time per bucket, sorted by name or popularity;
+    without `bucket` the first page of every bucket is returned, and
+    `counts_only=true` skips the names entirely.
+    """
     other_user = db.query(User).filter(User.username == other_username).first()
     if not other_user:
         raise HTTPException(status_code=404, detail="Other user not found")
 
-    # Fetch liked names for both users
-    user_votes = (
-        db.query(Vote)
-        .filter(Vote.user_id == current_user.id, Vote.vote.is_(True))
-        .options(joinedload(Vote.name))
-        .all()
-    )
+    vote_queue.wait_until_flushed(current_user.id)
+    vote_queue.wait_until_flushed(other_user.id)
 
-    other_votes = (
-        db.query(Vote)
-        .filter(Vote.user_id == other_user.id, Vote.vote.is_(True))
-        .options(joinedload(Vote.name))
+    mine = vote_cache.get(db, current_user.id).like_mask()
+    theirs = vote_cache.get(db, other_user.id).like_mask()
+    counts = {
+        "both": (mine & theirs).bit_count(),
+        "only_you": (mine & ~theirs).bit_count(),
+        "only_other": (theirs & ~mine).bit_count(),
+    }
+    response = {"counts": counts}
+    if counts_only:
+        return response
+
+    after = None
+    if cursor:
+        try:
+            position = decode_cursor(cursor)
+            after = list(position["k"])
+            issued_for = (position["b"], position["s"], position["o"])
+        except (InvalidCursor, KeyError, TypeError, ValueError):
+            raise HTTPException(status_code=400, detail="Invalid `cursor` value")
+        if issued_for[2] != other_user.id or any(
+            value is not None and value != issued
+            for value, issued in zip((bucket, sort), issued_for)
+        ):
+            raise HTTPException(
+                status_code=400,
+                detail="`cursor` was issued for a different comparison",
+            )
+        bucket, sort = issued_for[0], issued_for[1]
+
+    sort = sort or "name"
+
+    for name in [bucket] if bucket else COMPARE_BUCKETS:
+        if counts[name] or after:
+            response[name] = _compare_page(
+                db, name, current_user.id, other_user.id, sort, after, limit
+            )
+        else:
+            response[name] = {"items": [], "next_cursor": None}
+
+    return response
+
+
+def _top_by_popularity(db: Session, ids: List[int], n: int) -> list:
+    """The n most popular of `ids` (count DESC NULLS LAST, id ASC)."""
+    catalog = name_catalog.get()
+    if catalog is not None:
+        rows = [row for row in map(catalog.index_of, ids) if row is not None]
+        top = heapq.nsmallest(
+            n, rows, key=lambda row: catalog.popularity_key(row, True)
+        )
+        return catalog.records(top)
+
+    return (
+        db.query(Name)
+        .filter(Name.id.in_(ids))
+        .order_by(Name.count.desc().nullslast(), Name.id.asc())
+        .limit(n)
         .all()
     )
 
-    user_name_ids = {v.name_id: v.name for v in user_votes}
-    other_name_ids = {v.name_id: v.name for v in other_votes}
 
-    both = []
-    only_you = []
-    only_other = []
+def _name_id(name) -> int:
+    return name["id"] if isinstance(name, dict) else name.id
 
-    for name_id in user_name_ids:
-        if name_id in other_name_ids:
-            both.append(user_name_ids[name_id])
-        else:
-            only_you.append(user_name_ids[name_id])
 
-    for name_id in other_name_ids:
-        if name_id not in user_name_ids:
-            only_other.append(other_name_ids[name_id])
+# GET /votes/group?usernames=anna,ben,clara&min_likes=3&limit=50
+@router.get("/group", response_model=GroupMatchResponse)
+def group_matches(
+    usernames: str,
+    min_likes: Optional[int] = Query(None, ge=1),
+    exclude_disliked: bool = Query(False),
+    limit: int = Query(50, ge=1, le=100),
+    db: Session = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_user),
+):
+    """
+    Names liked by at least `min_likes` members of a group (the current user
+    plus `usernames`, comma-separated); `min_likes` defaults to everyone.
+    Ranked by how many members liked a name, then by popularity. With
+    `exclude_disliked=true` any member's dislike vetoes a name.
+
+    Works on the cached per-user like/dislike bitsets: a bit-sliced counter
+    adds up the like masks, so each agreement level is a few big-int
+    operations and no Vote rows are loaded.
+    """
+    requested = [u.strip() for u in usernames.split(",") if u.strip()]
+    requested = [u for u in dict.fromkeys(requested) if u != current_user.username]
+
+    if len(requested) + 1 > VOTE_GROUP_MAX_USERS:
+        raise HTTPException(
+            status_code=422,
+            detail=f"At most {VOTE_GROUP_MAX_USERS} users per group",
+        )
+
+    others = db.query(User).filter(User.username.in_(requested)).all()
+    missing = set(requested) - {user.username for user in others}
+    if missing:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Users not found: {', '.join(sorted(missing))}",
+        )
+
+    members = [current_user] + sorted(others, key=lambda user: user.username)
+    min_likes = len(members) if min_likes is None else min_likes
+    if min_likes > len(members):
+        raise HTTPException(
+            status_code=422,
+            detail=f"`min_likes` cannot exceed the group size ({len(members)})",
+        )
+
+    bitsets = []
+    for member in members:
+        vote_queue.wait_until_flushed(member.id)
+        bitsets.append(vote_cache.get(db, member.id))
+
+    like_masks = [votes.like_mask() for votes in bitsets]
+    vetoed = 0
+    if exclude_disliked:
+        for votes in bitsets:
+            vetoed |= votes.dislike_mask()
+
+    universe = 0
+    for mask in like_masks:
+        universe |= mask
+    universe &= ~vetoed
+    planes = count_planes(like_masks)
+
+    total = 0
+    items = []
+    for likes in range(len(members), min_likes - 1, -1):
+        level = exactly(planes, likes, universe)
+        if not level:
+            continue
+        total += level.bit_count()
+        if len(items) < limit:
+            names = _top_by_popularity(db, list(iter_bits(level)), limit - len(items))
+            for name in names:
+                name_id = _name_id(name)
+                dislikes = sum(votes.vote_of(name_id) is False for votes in bitsets)
+                items.append({"name": name, "likes": likes, "dislikes": dislikes})
 
     return {
-        "both": both,
-        "only_you": only_you,
-        "only_other": only_other,
+        "members": [member.username for member in members],
+        "min_likes": min_likes,
+        "total": total,
+        "items": items,
     }
@@ -1,5 +1,10 @@
-from pydantic import BaseModel
-from typing import Optional, Dict, Any
+from pydantic import BaseModel, Field
+from typing import Optional, Dict, Any, List
+
+from config import get_required_env
+
+# Upper bound on items per POST /votes/batch request
+VOTE_BATCH_MAX_ITEMS = int(get_required_env("VOTE_BATCH_MAX_ITEMS", "500"))
 
 
 # User schemas
@@ -44,11 +49,32 @@ class NameCreate(NameBase):
 
 class NameResponse(NameBase):
     id: int
+    # Only filled in when the request asks for include_stats=true
+    likes: Optional[int] = None
+    dislikes: Optional[int] = None
 
     class Config:
         from_attributes = True
 
 
+class NamePage(BaseModel):
+    items: List[NameResponse]
+    next_cursor: Optional[str] = None  # pass back as `cursor` for the next page
+
+
+class SimilarName(NameResponse):
+    similarity: float  # cosine similarity of the name features, 0..1
+
+
+class FuzzyMatch(NameResponse):
+    distance: int  # edit distance from the query (case/diacritics ignored)
+
+
+class LeaderboardResponse(BaseModel):
+    most_liked: List[NameResponse]
+    most_disliked: List[NameResponse]
+
+
 class NameInfoResponse(BaseModel):
     name: str
     info: Dict[str, Any]
@@ -68,12 +94,27 @@ class VoteCreate(VoteBase):
 
 
 class VoteResponse(VoteBase):
-    id: int
+    id: Optional[int] = None  # None while the vote is queued (write-behind)
 
     class Config:
         from_attributes = True
 
 
+class VoteBatch(BaseModel):
+    # Checked while parsing, so oversized bodies are rejected before any work
+    votes: List[VoteCreate] = Field(..., min_length=1, max_length=VOTE_BATCH_MAX_ITEMS)
+
+
+class VoteBatchResult(VoteBase):
+    id: Optional[int] = None  # None unless status is "saved"
+    status: str  # "saved" or "not_found"
+
+
+class VoteBatchResponse(BaseModel):
+    saved: int
+    results: List[VoteBatchResult]
+
+
 class VoteWithName(BaseModel):
     id: int
     name_id: int
@@ -82,3 +123,47 @@ class VoteWithName(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+class VoteCounts(BaseModel):
+    total: int
+    likes: int
+    dislikes: int
+
+
+class VotePage(BaseModel):
+    items: List[VoteWithName]
+    next_cursor: Optional[str] = None
+    counts: Optional[VoteCounts] = None  # Only when include_counts=true
+
+
+class CompareCounts(BaseModel):
+    both: int
+    only_you: int
+    only_other: int
+
+
+class CompareBucket(BaseModel):
+    items: List[NameResponse]
+    next_cursor: Optional[str] = None
+
+
+class CompareResponse(BaseModel):
+    counts: CompareCounts
+    # Buckets are omitted in counts-only mode or when another bucket is paged
+    both: Optional[CompareBucket] = None
+    only_you: Optional[CompareBucket] = None
+    only_other: Optional[CompareBucket] = None
+
+
+class GroupMatch(BaseModel):
+    name: NameResponse
+    likes: int  # Group members who liked the name
+    dislikes: int
+
+
+class GroupMatchResponse(BaseModel):
+    members: List[str]
+    min_likes: int
+    total: int  # Names liked by at least min_likes members
+    items: List[GroupMatch]
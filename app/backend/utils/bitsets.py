@@ -0,0 +1,47 @@
+"""
+Helpers for name-id bitmasks stored as Python ints (bit n = Name.id n).
+
+Counting how many of N masks have each bit set uses a bit-sliced counter:
+the per-bit counts are kept as binary digits spread over a few "plane"
+masks, so adding a mask is a handful of big-int XOR/AND operations instead
+of a loop over its ids.
+"""
+
+from typing import Iterable, Iterator, List
+
+
+def iter_bits(mask: int) -> Iterator[int]:
+    """Yield the positions of the set bits in ascending order."""
+    data = mask.to_bytes((mask.bit_length() + 7) // 8, "little")
+    for index, byte in enumerate(data):
+        while byte:
+            low = byte & -byte
+            yield (index << 3) + low.bit_length() - 1
+            byte ^= low
+
+
+def count_planes(masks: Iterable[int]) -> List[int]:
+    """
+    Per-bit population count of `masks` as bit planes: bit n of planes[i]
+    is binary digit i of the number of masks that have bit n set.
+    """
+    planes: List[int] = []
+    for mask in masks:
+        carry = mask
+        for i, plane in enumerate(planes):
+            planes[i], carry = plane ^ carry, plane & carry
+            if not carry:
+                break
+        if carry:
+            planes.append(carry)
+    return planes
+
+
+def exactly(planes: List[int], count: int, universe: int) -> int:
+    """Bits (within `universe`) whose count in `planes` equals `count`."""
+    if count >> len(planes):
+        return 0
+    mask = universe
+    for i, plane in enumerate(planes):
+        mask &= plane if count >> i & 1 else ~plane
+    return mask
@@ -0,0 +1,125 @@
+"""
+In-memory indexes built from all names and kept in step with the catalog.
+
+The /names/{id}/similar, /names/search and /names/fuzzy indexes take
+seconds to build for a large names table. CatalogIndex holds the current
+one and rebuilds it in a background thread when the shared name catalog
+changes (or, without a catalog, when it is older than its refresh
+interval). Requests keep getting the previous index until the new one is
+swapped in, so only the very first build, normally done at startup, runs
+before a request is answered.
+
+Subclasses say how to build the index from a catalog or from the names
+table; requests must cope with ids the current catalog no longer has.
+"""
+
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Generic, Optional, TypeVar
+
+from sqlalchemy.orm import Session
+
+from models.database import SessionLocal
+from utils.logging_config import APP_LOGGER, ERROR_LOGGER
+from utils.name_catalog import NameCatalog
+
+IndexT = TypeVar("IndexT")
+
+
+class CatalogIndex(ABC, Generic[IndexT]):
+    """Holds an index over all names and rebuilds it off the request path."""
+
+    label = "name"
+
+    def __init__(self, refresh_seconds: int):
+        self.refresh_seconds = refresh_seconds
+        self._index: Optional[IndexT] = None
+        self._built_for: Optional[tuple] = None
+        self._built_at = 0.0
+        # Held while building, so at most one build runs per process
+        self._build_lock = threading.Lock()
+        self._rebuilding = False
+        self._rebuilding_lock = threading.Lock()
+
+    @abstractmethod
+    def build_from_catalog(self, catalog: NameCatalog) -> IndexT:
+        """Build the index from the shared name catalog."""
+
+    @abstractmethod
+    def build_from_db(self, db: Session) -> IndexT:
+        """Build the index from the names table."""
+
+    @staticmethod
+    def _key(catalog: Optional[NameCatalog]) -> tuple:
+        return ("catalog", catalog.file_id) if catalog is not None else ("db",)
+
+    def _is_fresh(self, key: tuple) -> bool:
+        if key != self._built_for:
+            return False
+        if key[0] == "catalog":
+            return True
+        return time.monotonic() - self._built_at < self.refresh_seconds
+
+    def index(self, db: Session, catalog: Optional[NameCatalog]) -> IndexT:
+        """
+        The current index. If the names changed since it was built, a
+        rebuild is started in the background and the current one returned;
+        only when there is none yet is it built on this request.
+        """
+        index = self._index
+        if index is None:
+            with self._build_lock:
+                if self._index is None:
+                    self._build(catalog, db)
+                return self._index
+
+        if not self._is_fresh(self._key(catalog)):
+            self._start_rebuild(catalog)
+        return index
+
+    def rebuild(self, catalog: Optional[NameCatalog]):
+        """Build the index now (e.g. at startup) unless it is up to date."""
+        with self._build_lock:
+            if self._index is None or not self._is_fresh(self._key(catalog)):
+                self._build(catalog)
+
+    def _build(self, catalog: Optional[NameCatalog], db: Optional[Session] = None):
+        started = time.perf_counter()
+        if catalog is not None:
+            index = self.build_from_catalog(catalog)
+        elif db is not None:
+            index = self.build_from_db(db)
+        else:
+            db = SessionLocal()
+            try:
+                index = self.build_from_db(db)
+            finally:
+                db.close()
+        self._built_for = self._key(catalog)
+        self._built_at = time.monotonic()
+        # Readers take self._index without the lock: swap it in one assignment
+        self._index = index
+        APP_LOGGER.info(
+            f"Built {self.label} index in {time.perf_counter() - started:.3f}s"
+        )
+
+    def _start_rebuild(self, catalog: Optional[NameCatalog]):
+        with self._rebuilding_lock:
+            if self._rebuilding:
+                return
+            self._rebuilding = True
+        threading.Thread(
+            target=self._rebuild_in_background,
+            args=(catalog,),
+            name=f"{self.label}-index-rebuild",
+            daemon=True,
+        ).start()
+
+    def _rebuild_in_background(self, catalog: Optional[NameCatalog]):
+        try:
+            self.rebuild(catalog)
+        except Exception as e:
+            ERROR_LOGGER.error(f"Rebuilding the {self.label} index failed: {e}")
+        finally:
+            self._rebuilding = False
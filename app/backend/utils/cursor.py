@@ -0,0 +1,66 @@
+"""
+Opaque, signed pagination cursors.
+
+A cursor is a compact JSON payload (keyset position plus the filters it was
+issued for), base64url-encoded and signed with HMAC-SHA256 using the app's
+secret key, so clients cannot forge positions or swap filters mid-stream.
+"""
+
+import base64
+import hashlib
+import hmac
+import json
+from typing import Any, Dict
+
+from auth.auth_utils import get_secret_key
+
+# Truncated HMAC length in bytes; plenty to prevent forgery of a page position
+SIGNATURE_BYTES = 16
+
+
+class InvalidCursor(ValueError):
+    """Raised when a cursor is malformed or its signature does not match."""
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def _b64decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+
+def _sign(payload: bytes) -> bytes:
+    key = get_secret_key()
+    if not key:
+        raise ValueError("Secret key not available for cursor signing")
+    return hmac.new(key.encode("utf-8"), payload, hashlib.sha256).digest()[
+        :SIGNATURE_BYTES
+    ]
+
+
+def encode_cursor(payload: Dict[str, Any]) -> str:
+    """Serialize and sign a cursor payload."""
+    data = json.dumps(payload, separators=(",", ":"), sort_keys=True).encode("utf-8")
+    return f"{_b64encode(data)}.{_b64encode(_sign(data))}"
+
+
+def decode_cursor(cursor: str) -> Dict[str, Any]:
+    """Verify and deserialize a cursor produced by encode_cursor."""
+    try:
+        encoded_payload, encoded_signature = cursor.split(".")
+        data = _b64decode(encoded_payload)
+        signature = _b64decode(encoded_signature)
+    except ValueError as e:
+        raise InvalidCursor("Malformed cursor") from e
+
+    if not hmac.compare_digest(signature, _sign(data)):
+        raise InvalidCursor("Cursor signature mismatch")
+
+    try:
+        payload = json.loads(data)
+    except ValueError as e:
+        raise InvalidCursor("Malformed cursor") from e
+    if not isinstance(payload, dict):
+        raise InvalidCursor("Malformed cursor")
+    return payload
@@ -5,6 +5,7 @@ import traceback
 
 from utils.logging_config import ERROR_LOGGER, log_exception
 from utils.telegram_notifier import telegram_notifier
+from utils.vote_queue import VOTE_QUEUE_RETRY_AFTER_SECONDS, VotesNotFlushed
 
 
 async def http_exception_handler(request: Request, exc: HTTPException) -> JSONResponse:
@@ -42,7 +43,23 @@ async def http_exception_handler(request: Request, exc: HTTPException) -> JSONRe
                 f"Failed to send Telegram notification: {telegram_error}"
             )
 
-    return JSONResponse(status_code=exc.status_code, content={"detail": exc.detail})
+    return JSONResponse(
+        status_code=exc.status_code,
+        content={"detail": exc.detail},
+        headers=getattr(exc, "headers", None),
+    )
+
+
+async def votes_not_flushed_handler(
+    request: Request, exc: VotesNotFlushed
+) -> JSONResponse:
+    """A read would miss the user's queued votes: ask the client to retry."""
+    ERROR_LOGGER.error(f"{exc} in {request.method} {request.url}")
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Your latest votes are still being saved, try again"},
+        headers={"Retry-After": str(VOTE_QUEUE_RETRY_AFTER_SECONDS)},
+    )
 
 
 async def general_exception_handler(request: Request, exc: Exception) -> JSONResponse:
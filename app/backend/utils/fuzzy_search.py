@@ -0,0 +1,275 @@
+"""
+Fuzzy name search for GET /api/names/fuzzy: names within edit distance k
+of a (possibly misspelled) query, e.g. Jaqueline -> Jacqueline, Jaquelin.
+
+The default "memory" engine keeps an inverted index from character bigrams
+to the distinct folded names containing them (see name_similarity.fold).
+By the q-gram lemma, one edit destroys at most two of a name's bigrams, so
+any name within distance k shares at least |bigrams(query)| - 2k of them.
+Counting shared bigrams for all names is one np.bincount over the query's
+posting lists. The candidates that pass that count and the length filter
+get their exact distance from Myers' bit-parallel algorithm (Hyyrö's
+edit distance variant), run for all of them at once: the query is a bit
+mask per letter, and each column of the candidates' letter matrix is a
+handful of numpy operations on uint64 arrays. Before that, a letter-count
+filter drops names that have too few letters in common with the query.
+
+The "trgm" engine asks Postgres instead: pg_trgm's `%` operator on the
+ix_names_name_trgm index (migration 0007, only created where pg_trgm is
+available) finds candidates, and the same distance check filters them.
+Its recall depends on NAME_FUZZY_TRGM_THRESHOLD.
+"""
+
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import func, text
+from sqlalchemy.orm import Session
+
+from config import get_required_env
+from models.database import Name
+from utils.catalog_index import CatalogIndex
+from utils.name_catalog import NameCatalog
+from utils.name_similarity import fold
+
+NAME_FUZZY_ENGINE = get_required_env("NAME_FUZZY_ENGINE", "memory").lower()
+if NAME_FUZZY_ENGINE not in ("memory", "trgm"):
+    raise RuntimeError(
+        f"Invalid NAME_FUZZY_ENGINE {NAME_FUZZY_ENGINE!r}, expected 'memory' or 'trgm'"
+    )
+NAME_FUZZY_MAX_DISTANCE = int(get_required_env("NAME_FUZZY_MAX_DISTANCE", "3"))
+NAME_FUZZY_TRGM_THRESHOLD = float(get_required_env("NAME_FUZZY_TRGM_THRESHOLD", "0.3"))
+NAME_FUZZY_REFRESH_SECONDS = int(get_required_env("NAME_FUZZY_REFRESH_SECONDS", "300"))
+
+NGRAM = 2
+# Longer queries fall back to bounded_levenshtein (Myers needs one uint64)
+MAX_PATTERN_LENGTH = 64
+
+
+def bigrams(folded: str) -> set:
+    padded = f"^{folded}$"
+    return {padded[i : i + NGRAM] for i in range(len(padded) - NGRAM + 1)}
+
+
+def bounded_levenshtein(a: str, b: str, k: int) -> Optional[int]:
+    """Edit distance between a and b, or None if it is larger than k."""
+    if abs(len(a) - len(b)) > k:
+        return None
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(
+                min(
+                    previous[j] + 1,
+                    current[j - 1] + 1,
+                    previous[j - 1] + (ca != cb),
+                )
+            )
+        if min(current) > k:
+            return None
+        previous = current
+    return previous[-1] if previous[-1] <= k else None
+
+
+def _edit_distances(query: str, codes: np.ndarray, lengths: np.ndarray) -> np.ndarray:
+    """
+    Edit distance from `query` (at most 64 letters) to each row of `codes`,
+    letter codes 1-26 padded with 0 beyond each row's length. Rows must be
+    sorted by length, so the rows still running at column j are a suffix.
+    """
+    m = len(query)
+    peq = np.zeros(27, dtype=np.uint64)
+    for i, c in enumerate(query):
+        peq[ord(c) - 96] |= np.uint64(1 << i)
+    mask = np.uint64((1 << m) - 1)
+    high = np.uint64(1 << (m - 1))
+    one = np.uint64(1)
+
+    pv = np.full(len(codes), mask, dtype=np.uint64)
+    mv = np.zeros(len(codes), dtype=np.uint64)
+    scores = np.full(len(codes), m, dtype=np.int64)
+    starts = np.searchsorted(lengths, np.arange(1, codes.shape[1] + 1))
+    for j, start in enumerate(starts):
+        eq = peq[codes[start:, j]]
+        pv_j, mv_j = pv[start:], mv[start:]
+        xv = eq | mv_j
+        xh = (((eq & pv_j) + pv_j) ^ pv_j) | eq
+        ph = mv_j | ~(xh | pv_j)
+        mh = pv_j & xh
+        scores[start:] += (ph & high) != 0
+        scores[start:] -= (mh & high) != 0
+        # Row 0 of the matrix grows by one per letter (global distance)
+        ph = (ph << one) | one
+        mh = mh << one
+        pv[start:] = (mh | ~(xv | ph)) & mask
+        mv[start:] = ph & xv & mask
+    return scores
+
+
+class NgramIndex:
+    """Bigram inverted index over distinct folded names."""
+
+    def __init__(self, names: List[Tuple[str, int]]):
+        """`names` are (name, name_id) pairs, most popular first."""
+        ids_by_key: Dict[str, List[int]] = {}
+        for name, name_id in names:
+            ids_by_key.setdefault(fold(name), []).append(name_id)
+        ids_by_key.pop("", None)
+
+        # Keys keep the popularity order of their most popular name
+        self.keys = list(ids_by_key)
+        self.name_ids = [ids_by_key[key] for key in self.keys]
+        self.lengths = np.array([len(key) for key in self.keys], dtype=np.int32)
+        self.id_counts = np.array([len(ids) for ids in self.name_ids], dtype=np.int64)
+
+        # Letters as codes 1-26, one row per key, padded with 0
+        self.codes = np.zeros((len(self.keys), max(self.lengths, default=0)), np.uint8)
+        for position, key in enumerate(self.keys):
+            self.codes[position, : len(key)] = (
+                np.frombuffer(key.encode(), np.uint8) - 96
+            )
+        # How often each letter occurs in each key, one row per letter
+        self.letter_counts = np.zeros((27, len(self.keys)), dtype=np.uint8)
+        rows = np.broadcast_to(np.arange(len(self.keys))[:, None], self.codes.shape)
+        np.add.at(self.letter_counts, (self.codes, rows), 1)
+
+        postings = defaultdict(list)
+        for position, key in enumerate(self.keys):
+            for gram in bigrams(key):
+                postings[gram].append(position)
+        self.postings = {
+            gram: np.array(positions, dtype=np.int32)
+            for gram, positions in postings.items()
+        }
+
+    def _distances(self, folded: str, positions: np.ndarray, k: int) -> np.ndarray:
+        """
+        Edit distances to the keys at `positions` (sorted by length), or
+        more than k where not computed.
+        """
+        if len(folded) <= MAX_PATTERN_LENGTH:
+            lengths = self.lengths[positions]
+            width = int(lengths.max(initial=0))
+            return _edit_distances(folded, self.codes[positions, :width], lengths)
+        distances = [
+            bounded_levenshtein(folded, self.keys[position], k)
+            for position in positions
+        ]
+        return np.array([k + 1 if d is None else d for d in distances], dtype=int)
+
+    def search(self, query: str, k: int, limit: int) -> List[Tuple[int, int]]:
+        """
+        Up to `limit` (name_id, distance) pairs within distance k of the
+        query, closest first, then most popular.
+        """
+        folded = fold(query)
+        if not folded:
+            return []
+
+        grams = bigrams(folded)
+        lists = [self.postings[g] for g in grams if g in self.postings]
+        if lists:
+            shared = np.bincount(np.concatenate(lists), minlength=len(self.keys))
+        else:
+            shared = np.zeros(len(self.keys), dtype=np.int64)
+        length_gaps = np.abs(self.lengths - len(folded))
+
+        # Check candidates for distance 0, 1, ... k in turn. After tier d
+        # every name within distance d has been seen, so short queries that
+        # already have `limit` close matches skip the wide tiers.
+        letters = Counter(ord(c) - 96 for c in folded)
+        checked = np.zeros(len(self.keys), dtype=bool)
+        found = np.empty(0, dtype=np.int64)
+        found_distances = np.empty(0, dtype=np.int64)
+        for d in range(k + 1):
+            tier = (length_gaps <= d) & (shared >= len(grams) - NGRAM * d)
+            positions = np.flatnonzero(tier & ~checked)
+
+            # A name within distance d has all but d letters in common with
+            # the query, counting repeats
+            common = np.zeros(len(positions), dtype=np.int32)
+            for letter, count in letters.items():
+                common += np.minimum(self.letter_counts[letter, positions], count)
+            lengths = np.maximum(self.lengths[positions], len(folded))
+            positions = positions[common >= lengths - d]
+            positions = positions[np.argsort(self.lengths[positions], kind="stable")]
+            checked[positions] = True
+            distances = self._distances(folded, positions, k)
+            close = distances <= k
+            found = np.concatenate([found, positions[close]])
+            found_distances = np.concatenate([found_distances, distances[close]])
+            if self.id_counts[found[found_distances <= d]].sum() >= limit:
+                break
+
+        order = np.lexsort((found, found_distances))
+        results = []
+        for position, distance in zip(found[order], found_distances[order]):
+            for name_id in self.name_ids[position]:
+                results.append((name_id, int(distance)))
+                if len(results) == limit:
+                    return results
+        return results
+
+
+def search_trgm(db: Session, query: str, k: int, limit: int) -> List[Tuple[int, int]]:
+    """Like NgramIndex.search, with pg_trgm providing the candidates."""
+    folded = fold(query)
+    if not folded:
+        return []
+
+    db.execute(
+        text("SELECT set_config('pg_trgm.similarity_threshold', :value, true)"),
+        {"value": str(NAME_FUZZY_TRGM_THRESHOLD)},
+    )
+    rows = (
+        db.query(Name.id, Name.name)
+        .filter(func.lower(Name.name).op("%")(query.lower()))
+        .order_by(Name.count.desc().nullslast(), Name.id)
+        .all()
+    )
+
+    matches = []
+    for rank, (name_id, name) in enumerate(rows):
+        distance = bounded_levenshtein(folded, fold(name), k)
+        if distance is not None:
+            matches.append((distance, rank, name_id))
+    matches.sort()
+    return [(name_id, distance) for distance, _, name_id in matches[:limit]]
+
+
+class FuzzySearch(CatalogIndex[NgramIndex]):
+    """Builds the bigram index and keeps it in step with the catalog."""
+
+    label = "fuzzy search"
+
+    def __init__(self):
+        super().__init__(NAME_FUZZY_REFRESH_SECONDS)
+
+    def build_from_catalog(self, catalog: NameCatalog) -> NgramIndex:
+        return NgramIndex(
+            [(catalog.name(row), catalog.ids[row]) for row in catalog.popular_order]
+        )
+
+    def build_from_db(self, db: Session) -> NgramIndex:
+        names = db.query(Name.name, Name.id).order_by(
+            Name.count.desc().nullslast(), Name.id
+        )
+        return NgramIndex([(name, name_id) for name, name_id in names])
+
+    def search(
+        self,
+        db: Session,
+        catalog: Optional[NameCatalog],
+        query: str,
+        k: int,
+        limit: int,
+    ) -> List[Tuple[int, int]]:
+        if NAME_FUZZY_ENGINE == "trgm":
+            return search_trgm(db, query, k, limit)
+        return self.index(db, catalog).search(query, k, limit)
+
+
+# Global instance
+fuzzy_search = FuzzySearch()
@@ -0,0 +1,203 @@
+"""
+Global leaderboard of the most-liked and most-disliked names.
+
+Each worker keeps, per metric and per (gender, source_id) partition, the
+top LEADERBOARD_CAPACITY names by score. A rebuild every
+LEADERBOARD_REBUILD_SECONDS loads them from name_vote_stats with one
+windowed query; in between, votes written by the worker update the
+partitions in place. Broader filters (all genders, several sources) merge
+the partitions they cover at request time.
+
+Names are ranked by (score, -name_id), so there are no ties. A partition
+also remembers its `floor`, the rank key of the best name outside it. A
+name that climbs above the floor joins; a member that drops to it leaves,
+and once a partition is full its lowest member is evicted and raises the
+floor. The top `limit` entries are therefore exact as long as a partition
+still holds at least `limit` members, which the extra capacity over
+LEADERBOARD_MAX_LIMIT keeps true between rebuilds in all but unusual
+cases; otherwise the request triggers an early rebuild.
+"""
+
+import asyncio
+import heapq
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import text
+
+from config import get_required_env
+from models.database import SessionLocal
+from utils.logging_config import ERROR_LOGGER
+from utils.name_catalog import GENDER_VALUES, name_catalog
+
+LEADERBOARD_MAX_LIMIT = int(get_required_env("LEADERBOARD_MAX_LIMIT", "100"))
+LEADERBOARD_CAPACITY = 2 * LEADERBOARD_MAX_LIMIT
+LEADERBOARD_REBUILD_SECONDS = int(
+    get_required_env("LEADERBOARD_REBUILD_SECONDS", "300")
+)
+
+METRICS = ("likes", "dislikes")
+
+# Top capacity + 1 names per partition and metric; the extra row is the floor
+REBUILD_SQL = text(
+    """
+    SELECT name_id, likes, dislikes, gender, source_id, like_rank, dislike_rank
+    FROM (
+        SELECT s.name_id, s.likes, s.dislikes, n.gender, n.source_id,
+               row_number() OVER (
+                   PARTITION BY n.gender, n.source_id
+                   ORDER BY s.likes DESC, s.name_id
+               ) AS like_rank,
+               row_number() OVER (
+                   PARTITION BY n.gender, n.source_id
+                   ORDER BY s.dislikes DESC, s.name_id
+               ) AS dislike_rank
+        FROM name_vote_stats s
+        JOIN names n ON n.id = s.name_id
+        WHERE s.likes > 0 OR s.dislikes > 0
+    ) AS ranked
+    WHERE like_rank <= :size OR dislike_rank <= :size
+    """
+)
+
+PartitionKey = Tuple[Optional[str], int]  # (gender, source_id)
+
+# Rank key below every name with a positive score
+NO_FLOOR = (0, 0)
+
+
+class _Partition:
+    """Top names of one partition for one metric, plus the floor score."""
+
+    __slots__ = ("scores", "floor")
+
+    def __init__(self):
+        self.scores: Dict[int, int] = {}
+        self.floor: Tuple[int, int] = NO_FLOOR
+
+    def update(self, name_id: int, score: int, capacity: int):
+        if (score, -name_id) <= self.floor:
+            self.scores.pop(name_id, None)
+            return
+        self.scores[name_id] = score
+        if len(self.scores) > capacity:
+            lowest = min(self.scores, key=lambda n: (self.scores[n], -n))
+            self.floor = max(self.floor, (self.scores.pop(lowest), -lowest))
+
+    def complete(self, limit: int) -> bool:
+        """Whether the top `limit` members are the partition's true top."""
+        return self.floor == NO_FLOOR or len(self.scores) >= limit
+
+
+class Leaderboard:
+    """Per-process top-K names by likes and by dislikes."""
+
+    def __init__(self, capacity: int = LEADERBOARD_CAPACITY):
+        self.capacity = capacity
+        self._partitions: Dict[Tuple[str, PartitionKey], _Partition] = {}
+        # Partition of names seen by the last rebuild, for vote updates
+        self._keys: Dict[int, PartitionKey] = {}
+        self._lock = threading.Lock()
+        self.rebuilt_at: Optional[float] = None
+
+    def rebuild(self):
+        """Reload every partition from name_vote_stats."""
+        db = SessionLocal()
+        try:
+            rows = db.execute(REBUILD_SQL, {"size": self.capacity + 1}).all()
+        finally:
+            db.close()
+
+        partitions: Dict[Tuple[str, PartitionKey], _Partition] = {}
+        keys: Dict[int, PartitionKey] = {}
+        for row in rows:
+            key = (row.gender, row.source_id)
+            keys[row.name_id] = key
+            for metric, rank in (
+                ("likes", row.like_rank),
+                ("dislikes", row.dislike_rank),
+            ):
+                score = getattr(row, metric)
+                partition = partitions.setdefault((metric, key), _Partition())
+                if rank == self.capacity + 1:
+                    partition.floor = max((score, -row.name_id), NO_FLOOR)
+                elif rank <= self.capacity and score > 0:
+                    partition.scores[row.name_id] = score
+
+        with self._lock:
+            self._partitions = partitions
+            self._keys = keys
+        self.rebuilt_at = time.time()
+
+    def _key_of(self, name_id: int) -> Optional[PartitionKey]:
+        key = self._keys.get(name_id)
+        if key is None:
+            catalog = name_catalog.get()
+            row = catalog.index_of(name_id) if catalog is not None else None
+            if row is None:
+                return None  # Picked up by the next rebuild
+            key = (GENDER_VALUES[catalog.genders[row]], catalog.source_ids[row])
+            self._keys[name_id] = key
+        return key
+
+    def update(self, stats: Iterable[Tuple[int, int, int]]):
+        """Apply new (name_id, likes, dislikes) totals after a vote write."""
+        with self._lock:
+            for name_id, likes, dislikes in stats:
+                key = self._key_of(name_id)
+                if key is None:
+                    continue
+                for metric, score in (("likes", likes), ("dislikes", dislikes)):
+                    partition = self._partitions.setdefault((metric, key), _Partition())
+                    partition.update(name_id, score, self.capacity)
+
+    def top(
+        self,
+        metric: str,
+        limit: int,
+        genders: Optional[List[str]] = None,
+        source_ids: Optional[Iterable[int]] = None,
+    ) -> List[Tuple[int, int]]:
+        """
+        The `limit` highest (name_id, score) pairs for a metric among names
+        of the given genders and sources (None means no filter), ordered by
+        score descending, then id.
+        """
+        source_ids = set(source_ids) if source_ids is not None else None
+        for attempt in range(2):
+            with self._lock:
+                selected = [
+                    partition
+                    for (partition_metric, (gender, source_id)), partition in (
+                        self._partitions.items()
+                    )
+                    if partition_metric == metric
+                    and (not genders or gender in genders)
+                    and (source_ids is None or source_id in source_ids)
+                ]
+                complete = all(partition.complete(limit) for partition in selected)
+                if complete or attempt:
+                    candidates = [
+                        (score, name_id)
+                        for partition in selected
+                        for name_id, score in partition.scores.items()
+                    ]
+                    break
+            self.rebuild()
+
+        best = heapq.nsmallest(limit, candidates, key=lambda c: (-c[0], c[1]))
+        return [(name_id, score) for score, name_id in best]
+
+    async def run_rebuild_loop(self, interval: int = LEADERBOARD_REBUILD_SECONDS):
+        """Periodically reload the leaderboard from the database."""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await asyncio.to_thread(self.rebuild)
+            except Exception as e:
+                ERROR_LOGGER.error(f"Leaderboard rebuild failed: {e}")
+
+
+# Global instance
+leaderboard = Leaderboard()
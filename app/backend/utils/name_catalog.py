@@ -0,0 +1,540 @@
+"""
+Shared, read-only name catalog.
+
+The catalog holds id/source_id/gender/rank/count (plus the display name
+and info JSON) for every row of the `names` table in compact typed columns.
+It is written once to a memory-mapped file (in /dev/shm by default) and
+every gunicorn worker maps the same file, so the page cache holds a single
+copy no matter how many workers are running.
+
+Rebuilds are written to a temporary file and swapped in with os.replace,
+so readers either see the old or the new catalog, never a partial one.
+"""
+
+import asyncio
+import fcntl
+import heapq
+import json
+import mmap
+import os
+import struct
+import tempfile
+import time
+from array import array
+from collections import Counter
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+from itertools import chain
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from sqlalchemy import Text, cast, text
+from sqlalchemy.orm import Session
+
+from config import get_required_env
+from models.database import Name, SessionLocal, Source
+from utils.logging_config import APP_LOGGER, ERROR_LOGGER
+
+
+def _default_catalog_path() -> str:
+    shm_dir = "/dev/shm"
+    base_dir = shm_dir if os.path.isdir(shm_dir) else tempfile.gettempdir()
+    return os.path.join(base_dir, "namo_name_catalog.bin")
+
+
+NAME_CATALOG_ENABLED = (
+    get_required_env("NAME_CATALOG_ENABLED", "true").lower() == "true"
+)
+NAME_CATALOG_PATH = get_required_env("NAME_CATALOG_PATH", _default_catalog_path())
+NAME_CATALOG_REFRESH_SECONDS = int(
+    get_required_env("NAME_CATALOG_REFRESH_SECONDS", "300")
+)
+# How often a worker stats the catalog file to pick up a rebuild
+NAME_CATALOG_RECHECK_SECONDS = float(
+    get_required_env("NAME_CATALOG_RECHECK_SECONDS", "2")
+)
+
+CATALOG_MAGIC = b"NAMOCAT\x01"
+CATALOG_FORMAT_VERSION = 4
+_HEADER = struct.Struct("<8sI")
+
+# Nullable integer columns are stored with this sentinel
+NULL_INT = -1
+
+GENDER_CODES = {None: 0, "m": 1, "f": 2}
+GENDER_VALUES = {code: gender for gender, code in GENDER_CODES.items()}
+
+# Kept current by triggers on names and sources (migration 0010)
+FINGERPRINT_SQL = text("SELECT changed_xid::text FROM name_catalog_version")
+
+
+def gender_codes(genders: Optional[List[str]]) -> Optional[set]:
+    """Catalog gender codes for db genders, None meaning no filter."""
+    if not genders:
+        return None
+    return {GENDER_CODES[g] for g in genders if g in GENDER_CODES}
+
+
+def _popularity_key(count: int, name_id: int, most_popular: bool):
+    if count == NULL_INT:
+        return (True, 0, name_id)
+    return (False, -count if most_popular else count, name_id)
+
+
+def compute_fingerprint(db: Session) -> str:
+    """
+    Marker of the last change to names or sources: one row read instead of
+    a scan. Read it before the rows so a change in between rebuilds again.
+    """
+    return f"xid:{db.execute(FINGERPRINT_SQL).scalar_one()}"
+
+
+def _align(offset: int, alignment: int = 8) -> int:
+    return (offset + alignment - 1) // alignment * alignment
+
+
+class NameCatalog:
+    """Read-only view over a mapped catalog file."""
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            stat = os.fstat(f.fileno())
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        self.path = path
+        self.file_id = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+        magic, meta_length = _HEADER.unpack_from(self._mmap, 0)
+        if magic != CATALOG_MAGIC:
+            raise ValueError(f"Not a name catalog file: {path}")
+
+        meta_start = _HEADER.size
+        self.meta = json.loads(self._mmap[meta_start : meta_start + meta_length])
+        if self.meta.get("version") != CATALOG_FORMAT_VERSION:
+            raise ValueError(
+                f"Unsupported catalog version {self.meta.get('version')} in {path}"
+            )
+
+        self.fingerprint: str = self.meta["fingerprint"]
+        self.size: int = self.meta["row_count"]
+        self.sources: Dict[int, str] = dict(self.meta["sources"])
+
+        view = memoryview(self._mmap)
+        columns = {}
+        for column, (offset, typecode, length) in self.meta["columns"].items():
+            itemsize = array(typecode).itemsize
+            columns[column] = view[offset : offset + length * itemsize].cast(typecode)
+
+        self.ids = columns["ids"]
+        self.counts = columns["counts"]
+        self.ranks = columns["ranks"]
+        self.genders = columns["genders"]
+        self.source_ids = columns["source_ids"]
+        self._name_offsets = columns["name_offsets"]
+        self._names = columns["names"]
+        self._info_offsets = columns["info_offsets"]
+        self._info = columns["info"]
+        # Row permutations sorted by popularity, the catalog's "indexes"
+        self.popular_order = columns["popular_order"]
+        self.unpopular_order = columns["unpopular_order"]
+        # The same orders grouped by source: each source's rows are one
+        # contiguous slice, so a source filter never scans other sources
+        self.popular_order_by_source = columns["popular_order_by_source"]
+        self.unpopular_order_by_source = columns["unpopular_order_by_source"]
+        self.source_rows: Dict[int, Tuple[int, int]] = {
+            source_id: (start, end)
+            for source_id, start, end in self.meta["source_rows"]
+        }
+
+    def index_of(self, name_id: int) -> Optional[int]:
+        """Return the row index for a name id (rows are sorted by id)."""
+        row = bisect_left(self.ids, name_id)
+        if row < self.size and self.ids[row] == name_id:
+            return row
+        return None
+
+    def name(self, row: int) -> str:
+        start, end = self._name_offsets[row], self._name_offsets[row + 1]
+        return bytes(self._names[start:end]).decode("utf-8")
+
+    def info(self, row: int) -> Optional[Dict]:
+        start, end = self._info_offsets[row], self._info_offsets[row + 1]
+        if start == end:
+            return None
+        return json.loads(bytes(self._info[start:end]))
+
+    def count(self, row: int) -> Optional[int]:
+        value = self.counts[row]
+        return None if value == NULL_INT else value
+
+    def record(self, row: int) -> Dict:
+        """Materialize a row in the shape of NameResponse."""
+        rank = self.ranks[row]
+        return {
+            "id": self.ids[row],
+            "source": self.sources[self.source_ids[row]],
+            "name": self.name(row),
+            "gender": GENDER_VALUES[self.genders[row]],
+            "rank": None if rank == NULL_INT else rank,
+            "count": self.count(row),
+            "info": self.info(row),
+        }
+
+    def records(self, rows: List[int]) -> List[Dict]:
+        return [self.record(row) for row in rows]
+
+    def popularity_key(self, row: int, most_popular: bool) -> Tuple[bool, int, int]:
+        """
+        Sort key matching ORDER BY count DESC|ASC NULLS LAST, id ASC.
+        """
+        return _popularity_key(self.counts[row], self.ids[row], most_popular)
+
+    def _source_slices(self, order_by_source, source_ids: set) -> list:
+        """The slices of a by-source order that hold the given sources."""
+        return [
+            order_by_source[start:end]
+            for source_id, (start, end) in self.source_rows.items()
+            if source_id in source_ids
+        ]
+
+    def rows_by_popularity(
+        self,
+        most_popular: bool,
+        genders: Optional[List[str]] = None,
+        source_ids: Optional[set] = None,
+    ) -> Iterator[int]:
+        """Yield rows in popularity order, optionally filtered."""
+        if source_ids is None:
+            order = self.popular_order if most_popular else self.unpopular_order
+            return self._filter(iter(order), genders)
+
+        order_by_source = (
+            self.popular_order_by_source
+            if most_popular
+            else self.unpopular_order_by_source
+        )
+        rows = heapq.merge(
+            *self._source_slices(order_by_source, source_ids),
+            key=lambda row: self.popularity_key(row, most_popular),
+        )
+        return self._filter(rows, genders)
+
+    def rows_by_count(
+        self,
+        descending: bool,
+        genders: Optional[List[str]] = None,
+        after: Optional[Tuple[int, int]] = None,
+        source_ids: Optional[set] = None,
+    ) -> Iterator[int]:
+        """
+        Yield rows that have a count in (count, id) order, ascending or fully
+        descending, strictly after the keyset `after` if given. Seeking is a
+        binary search over the ascending order, so a page costs O(page).
+        """
+        key = lambda row: self.popularity_key(row, False)
+        if source_ids is None:
+            rows = self._seek(self.unpopular_order, descending, after, key)
+        else:
+            # Seek within each source's slice, then merge the slices
+            rows = heapq.merge(
+                *(
+                    self._seek(order, descending, after, key)
+                    for order in self._source_slices(
+                        self.unpopular_order_by_source, source_ids
+                    )
+                ),
+                key=key,
+                reverse=descending,
+            )
+        return self._filter(rows, genders)
+
+    @staticmethod
+    def _seek(order, descending: bool, after, key) -> Iterator[int]:
+        """Rows of an ascending (count, id) order past `after`, either way."""
+        # Rows without a count sort last and are left out
+        end = bisect_left(order, (True,), key=key)
+
+        if descending:
+            start = (
+                end if after is None else bisect_left(order, (False, *after), key=key)
+            )
+            positions = range(start - 1, -1, -1)
+        else:
+            start = (
+                0 if after is None else bisect_right(order, (False, *after), key=key)
+            )
+            positions = range(start, end)
+
+        return (order[p] for p in positions)
+
+    def _filter(
+        self,
+        rows: Iterator[int],
+        genders: Optional[List[str]],
+        source_ids: Optional[set] = None,
+    ) -> Iterator[int]:
+        codes = gender_codes(genders)
+        if codes is not None:
+            gender_of = self.genders
+            rows = (row for row in rows if gender_of[row] in codes)
+        if source_ids is not None:
+            source_of = self.source_ids
+            rows = (row for row in rows if source_of[row] in source_ids)
+        return rows
+
+    def rows_for_ids(
+        self,
+        name_ids: Iterable[int],
+        genders: Optional[List[str]] = None,
+        source_ids: Optional[set] = None,
+    ) -> Iterator[int]:
+        """Yield the rows of the given name ids in order, optionally filtered."""
+        rows = (self.index_of(int(name_id)) for name_id in name_ids)
+        return self._filter(
+            (row for row in rows if row is not None), genders, source_ids
+        )
+
+    def rows_matching(
+        self, genders: Optional[List[str]], source_ids: Optional[set] = None
+    ) -> List[int]:
+        """Row indices matching the given db genders and source ids."""
+        if source_ids is None:
+            rows = iter(range(self.size))
+        else:
+            rows = chain.from_iterable(
+                self._source_slices(self.unpopular_order_by_source, source_ids)
+            )
+        return list(self._filter(rows, genders))
+
+    def source_ids_for(self, sources: Iterable[str]) -> set:
+        """Ids of the named sources (exact, case-insensitive)."""
+        wanted = {source.lower() for source in sources}
+        return {
+            source_id
+            for source_id, name in self.sources.items()
+            if name.lower() in wanted
+        }
+
+
+def write_catalog_file(db: Session, path: str, fingerprint: str) -> int:
+    """Build the catalog from the names table and atomically publish it."""
+    ids = array("i")
+    counts = array("i")
+    ranks = array("i")
+    genders = array("B")
+    source_ids = array("H")
+    name_offsets = array("I", [0])
+    info_offsets = array("I", [0])
+    names = bytearray()
+    info = bytearray()
+
+    rows = (
+        db.query(
+            Name.id,
+            Name.source_id,
+            Name.name,
+            Name.gender,
+            Name.rank,
+            Name.count,
+            cast(Name.info, Text),
+        )
+        .order_by(Name.id)
+        .yield_per(5000)
+    )
+
+    for name_id, source_id, name, gender, rank, count, info_json in rows:
+        ids.append(name_id)
+        counts.append(NULL_INT if count is None else count)
+        ranks.append(NULL_INT if rank is None else rank)
+        genders.append(GENDER_CODES.get(gender, 0))
+        source_ids.append(source_id)
+
+        names += name.encode("utf-8")
+        name_offsets.append(len(names))
+        if info_json is not None:
+            info += info_json.encode("utf-8")
+        info_offsets.append(len(info))
+
+    popular_order = array(
+        "i",
+        sorted(range(len(ids)), key=lambda i: _popularity_key(counts[i], ids[i], True)),
+    )
+    unpopular_order = array(
+        "i",
+        sorted(
+            range(len(ids)), key=lambda i: _popularity_key(counts[i], ids[i], False)
+        ),
+    )
+    # Stable sorts: within a source the rows keep their popularity order
+    popular_order_by_source = array(
+        "i", sorted(popular_order, key=source_ids.__getitem__)
+    )
+    unpopular_order_by_source = array(
+        "i", sorted(unpopular_order, key=source_ids.__getitem__)
+    )
+    source_rows = []
+    start = 0
+    for source_id, size in sorted(Counter(source_ids).items()):
+        source_rows.append([source_id, start, start + size])
+        start += size
+
+    column_data: List[Tuple[str, str, bytes, int]] = [
+        ("ids", "i", ids.tobytes(), len(ids)),
+        ("counts", "i", counts.tobytes(), len(counts)),
+        ("ranks", "i", ranks.tobytes(), len(ranks)),
+        ("name_offsets", "I", name_offsets.tobytes(), len(name_offsets)),
+        ("info_offsets", "I", info_offsets.tobytes(), len(info_offsets)),
+        ("popular_order", "i", popular_order.tobytes(), len(popular_order)),
+        ("unpopular_order", "i", unpopular_order.tobytes(), len(unpopular_order)),
+        (
+            "popular_order_by_source",
+            "i",
+            popular_order_by_source.tobytes(),
+            len(popular_order_by_source),
+        ),
+        (
+            "unpopular_order_by_source",
+            "i",
+            unpopular_order_by_source.tobytes(),
+            len(unpopular_order_by_source),
+        ),
+        ("source_ids", "H", source_ids.tobytes(), len(source_ids)),
+        ("genders", "B", genders.tobytes(), len(genders)),
+        ("names", "B", bytes(names), len(names)),
+        ("info", "B", bytes(info), len(info)),
+    ]
+
+    meta = {
+        "version": CATALOG_FORMAT_VERSION,
+        "fingerprint": fingerprint,
+        "row_count": len(ids),
+        "sources": [list(source) for source in db.query(Source.id, Source.name)],
+        "source_rows": source_rows,
+        "built_at": datetime.now().isoformat(),
+        "columns": {},
+    }
+
+    # The column offsets depend on the header size, which depends on the
+    # offsets, so reserve generous room for the digits and pad the header.
+    meta_reserved = len(json.dumps(meta)) + 64 * len(column_data) + 256
+    offset = _align(_HEADER.size + meta_reserved)
+    for column, typecode, data, length in column_data:
+        meta["columns"][column] = [offset, typecode, length]
+        offset = _align(offset + len(data))
+
+    meta_bytes = json.dumps(meta).encode("utf-8").ljust(meta_reserved)
+
+    directory = os.path.dirname(path) or "."
+    fd, tmp_path = tempfile.mkstemp(prefix=".namo_catalog_", dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(_HEADER.pack(CATALOG_MAGIC, len(meta_bytes)))
+            f.write(meta_bytes)
+            for column, _typecode, data, _length in column_data:
+                f.seek(meta["columns"][column][0])
+                f.write(data)
+            f.truncate(offset)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+    return len(ids)
+
+
+class NameCatalogStore:
+    """Per-process handle on the shared catalog file."""
+
+    def __init__(
+        self,
+        path: str = NAME_CATALOG_PATH,
+        enabled: bool = NAME_CATALOG_ENABLED,
+        recheck_seconds: float = NAME_CATALOG_RECHECK_SECONDS,
+    ):
+        self.path = path
+        self.enabled = enabled
+        self.recheck_seconds = recheck_seconds
+        self._catalog: Optional[NameCatalog] = None
+        self._next_check = 0.0
+
+    def get(self) -> Optional[NameCatalog]:
+        """Return the current catalog, remapping if the file was replaced."""
+        if not self.enabled:
+            return None
+
+        now = time.monotonic()
+        if now >= self._next_check:
+            self._next_check = now + self.recheck_seconds
+            try:
+                self._remap_if_changed()
+            except FileNotFoundError:
+                # Not built yet; callers fall back to the database
+                pass
+            except (OSError, ValueError) as e:
+                ERROR_LOGGER.error(f"Failed to map name catalog {self.path}: {e}")
+
+        return self._catalog
+
+    def _remap_if_changed(self):
+        stat = os.stat(self.path)
+        file_id = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        if self._catalog is None or self._catalog.file_id != file_id:
+            self._catalog = NameCatalog(self.path)
+            APP_LOGGER.info(
+                f"Mapped name catalog with {self._catalog.size} names "
+                f"({self._catalog.fingerprint})"
+            )
+
+    def refresh(self, force: bool = False) -> Optional[NameCatalog]:
+        """
+        Rebuild the catalog file if the names table changed, then map it.
+        Only one process rebuilds at a time; the others wait on the lock and
+        map the file the winner published.
+        """
+        if not self.enabled:
+            return None
+
+        db = SessionLocal()
+        try:
+            with open(f"{self.path}.lock", "w") as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    fingerprint = compute_fingerprint(db)
+                    current = self._read_fingerprint()
+                    if force or current != fingerprint:
+                        started = time.perf_counter()
+                        row_count = write_catalog_file(db, self.path, fingerprint)
+                        APP_LOGGER.info(
+                            f"Built name catalog with {row_count} names in "
+                            f"{time.perf_counter() - started:.3f}s"
+                        )
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+        finally:
+            db.close()
+
+        self._next_check = time.monotonic() + self.recheck_seconds
+        self._remap_if_changed()
+        return self._catalog
+
+    def _read_fingerprint(self) -> Optional[str]:
+        try:
+            return NameCatalog(self.path).fingerprint
+        except (OSError, ValueError):
+            return None
+
+    async def run_refresh_loop(self, interval: int = NAME_CATALOG_REFRESH_SECONDS):
+        """Periodically rebuild the catalog when the names table changes."""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await asyncio.to_thread(self.refresh)
+            except Exception as e:
+                ERROR_LOGGER.error(f"Name catalog refresh failed: {e}")
+
+
+# Global instance
+name_catalog = NameCatalogStore()
@@ -0,0 +1,106 @@
+"""
+In-memory prefix autocomplete for GET /api/names/search.
+
+Names are folded (lowercase ASCII letters, diacritics and punctuation
+dropped: 'Zoë-Marie' -> 'zoemarie') and kept in one sorted array, so the
+names starting with a prefix are a contiguous slice found with two binary
+searches. The slice is ranked by popularity; for prefixes of up to
+PRECOMPUTED_PREFIX_LENGTH letters, whose slices are long, the top names
+are precomputed when the index is built.
+
+The index is built from the shared name catalog and rebuilt in the
+background when the catalog changes. Without a catalog it is built from the
+names table and rebuilt every NAME_SEARCH_REFRESH_SECONDS (see
+utils.catalog_index).
+"""
+
+import heapq
+from bisect import bisect_left
+from typing import Dict, List, Tuple
+
+from sqlalchemy.orm import Session
+
+from config import get_required_env
+from models.database import Name
+from utils.catalog_index import CatalogIndex
+from utils.name_catalog import NameCatalog
+from utils.name_similarity import fold
+
+NAME_SEARCH_MAX_LIMIT = int(get_required_env("NAME_SEARCH_MAX_LIMIT", "50"))
+NAME_SEARCH_REFRESH_SECONDS = int(
+    get_required_env("NAME_SEARCH_REFRESH_SECONDS", "300")
+)
+
+PRECOMPUTED_PREFIX_LENGTH = 3
+
+# Sorts after every folded letter, so prefix + END bounds the prefix's slice
+END = "\x7f"
+
+
+class PrefixIndex:
+    """Folded names in sorted order with their popularity rank."""
+
+    def __init__(self, names: List[Tuple[str, int]]):
+        """`names` are (name, name_id) pairs, most popular first."""
+        entries = sorted(
+            (fold(name), rank, name_id) for rank, (name, name_id) in enumerate(names)
+        )
+        self.keys = [key for key, _, _ in entries]
+        self.ranks = [rank for _, rank, _ in entries]
+        self.name_ids = [name_id for _, _, name_id in entries]
+
+        self._top: Dict[str, List[int]] = {}
+        prefixes = {
+            key[:length]
+            for key in self.keys
+            for length in range(1, PRECOMPUTED_PREFIX_LENGTH + 1)
+        }
+        for prefix in prefixes:
+            self._top[prefix] = self._rank(prefix, NAME_SEARCH_MAX_LIMIT)
+
+    def _rank(self, prefix: str, limit: int) -> List[int]:
+        start = bisect_left(self.keys, prefix)
+        end = bisect_left(self.keys, prefix + END, start)
+        if end - start <= limit:
+            positions = sorted(range(start, end), key=self.ranks.__getitem__)
+        else:
+            positions = heapq.nsmallest(
+                limit, range(start, end), key=self.ranks.__getitem__
+            )
+        return [self.name_ids[position] for position in positions]
+
+    def complete(self, prefix: str, limit: int) -> List[int]:
+        """Ids of the `limit` most popular names starting with `prefix`."""
+        folded = fold(prefix)
+        if not folded:
+            return []
+        top = self._top.get(folded)
+        if top is not None:
+            return top[:limit]
+        if len(folded) <= PRECOMPUTED_PREFIX_LENGTH:
+            return []  # No name starts with it
+        return self._rank(folded, limit)
+
+
+class NameSearch(CatalogIndex[PrefixIndex]):
+    """Builds the prefix index and keeps it in step with the catalog."""
+
+    label = "name search"
+
+    def __init__(self):
+        super().__init__(NAME_SEARCH_REFRESH_SECONDS)
+
+    def build_from_catalog(self, catalog: NameCatalog) -> PrefixIndex:
+        return PrefixIndex(
+            [(catalog.name(row), catalog.ids[row]) for row in catalog.popular_order]
+        )
+
+    def build_from_db(self, db: Session) -> PrefixIndex:
+        names = db.query(Name.name, Name.id).order_by(
+            Name.count.desc().nullslast(), Name.id
+        )
+        return PrefixIndex([(name, name_id) for name, name_id in names])
+
+
+# Global instance
+name_search = NameSearch()
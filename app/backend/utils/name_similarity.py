@@ -0,0 +1,254 @@
+"""
+Content-based similarity between names for GET /api/names/{id}/similar.
+
+Every name becomes a sparse feature vector made of weighted blocks:
+
+- character 2- and 3-grams of the folded name (with ^/$ word boundaries),
+- its last one, two and three letters,
+- its syllable shape (consonant/vowel pattern, e.g. "CVCV") and
+  number of vowel groups,
+- its length,
+- origin tags found in `info["Herkunft"]` (hebräisch, lateinisch, ...).
+
+Text features are hashed into a fixed number of columns per block (crc32,
+so every worker builds the same matrix). Each block is L2-normalized and
+scaled by its weight, and whole rows are normalized, so the cosine
+similarity of two names is a dot product. A query is one sparse
+matrix-vector product over all names plus np.argpartition. The same name
+from another source or with another gender scores about 1.0, so rows with
+the query's folded name are left out and every folded name is listed once,
+with its best-scoring row. Results are cached per name until the index is
+rebuilt.
+
+The index is built from the shared name catalog and rebuilt in the
+background when the catalog changes. Without a catalog it is built from the
+names table and rebuilt every SIMILAR_NAMES_REFRESH_SECONDS (see
+utils.catalog_index).
+"""
+
+import re
+import threading
+import unicodedata
+import zlib
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from scipy import sparse
+from sqlalchemy.orm import Session
+
+from config import get_required_env
+from models.database import Name
+from utils.catalog_index import CatalogIndex
+from utils.name_catalog import NameCatalog
+
+SIMILAR_NAMES_MAX_LIMIT = int(get_required_env("SIMILAR_NAMES_MAX_LIMIT", "50"))
+SIMILAR_NAMES_CACHE_SIZE = int(get_required_env("SIMILAR_NAMES_CACHE_SIZE", "10000"))
+SIMILAR_NAMES_REFRESH_SECONDS = int(
+    get_required_env("SIMILAR_NAMES_REFRESH_SECONDS", "300")
+)
+
+# Block name -> (hashed columns, weight)
+FEATURE_BLOCKS: Dict[str, Tuple[int, float]] = {
+    "ngrams": (1024, 1.0),
+    "endings": (256, 0.8),
+    "shape": (128, 0.4),
+    "length": (16, 0.3),
+    "origin": (64, 0.6),
+}
+
+ORIGINS = (
+    "althochdeutsch",
+    "altnordisch",
+    "altenglisch",
+    "aramäisch",
+    "arabisch",
+    "englisch",
+    "französisch",
+    "friesisch",
+    "germanisch",
+    "griechisch",
+    "hebräisch",
+    "irisch",
+    "italienisch",
+    "keltisch",
+    "lateinisch",
+    "nordisch",
+    "persisch",
+    "russisch",
+    "sanskrit",
+    "schottisch",
+    "slawisch",
+    "spanisch",
+    "türkisch",
+    "ungarisch",
+    "walisisch",
+)
+
+VOWELS = set("aeiouy")
+VOWEL_GROUPS = re.compile(r"[aeiouy]+")
+REPEATS = re.compile(r"(.)\1+")
+
+
+def fold(name: str) -> str:
+    """Lowercase ASCII letters only: 'Zoë-Sophie' -> 'zoesophie'."""
+    name = name.lower().replace("ß", "ss")
+    name = unicodedata.normalize("NFKD", name)
+    return "".join(c for c in name if "a" <= c <= "z")
+
+
+def _origins(info: Optional[dict]) -> List[str]:
+    herkunft = (info or {}).get("Herkunft")
+    if not isinstance(herkunft, str):
+        return []
+    text = herkunft.lower()
+    return [origin for origin in ORIGINS if origin in text]
+
+
+def name_features(name: str, info: Optional[dict]) -> Dict[str, List[str]]:
+    """Raw (unhashed) features of one name, per block."""
+    folded = fold(name)
+    padded = f"^{folded}$"
+    shape = REPEATS.sub(r"\1", "".join("V" if c in VOWELS else "C" for c in folded))
+    return {
+        "ngrams": [
+            padded[i : i + n] for n in (2, 3) for i in range(len(padded) - n + 1)
+        ],
+        "endings": [f"{n}:{folded[-n:]}" for n in (1, 2, 3) if len(folded) >= n],
+        "shape": [
+            f"shape:{shape}",
+            f"syllables:{len(VOWEL_GROUPS.findall(folded))}",
+        ],
+        "length": [f"length:{min(len(folded), 15)}"],
+        "origin": _origins(info),
+    }
+
+
+def _hashed_row(features: Dict[str, List[str]]) -> Tuple[np.ndarray, np.ndarray]:
+    """Column indices and values of one name's normalized feature vector."""
+    columns, values = [], []
+    offset = 0
+    for block, (width, weight) in FEATURE_BLOCKS.items():
+        counts: Dict[int, float] = {}
+        for feature in features[block]:
+            column = offset + zlib.crc32(feature.encode()) % width
+            counts[column] = counts.get(column, 0.0) + 1.0
+        if counts:
+            norm = np.sqrt(sum(v * v for v in counts.values()))
+            columns.extend(counts)
+            values.extend(weight * v / norm for v in counts.values())
+        offset += width
+
+    values = np.asarray(values, dtype=np.float32)
+    total = np.linalg.norm(values)
+    return np.asarray(columns, dtype=np.int32), values / total if total else values
+
+
+class SimilarityIndex:
+    """Feature matrix over a fixed list of names."""
+
+    def __init__(
+        self, name_ids: List[int], names: List[str], infos: List[Optional[dict]]
+    ):
+        self.name_ids = np.asarray(name_ids, dtype=np.int64)
+        # Rows with the same folded name share a key
+        _, self.keys = np.unique([fold(name) for name in names], return_inverse=True)
+        indptr, indices, data = [0], [], []
+        for name, info in zip(names, infos):
+            columns, values = _hashed_row(name_features(name, info))
+            indices.append(columns)
+            data.append(values)
+            indptr.append(indptr[-1] + len(columns))
+
+        width = sum(width for width, _ in FEATURE_BLOCKS.values())
+        self.matrix = sparse.csr_matrix(
+            (
+                np.concatenate(data) if data else np.empty(0, np.float32),
+                np.concatenate(indices) if indices else np.empty(0, np.int32),
+                np.asarray(indptr, dtype=np.int64),
+            ),
+            shape=(len(name_ids), width),
+        )
+        self._cache: "OrderedDict[int, List[Tuple[int, float]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def similar(self, name_id: int, limit: int) -> Optional[List[Tuple[int, float]]]:
+        """
+        Up to `limit` (name_id, similarity) pairs, most similar first, or
+        None if the name is not in the index.
+        """
+        with self._lock:
+            cached = self._cache.get(name_id)
+            if cached is not None:
+                self._cache.move_to_end(name_id)
+        if cached is None:
+            cached = self._search(name_id, SIMILAR_NAMES_MAX_LIMIT)
+            if cached is None:
+                return None
+            with self._lock:
+                self._cache[name_id] = cached
+                if len(self._cache) > SIMILAR_NAMES_CACHE_SIZE:
+                    self._cache.popitem(last=False)
+        return cached[:limit]
+
+    def _search(self, name_id: int, limit: int) -> Optional[List[Tuple[int, float]]]:
+        row = int(np.searchsorted(self.name_ids, name_id))
+        if row >= len(self.name_ids) or self.name_ids[row] != name_id:
+            return None
+
+        scores = self.matrix @ self.matrix[row].toarray().ravel()
+        # Not the name itself, under any source or gender
+        scores[self.keys == self.keys[row]] = -1.0
+
+        # Widen the candidates until they hold `limit` distinct names
+        candidates = min(2 * limit, len(scores))
+        while True:
+            if candidates <= 0:
+                return []
+            top = np.argpartition(-scores, candidates - 1)[:candidates]
+            # Include ties with the weakest candidate, so ties go by id
+            floor = scores[top].min()
+            top = np.flatnonzero(scores >= floor)
+            # Best first; ties by id so results are stable
+            top = top[np.lexsort((self.name_ids[top], -scores[top]))]
+            top = top[scores[top] > 0]
+            _, first = np.unique(self.keys[top], return_index=True)
+            # With floor <= 0 every positive score is already in `top`
+            if len(first) >= limit or floor <= 0 or candidates == len(scores):
+                break
+            candidates = min(2 * candidates, len(scores))
+
+        return [
+            (int(self.name_ids[i]), round(float(scores[i]), 4))
+            for i in top[np.sort(first)][:limit]
+        ]
+
+
+class NameSimilarity(CatalogIndex[SimilarityIndex]):
+    """Builds the similarity index and keeps it in step with the catalog."""
+
+    label = "similar names"
+
+    def __init__(self):
+        super().__init__(SIMILAR_NAMES_REFRESH_SECONDS)
+
+    def build_from_catalog(self, catalog: NameCatalog) -> SimilarityIndex:
+        # Catalog rows are sorted by id
+        rows = range(catalog.size)
+        return SimilarityIndex(
+            list(catalog.ids),
+            [catalog.name(row) for row in rows],
+            [catalog.info(row) for row in rows],
+        )
+
+    def build_from_db(self, db: Session) -> SimilarityIndex:
+        names = db.query(Name.id, Name.name, Name.info).order_by(Name.id).all()
+        return SimilarityIndex(
+            [name.id for name in names],
+            [name.name for name in names],
+            [name.info for name in names],
+        )
+
+
+# Global instance
+name_similarity = NameSimilarity()
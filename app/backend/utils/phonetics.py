@@ -0,0 +1,89 @@
+"""
+Phonetic keys for sound-alike name lookup (GET /api/names/sounds-like).
+
+Every name gets a Kölner Phonetik code ("k:<digits>"), which suits German
+spelling (Sophie/Sofie -> 83, Maik/Meik -> 64). Names from English-language
+sources (PHONETIC_ENGLISH_SOURCES) additionally get their Double Metaphone
+codes ("m:<code>"). Keys are stored in the GIN-indexed names.phonetic_keys
+array, so a lookup is one `phonetic_keys && ARRAY[...]` index scan.
+"""
+
+from typing import List, Optional
+
+from metaphone import doublemetaphone
+
+from config import get_required_env
+
+PHONETIC_ENGLISH_SOURCES = {
+    source.strip().lower()
+    for source in get_required_env(
+        "PHONETIC_ENGLISH_SOURCES",
+        "USA,United States,UK,United Kingdom,England,Ireland,Scotland,Wales,"
+        "Australia,Canada,New Zealand",
+    ).split(",")
+    if source.strip()
+}
+
+_VOWELS = set("AEIJOUYÄÖÜ")
+_CODES = {
+    **{c: "1" for c in "B"},
+    **{c: "3" for c in "FVW"},
+    **{c: "4" for c in "GKQ"},
+    "L": "5",
+    **{c: "6" for c in "MN"},
+    "R": "7",
+    **{c: "8" for c in "SZß"},
+}
+
+
+def cologne_phonetic(name: str) -> str:
+    """Kölner Phonetik code of a name, e.g. 'Müller-Lüdenscheidt' -> '65752682'."""
+    letters = [c for c in name.upper() if c.isalpha()]
+    digits = []
+    for i, c in enumerate(letters):
+        prev = letters[i - 1] if i else ""
+        nxt = letters[i + 1] if i + 1 < len(letters) else ""
+        if c in _VOWELS:
+            code = "0"
+        elif c == "H":
+            code = ""
+        elif c == "P":
+            code = "3" if nxt == "H" else "1"
+        elif c in "DT":
+            code = "8" if nxt in ("C", "S", "Z", "ß") else "2"
+        elif c == "C":
+            if i == 0:
+                code = "4" if nxt and nxt in "AHKLOQRUX" else "8"
+            elif prev in ("S", "Z", "ß"):
+                code = "8"
+            else:
+                code = "4" if nxt and nxt in "AHKOQUX" else "8"
+        elif c == "X":
+            code = "8" if prev in ("C", "K", "Q") else "48"
+        else:
+            code = _CODES.get(c, "")
+        digits.append(code)
+
+    # Collapse repeated codes (across ignored letters), then drop vowel
+    # codes except at the start
+    collapsed = []
+    for code in "".join(digits):
+        if not collapsed or collapsed[-1] != code:
+            collapsed.append(code)
+    return "".join(code for i, code in enumerate(collapsed) if code != "0" or i == 0)
+
+
+def phonetic_keys(name: str, source: Optional[str] = None) -> List[str]:
+    """
+    Keys stored for a name from `source`; with no source (a search term)
+    all kinds of keys are returned.
+    """
+    keys = []
+    cologne = cologne_phonetic(name)
+    if cologne:
+        keys.append(f"k:{cologne}")
+    if source is None or source.lower() in PHONETIC_ENGLISH_SOURCES:
+        keys.extend(
+            f"m:{code}" for code in dict.fromkeys(doublemetaphone(name)) if code
+        )
+    return keys
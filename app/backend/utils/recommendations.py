@@ -0,0 +1,224 @@
+"""
+Item-item collaborative filtering for sort_order=recommended.
+
+An offline job (build_recommendations.py) reads every vote into a sparse
+users x names matrix R, with +1 for a like and -1 for a dislike, and
+computes the shrunk cosine similarity of each pair of names,
+
+    sim(i, j) = R_i . R_j / (|R_i| |R_j| + RECOMMENDATION_SHRINK),
+
+in blocks of rows with SciPy sparse products, so only one block of the
+names x names matrix is ever dense. Each name keeps its top
+RECOMMENDATION_NEIGHBOURS positive neighbours, stored in CSR form in an
+.npz file that workers load at startup and reload when it changes.
+
+A user's score for a name is the sum of sim(voted, name) * rating over
+the names they voted on: a gather over the neighbour lists and one
+np.bincount, i.e. milliseconds.
+"""
+
+import asyncio
+import os
+import time
+from typing import List, Optional
+
+import numpy as np
+from scipy import sparse
+from sqlalchemy import text
+
+from config import get_required_env
+from models.database import engine
+from utils.bitsets import iter_bits
+from utils.logging_config import APP_LOGGER, ERROR_LOGGER
+
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+RECOMMENDATION_PATH = get_required_env(
+    "RECOMMENDATION_PATH", os.path.join(backend_dir, "data", "name_neighbours.npz")
+)
+RECOMMENDATION_NEIGHBOURS = int(get_required_env("RECOMMENDATION_NEIGHBOURS", "50"))
+# Damps similarities that rest on only a few common voters
+RECOMMENDATION_SHRINK = float(get_required_env("RECOMMENDATION_SHRINK", "10"))
+RECOMMENDATION_BLOCK_SIZE = int(get_required_env("RECOMMENDATION_BLOCK_SIZE", "1024"))
+RECOMMENDATION_RELOAD_SECONDS = int(
+    get_required_env("RECOMMENDATION_RELOAD_SECONDS", "60")
+)
+
+VOTES_SQL = text("SELECT user_id, name_id, vote FROM votes")
+FETCH_ROWS = 100_000
+
+
+def compute_neighbours(
+    user_ids: np.ndarray,
+    name_ids: np.ndarray,
+    votes: np.ndarray,
+    neighbours: int = RECOMMENDATION_NEIGHBOURS,
+    shrink: float = RECOMMENDATION_SHRINK,
+    block_size: int = RECOMMENDATION_BLOCK_SIZE,
+) -> dict:
+    """
+    Top-`neighbours` similar names per name from parallel vote arrays.
+    Returns the arrays stored in the neighbours file: `name_ids` (sorted),
+    and CSR `indptr`/`indices`/`weights` where indices point into name_ids.
+    """
+    users, user_rows = np.unique(user_ids, return_inverse=True)
+    items, item_rows = np.unique(name_ids, return_inverse=True)
+    ratings = np.where(votes, 1.0, -1.0).astype(np.float32)
+
+    # names x users, so each block of names is a slice of rows
+    X = sparse.csr_matrix(
+        (ratings, (item_rows, user_rows)), shape=(len(items), len(users))
+    )
+    X.sum_duplicates()
+    norms = np.sqrt(np.asarray(X.multiply(X).sum(axis=1)).ravel()).astype(np.float32)
+    XT = X.T.tocsr()
+
+    k = min(neighbours, max(len(items) - 1, 0))
+    indptr = np.zeros(len(items) + 1, dtype=np.int64)
+    indices: List[np.ndarray] = []
+    weights: List[np.ndarray] = []
+
+    for start in range(0, len(items), block_size):
+        stop = min(start + block_size, len(items))
+        sims = (X[start:stop] @ XT).toarray()
+        sims /= norms[start:stop, None] * norms[None, :] + shrink
+        sims[np.arange(stop - start), np.arange(start, stop)] = 0
+
+        if k:
+            top = np.argpartition(-sims, k - 1, axis=1)[:, :k]
+        else:
+            top = np.empty((stop - start, 0), dtype=np.int64)
+        top_sims = np.take_along_axis(sims, top, axis=1)
+        order = np.argsort(-top_sims, axis=1, kind="stable")
+        top = np.take_along_axis(top, order, axis=1)
+        top_sims = np.take_along_axis(top_sims, order, axis=1)
+
+        for row in range(stop - start):
+            keep = top_sims[row] > 0
+            indices.append(top[row][keep].astype(np.int32))
+            weights.append(top_sims[row][keep].astype(np.float32))
+            indptr[start + row + 1] = indptr[start + row] + int(keep.sum())
+
+    return {
+        "name_ids": items.astype(np.int32),
+        "indptr": indptr,
+        "indices": np.concatenate(indices) if indices else np.empty(0, np.int32),
+        "weights": np.concatenate(weights) if weights else np.empty(0, np.float32),
+    }
+
+
+def _load_votes():
+    """All votes as parallel (user_ids, name_ids, votes) arrays."""
+    user_ids, name_ids, votes = [], [], []
+    with engine.connect() as conn:
+        result = conn.execution_options(stream_results=True).execute(VOTES_SQL)
+        for chunk in result.partitions(FETCH_ROWS):
+            columns = np.array(chunk, dtype=np.int64).reshape(-1, 3)
+            user_ids.append(columns[:, 0])
+            name_ids.append(columns[:, 1])
+            votes.append(columns[:, 2].astype(bool))
+
+    if not user_ids:
+        return np.empty(0, np.int64), np.empty(0, np.int64), np.empty(0, bool)
+    return np.concatenate(user_ids), np.concatenate(name_ids), np.concatenate(votes)
+
+
+def build_neighbours_file(path: str = RECOMMENDATION_PATH) -> int:
+    """Recompute neighbour lists from the votes table and atomically publish
+    them at `path`. Returns the number of names with neighbours."""
+    arrays = compute_neighbours(*_load_votes())
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp.npz"
+    np.savez(tmp_path, built_at=np.array(time.time()), **arrays)
+    os.replace(tmp_path, path)
+    return int(np.count_nonzero(np.diff(arrays["indptr"])))
+
+
+class NameNeighbours:
+    """Per-process copy of the neighbours file."""
+
+    def __init__(self, path: str = RECOMMENDATION_PATH):
+        self.path = path
+        self.file_id: Optional[tuple] = None
+        self.built_at: Optional[float] = None
+        # (name_ids, indptr, indices, weights), replaced as a whole on reload
+        self._data = (
+            np.empty(0, np.int32),
+            np.zeros(1, np.int64),
+            np.empty(0, np.int32),
+            np.empty(0, np.float32),
+        )
+
+    @property
+    def available(self) -> bool:
+        return len(self._data[2]) > 0
+
+    def load(self) -> bool:
+        """(Re)load the file if it changed; returns whether it was loaded."""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return False
+        file_id = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        if file_id == self.file_id:
+            return False
+
+        with np.load(self.path) as data:
+            name_ids, indptr = data["name_ids"], data["indptr"]
+            indices, weights = data["indices"], data["weights"]
+            built_at = float(data["built_at"])
+
+        self._data = (name_ids, indptr, indices, weights)
+        self.file_id = file_id
+        self.built_at = built_at
+        APP_LOGGER.info(
+            f"Loaded {len(indices)} name neighbours for {len(name_ids)} names"
+        )
+        return True
+
+    def ranked(self, like_mask: int, dislike_mask: int) -> np.ndarray:
+        """
+        Name ids with a positive score for a user with the given vote
+        bitmasks, best first.
+        """
+        name_ids, indptr, indices, weights = self._data
+        if not len(indices):
+            return np.empty(0, np.int32)
+
+        liked = np.fromiter(iter_bits(like_mask), dtype=np.int64)
+        disliked = np.fromiter(iter_bits(dislike_mask), dtype=np.int64)
+        voted = np.concatenate([liked, disliked])
+        ratings = np.concatenate([np.ones(len(liked)), -np.ones(len(disliked))])
+
+        rows = np.searchsorted(name_ids, voted)
+        found = rows < len(name_ids)
+        found[found] = name_ids[rows[found]] == voted[found]
+        rows, ratings = rows[found], ratings[found]
+
+        # Gather every voted name's neighbour list in one go
+        starts, lengths = indptr[rows], indptr[rows + 1] - indptr[rows]
+        offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+        positions = offsets + np.arange(lengths.sum())
+        scores = np.bincount(
+            indices[positions],
+            weights=weights[positions] * np.repeat(ratings, lengths),
+            minlength=len(name_ids),
+        )
+
+        candidates = np.flatnonzero(scores > 0)
+        order = np.argsort(-scores[candidates], kind="stable")
+        return name_ids[candidates[order]]
+
+    async def run_reload_loop(self, interval: int = RECOMMENDATION_RELOAD_SECONDS):
+        """Pick up neighbour files published by the offline job."""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await asyncio.to_thread(self.load)
+            except Exception as e:
+                ERROR_LOGGER.error(f"Name neighbours reload failed: {e}")
+
+
+# Global instance
+name_neighbours = NameNeighbours()
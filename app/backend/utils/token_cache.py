@@ -0,0 +1,55 @@
+"""
+In-process cache of recently verified JWTs, so verify_token can skip the
+HMAC check and payload decoding for a token it has already accepted.
+
+Entries map the raw token to its claims and remember the secret key it was
+verified with, so rotating the key invalidates them. A token is served from
+the cache only until its `exp`; after that it goes through jwt.decode again,
+which rejects it. The TOKEN_CACHE_SIZE most recently used tokens are kept.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from config import get_required_env
+
+TOKEN_CACHE_SIZE = int(get_required_env("TOKEN_CACHE_SIZE", "10000"))
+
+
+class VerifiedTokens:
+    """LRU cache of token -> claims for tokens that passed verification."""
+
+    def __init__(self, max_entries: int = TOKEN_CACHE_SIZE):
+        self.max_entries = max_entries
+        # token -> (claims, secret key, exp timestamp or None)
+        self._entries: "OrderedDict[str, Tuple[dict, str, Optional[float]]]" = (
+            OrderedDict()
+        )
+        self._lock = threading.Lock()
+
+    def get(self, token: str, secret_key: str) -> Optional[dict]:
+        """Claims of a token verified with `secret_key` that has not expired."""
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None:
+                return None
+            claims, key, exp = entry
+            if key != secret_key or (exp is not None and exp <= time.time()):
+                del self._entries[token]
+                return None
+            self._entries.move_to_end(token)
+            return claims
+
+    def put(self, token: str, secret_key: str, claims: dict, exp: Optional[float]):
+        """Remember a token that was just verified with `secret_key`."""
+        with self._lock:
+            self._entries[token] = (claims, secret_key, exp)
+            self._entries.move_to_end(token)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+# Global instance
+token_cache = VerifiedTokens()
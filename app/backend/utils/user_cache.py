@@ -0,0 +1,100 @@
+"""
+In-process cache of users known to exist, so get_current_user can trust a
+verified token's `user_id`/`sub` claims without a `users` lookup on every
+request.
+
+A user is looked up once, then trusted for USER_CACHE_TTL_SECONDS; the
+USER_CACHE_SIZE most recently seen users are kept in LRU order. Whatever
+deletes a user must call `user_cache.invalidate(user_id)`: that bumps the
+user's slot in a shared memory-mapped epoch table (see vote_cache), so every
+gunicorn worker looks the user up again on their next request.
+"""
+
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from config import get_required_env
+from models.database import User
+from utils.vote_cache import SharedEpochs
+
+
+def _default_epochs_path() -> str:
+    shm_dir = "/dev/shm"
+    base_dir = shm_dir if os.path.isdir(shm_dir) else tempfile.gettempdir()
+    return os.path.join(base_dir, "namo_user_epochs.bin")
+
+
+USER_CACHE_SIZE = int(get_required_env("USER_CACHE_SIZE", "100000"))
+USER_CACHE_TTL_SECONDS = float(get_required_env("USER_CACHE_TTL_SECONDS", "300"))
+USER_CACHE_EPOCHS_PATH = get_required_env(
+    "USER_CACHE_EPOCHS_PATH", _default_epochs_path()
+)
+
+
+class KnownUsers:
+    """LRU/TTL cache of (user_id, username) pairs that exist in `users`."""
+
+    def __init__(
+        self,
+        max_entries: int = USER_CACHE_SIZE,
+        ttl_seconds: float = USER_CACHE_TTL_SECONDS,
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        # user_id -> (username, epoch, checked_at)
+        self._entries: "OrderedDict[int, Tuple[str, int, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._epochs: Optional[SharedEpochs] = None
+
+    @property
+    def epochs(self) -> SharedEpochs:
+        # Created lazily so importing this module never touches /dev/shm
+        if self._epochs is None:
+            self._epochs = SharedEpochs(USER_CACHE_EPOCHS_PATH)
+        return self._epochs
+
+    def exists(self, db: Session, user_id: int, username: str) -> bool:
+        """Whether the user exists, from the cache if possible."""
+        epoch = self.epochs.get(user_id)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if (
+                entry is not None
+                and entry[:2] == (username, epoch)
+                and now - entry[2] < self.ttl_seconds
+            ):
+                self._entries.move_to_end(user_id)
+                return True
+
+        # Read the epoch before the lookup so a concurrent delete wins
+        found = (
+            db.query(User.id)
+            .filter(User.id == user_id, User.username == username)
+            .first()
+        )
+        with self._lock:
+            if found is None:
+                self._entries.pop(user_id, None)
+                return False
+            self._entries[user_id] = (username, epoch, now)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return True
+
+    def invalidate(self, user_id: int):
+        """Call after a user was deleted (or renamed)."""
+        self.epochs.bump(user_id)
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+
+# Global instance
+user_cache = KnownUsers()
@@ -0,0 +1,254 @@
+"""
+In-process cache of each active user's votes as bitsets keyed by Name.id.
+
+The names routes use it to exclude voted names with a bit test instead of a
+`NOT IN (SELECT name_id FROM votes ...)` anti-join. Entries are evicted in
+LRU order once the cache exceeds its memory budget.
+
+Every gunicorn worker has its own cache, so vote writes bump a per-user
+epoch in a small shared memory-mapped table. A worker reloads a user's
+bitsets from the database whenever the epoch it cached no longer matches.
+"""
+
+import asyncio
+import fcntl
+import mmap
+import os
+import struct
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Iterable, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from config import get_required_env
+from models.database import Vote
+from utils.logging_config import ERROR_LOGGER
+
+
+def _default_epochs_path() -> str:
+    shm_dir = "/dev/shm"
+    base_dir = shm_dir if os.path.isdir(shm_dir) else tempfile.gettempdir()
+    return os.path.join(base_dir, "namo_vote_epochs.bin")
+
+
+VOTE_CACHE_MAX_MB = int(get_required_env("VOTE_CACHE_MAX_MB", "64"))
+VOTE_CACHE_EPOCHS_PATH = get_required_env(
+    "VOTE_CACHE_EPOCHS_PATH", _default_epochs_path()
+)
+
+# Users hash into this many epoch slots; collisions only cost extra reloads
+EPOCH_SLOTS = 65536
+_EPOCH = struct.Struct("<Q")
+
+
+class SharedEpochs:
+    """Per-user change counters shared by all worker processes."""
+
+    def __init__(self, path: str = VOTE_CACHE_EPOCHS_PATH, slots: int = EPOCH_SLOTS):
+        self.slots = slots
+        size = slots * _EPOCH.size
+        try:
+            self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+            if os.fstat(self._fd).st_size < size:
+                os.ftruncate(self._fd, size)
+            self._buffer = mmap.mmap(self._fd, size)
+        except OSError as e:
+            # Without the shared file other workers' writes go unnoticed
+            ERROR_LOGGER.error(f"Vote cache epochs unavailable at {path}: {e}")
+            self._fd = None
+            self._buffer = bytearray(size)
+
+    def _offset(self, user_id: int) -> int:
+        return (user_id % self.slots) * _EPOCH.size
+
+    def get(self, user_id: int) -> int:
+        return _EPOCH.unpack_from(self._buffer, self._offset(user_id))[0]
+
+    def bump(self, user_id: int) -> Tuple[int, int]:
+        """Increment a user's epoch and return (previous, new)."""
+        return self.add(user_id, 1)
+
+    def add(self, user_id: int, delta: int) -> Tuple[int, int]:
+        """Add delta to a user's counter and return (previous, new)."""
+        offset = self._offset(user_id)
+        if self._fd is not None:
+            fcntl.lockf(self._fd, fcntl.LOCK_EX, _EPOCH.size, offset)
+        try:
+            previous = _EPOCH.unpack_from(self._buffer, offset)[0]
+            new = max(previous + delta, 0)
+            _EPOCH.pack_into(self._buffer, offset, new)
+        finally:
+            if self._fd is not None:
+                fcntl.lockf(self._fd, fcntl.LOCK_UN, _EPOCH.size, offset)
+        return previous, new
+
+
+class UserVotes:
+    """Like and dislike bitsets for one user, indexed by Name.id."""
+
+    __slots__ = ("likes", "dislikes", "epoch")
+
+    def __init__(self, votes: Iterable[Tuple[int, bool]] = (), epoch: int = 0):
+        self.likes = bytearray()
+        self.dislikes = bytearray()
+        self.epoch = epoch
+        for name_id, vote in votes:
+            self.set(name_id, vote)
+
+    @property
+    def nbytes(self) -> int:
+        return len(self.likes) + len(self.dislikes)
+
+    @staticmethod
+    def _test(bits: bytearray, name_id: int) -> bool:
+        index = name_id >> 3
+        return index < len(bits) and bool(bits[index] & (1 << (name_id & 7)))
+
+    @staticmethod
+    def _assign(bits: bytearray, name_id: int, value: bool):
+        index = name_id >> 3
+        if index >= len(bits):
+            if not value:
+                return
+            bits.extend(bytes(index + 1 - len(bits)))
+        if value:
+            bits[index] |= 1 << (name_id & 7)
+        else:
+            bits[index] &= ~(1 << (name_id & 7)) & 0xFF
+
+    def has_voted(self, name_id: int) -> bool:
+        return self._test(self.likes, name_id) or self._test(self.dislikes, name_id)
+
+    def vote_of(self, name_id: int) -> Optional[bool]:
+        if self._test(self.likes, name_id):
+            return True
+        if self._test(self.dislikes, name_id):
+            return False
+        return None
+
+    def like_mask(self) -> int:
+        """Liked name ids as an int bitmask (bit n set = liked Name.id n)."""
+        return int.from_bytes(self.likes, "little")
+
+    def dislike_mask(self) -> int:
+        return int.from_bytes(self.dislikes, "little")
+
+    def set(self, name_id: int, vote: bool):
+        self._assign(self.likes, name_id, vote)
+        self._assign(self.dislikes, name_id, not vote)
+
+    def remove(self, name_id: int):
+        self._assign(self.likes, name_id, False)
+        self._assign(self.dislikes, name_id, False)
+
+
+class VoteBitsetCache:
+    """LRU cache of UserVotes, invalidated across workers via SharedEpochs."""
+
+    def __init__(self, max_bytes: int = VOTE_CACHE_MAX_MB * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[int, UserVotes]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._epochs: Optional[SharedEpochs] = None
+
+    @property
+    def epochs(self) -> SharedEpochs:
+        # Created lazily so importing this module never touches /dev/shm
+        if self._epochs is None:
+            self._epochs = SharedEpochs()
+        return self._epochs
+
+    def _cached(self, user_id: int, epoch: int) -> Optional[UserVotes]:
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and entry.epoch == epoch:
+                self._entries.move_to_end(user_id)
+                return entry
+        return None
+
+    def get(self, db: Session, user_id: int) -> UserVotes:
+        """Return the user's vote bitsets, loading them if stale or missing."""
+        # Read the epoch before loading so a concurrent write forces a reload
+        epoch = self.epochs.get(user_id)
+        entry = self._cached(user_id, epoch)
+        if entry is None:
+            rows = db.query(Vote.name_id, Vote.vote).filter(Vote.user_id == user_id)
+            entry = self._load(user_id, rows, epoch)
+        return entry
+
+    async def get_async(self, db: AsyncSession, user_id: int) -> UserVotes:
+        """get() on the async engine; the bitsets are built off the event loop."""
+        epoch = self.epochs.get(user_id)
+        entry = self._cached(user_id, epoch)
+        if entry is None:
+            rows = await db.execute(
+                select(Vote.name_id, Vote.vote).where(Vote.user_id == user_id)
+            )
+            entry = await asyncio.to_thread(self._load, user_id, rows.all(), epoch)
+        return entry
+
+    def _load(self, user_id: int, rows, epoch: int) -> UserVotes:
+        entry = UserVotes(rows, epoch=epoch)
+        with self._lock:
+            self._store(user_id, entry)
+        return entry
+
+    def _store(self, user_id: int, entry: UserVotes):
+        previous = self._entries.pop(user_id, None)
+        if previous is not None:
+            self._bytes -= previous.nbytes
+        self._entries[user_id] = entry
+        self._bytes += entry.nbytes
+        while self._bytes > self.max_bytes and len(self._entries) > 1:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= evicted.nbytes
+
+    def _apply(self, user_id: int, update):
+        """Bump the user's epoch and patch our own entry if it was current."""
+        previous, new = self.epochs.bump(user_id)
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return
+            if entry.epoch != previous:
+                # Someone else changed this user's votes too; reload next time
+                self._bytes -= self._entries.pop(user_id).nbytes
+                return
+            self._bytes -= entry.nbytes
+            update(entry)
+            entry.epoch = new
+            self._bytes += entry.nbytes
+
+    def record_vote(self, user_id: int, name_id: int, vote: bool):
+        """Call after a vote was committed."""
+        self._apply(user_id, lambda entry: entry.set(name_id, vote))
+
+    def record_votes(self, user_id: int, votes: Iterable[Tuple[int, bool]]):
+        """Call after a batch of votes was committed."""
+        votes = list(votes)
+
+        def update(entry: UserVotes):
+            for name_id, vote in votes:
+                entry.set(name_id, vote)
+
+        self._apply(user_id, update)
+
+    def record_delete(self, user_id: int, name_id: int):
+        """Call after a vote was deleted."""
+        self._apply(user_id, lambda entry: entry.remove(name_id))
+
+    def invalidate(self, user_id: int):
+        self.epochs.bump(user_id)
+        with self._lock:
+            entry = self._entries.pop(user_id, None)
+            if entry is not None:
+                self._bytes -= entry.nbytes
+
+
+# Global instance
+vote_cache = VoteBitsetCache()
@@ -0,0 +1,389 @@
+"""
+Optional write-behind queue for POST /api/votes/ (VOTE_WRITE_BEHIND=true).
+
+Accepted votes are buffered in process and a background task flushes them
+every VOTE_QUEUE_FLUSH_MS milliseconds, or as soon as VOTE_QUEUE_MAX_BATCH
+votes are waiting, with one multi-row upsert and one commit per batch
+(group commit). Repeated votes by a user for the same name coalesce.
+
+Read-your-writes: every queued vote also counts towards a per-user pending
+counter in a shared memory-mapped table, which flushes count back down.
+Reads of a user's votes first wait for that counter to reach zero, so the
+next request sees the vote no matter which gunicorn worker serves it. Each
+worker counts in its own lane of the table, and lanes of workers that died
+are ignored (see PendingVoteCounts).
+"""
+
+import asyncio
+import fcntl
+import mmap
+import os
+import tempfile
+import threading
+import time
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import Boolean, Integer, and_, func, literal, select
+from sqlalchemy.dialects.postgresql import ARRAY, insert
+from sqlalchemy.orm import Session
+
+from config import get_required_env
+from models.database import Name, SessionLocal, Vote
+from utils.leaderboard import leaderboard
+from utils.logging_config import APP_LOGGER, ERROR_LOGGER
+from utils.vote_cache import vote_cache
+from utils.vote_stats import vote_stats
+
+
+def _default_pending_path() -> str:
+    shm_dir = "/dev/shm"
+    base_dir = shm_dir if os.path.isdir(shm_dir) else tempfile.gettempdir()
+    return os.path.join(base_dir, "namo_vote_pending.bin")
+
+
+VOTE_WRITE_BEHIND = get_required_env("VOTE_WRITE_BEHIND", "false").lower() == "true"
+VOTE_QUEUE_FLUSH_MS = float(get_required_env("VOTE_QUEUE_FLUSH_MS", "5"))
+VOTE_QUEUE_MAX_BATCH = int(get_required_env("VOTE_QUEUE_MAX_BATCH", "500"))
+# Longest a read waits for a user's queued votes before serving stale data
+VOTE_QUEUE_READ_TIMEOUT_MS = float(
+    get_required_env("VOTE_QUEUE_READ_TIMEOUT_MS", "250")
+)
+VOTE_QUEUE_PENDING_PATH = get_required_env(
+    "VOTE_QUEUE_PENDING_PATH", _default_pending_path()
+)
+# Retry-After for reads answered 503 because queued votes were not written yet
+VOTE_QUEUE_RETRY_AFTER_SECONDS = 1
+# Lanes in the pending counter table: at least the number of workers per host
+VOTE_QUEUE_MAX_WORKERS = int(get_required_env("VOTE_QUEUE_MAX_WORKERS", "16"))
+
+# Users hash into this many counters per lane; collisions only cost extra waits
+PENDING_SLOTS = 4096
+_PENDING_ITEMSIZE = 4  # uint32
+
+
+def upsert_votes(db: Session, votes: Iterable[Tuple[int, int, bool]]) -> list:
+    """
+    Upsert (user_id, name_id, vote) triples with a single statement and
+    return the saved (id, user_id, name_id, vote, previous) rows, where
+    `previous` is the vote that was replaced (None for new votes). Votes for
+    names that do not exist are skipped. Each (user_id, name_id) may appear
+    only once.
+    """
+    user_ids, name_ids, values = [], [], []
+    for user_id, name_id, vote in votes:
+        user_ids.append(user_id)
+        name_ids.append(name_id)
+        values.append(vote)
+
+    items = (
+        func.unnest(
+            literal(user_ids, ARRAY(Integer)),
+            literal(name_ids, ARRAY(Integer)),
+            literal(values, ARRAY(Boolean)),
+        )
+        .table_valued("user_id", "name_id", "vote")
+        .render_derived(name="item")
+    )
+    # Sibling CTEs share the statement's snapshot: this one sees the old rows
+    previous = (
+        select(Vote.user_id, Vote.name_id, Vote.vote)
+        .join(
+            items,
+            and_(Vote.user_id == items.c.user_id, Vote.name_id == items.c.name_id),
+        )
+        .cte("previous")
+    )
+    stmt = insert(Vote).from_select(
+        ["user_id", "name_id", "vote"],
+        select(items.c.user_id, items.c.name_id, items.c.vote).join(
+            Name, Name.id == items.c.name_id
+        ),
+    )
+    saved = (
+        stmt.on_conflict_do_update(
+            constraint="unique_user_name_vote", set_={"vote": stmt.excluded.vote}
+        )
+        .returning(Vote.id, Vote.user_id, Vote.name_id, Vote.vote)
+        .cte("saved")
+    )
+    return db.execute(
+        select(saved, previous.c.vote.label("previous")).outerjoin(
+            previous,
+            and_(
+                previous.c.user_id == saved.c.user_id,
+                previous.c.name_id == saved.c.name_id,
+            ),
+        )
+    ).all()
+
+
+class VotesNotFlushed(RuntimeError):
+    """A user's queued votes were not written within the read timeout."""
+
+
+class PendingVoteCounts:
+    """
+    Per-user counts of queued votes, shared by all worker processes.
+
+    The file holds one lane of counters per worker. A worker only writes its
+    own lane and holds a POSIX record lock on it for as long as it lives;
+    the kernel drops that lock when the process exits, however it exits, so
+    readers skip lanes without a live owner and the counts of a worker that
+    was killed with votes queued never block reads. A new worker takes over
+    a free lane and zeroes it. The file descriptor is never closed, since
+    closing any descriptor of the file would drop the process's locks.
+    """
+
+    def __init__(
+        self,
+        path: str = VOTE_QUEUE_PENDING_PATH,
+        lanes: int = VOTE_QUEUE_MAX_WORKERS,
+        slots: int = PENDING_SLOTS,
+    ):
+        self.path = path
+        self.lanes = lanes
+        self.slots = slots
+        self._lock = threading.Lock()
+        self._pid: Optional[int] = None
+        self._fd: Optional[int] = None
+        self._lane = 0
+        self._counts = memoryview(bytearray(_PENDING_ITEMSIZE * slots)).cast("I")
+
+    def _ensure_lane(self):
+        # Again after a fork: record locks are not inherited by the child
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    self._claim_lane()
+                    self._pid = os.getpid()
+
+    def _claim_lane(self):
+        size = self.lanes * self.slots * _PENDING_ITEMSIZE
+        try:
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            if os.fstat(fd).st_size < size:
+                os.ftruncate(fd, size)
+            buffer = mmap.mmap(fd, size)
+        except OSError as e:
+            # Without the shared file other workers' queued votes go unnoticed
+            ERROR_LOGGER.error(f"Pending vote counts unavailable at {self.path}: {e}")
+            return
+
+        # Lane locks are single bytes past the end of the counters
+        for lane in range(self.lanes):
+            try:
+                fcntl.lockf(fd, fcntl.LOCK_EX | fcntl.LOCK_NB, 1, size + lane)
+            except OSError:
+                continue  # owned by a live worker
+            start = lane * self.slots * _PENDING_ITEMSIZE
+            buffer[start : start + self.slots * _PENDING_ITEMSIZE] = bytes(
+                self.slots * _PENDING_ITEMSIZE
+            )
+            self._fd = fd
+            self._lane = lane
+            self._counts = memoryview(buffer).cast("I")
+            return
+
+        buffer.close()
+        os.close(fd)  # holds no locks yet
+        ERROR_LOGGER.error(
+            f"No free lane in {self.path} for worker {os.getpid()}; "
+            "raise VOTE_QUEUE_MAX_WORKERS"
+        )
+
+    def _owner_alive(self, lane: int) -> bool:
+        lock_offset = self.lanes * self.slots * _PENDING_ITEMSIZE + lane
+        try:
+            fcntl.lockf(self._fd, fcntl.LOCK_SH | fcntl.LOCK_NB, 1, lock_offset)
+        except OSError:
+            return True
+        fcntl.lockf(self._fd, fcntl.LOCK_UN, 1, lock_offset)
+        return False
+
+    def add(self, user_id: int, delta: int):
+        """Add delta to this worker's count for the user."""
+        self._ensure_lane()
+        index = self._lane * self.slots + user_id % self.slots
+        with self._lock:
+            self._counts[index] = max(self._counts[index] + delta, 0)
+
+    def get(self, user_id: int) -> int:
+        """Votes queued for the user on this and every other live worker."""
+        self._ensure_lane()
+        slot = user_id % self.slots
+        if self._fd is None:
+            return self._counts[self._lane * self.slots + slot]
+
+        total = 0
+        for lane in range(self.lanes):
+            count = self._counts[lane * self.slots + slot]
+            if count and (lane == self._lane or self._owner_alive(lane)):
+                total += count
+        return total
+
+
+class VoteQueue:
+    """In-process buffer of accepted votes, flushed in group commits."""
+
+    def __init__(
+        self,
+        enabled: bool = VOTE_WRITE_BEHIND,
+        flush_ms: float = VOTE_QUEUE_FLUSH_MS,
+        max_batch: int = VOTE_QUEUE_MAX_BATCH,
+        read_timeout_ms: float = VOTE_QUEUE_READ_TIMEOUT_MS,
+    ):
+        self.enabled = enabled
+        self.flush_seconds = flush_ms / 1000
+        self.max_batch = max_batch
+        self.read_timeout_seconds = read_timeout_ms / 1000
+        self._pending: Dict[Tuple[int, int], bool] = {}
+        self._pending_users: Counter = Counter()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._counters: Optional[PendingVoteCounts] = None
+
+    @property
+    def counters(self) -> PendingVoteCounts:
+        # Created lazily so importing this module never touches /dev/shm
+        if self._counters is None:
+            self._counters = PendingVoteCounts()
+        return self._counters
+
+    def submit(self, user_id: int, name_id: int, vote: bool):
+        """Queue a vote; it is written by the next flush."""
+        with self._lock:
+            key = (user_id, name_id)
+            if key not in self._pending:
+                # Count before the vote becomes visible to a flush
+                self.counters.add(user_id, 1)
+                self._pending_users[user_id] += 1
+            self._pending[key] = vote
+            full = len(self._pending) >= self.max_batch
+        if full:
+            self._wake()
+
+    def _wake(self):
+        if self._loop is not None and self._wakeup is not None:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    def _holds_votes_of(self, user_id: int) -> bool:
+        with self._lock:
+            return self._pending_users[user_id] > 0
+
+    def _timed_out(self, user_id: int) -> VotesNotFlushed:
+        ERROR_LOGGER.error(f"Timed out waiting for queued votes of user {user_id}")
+        return VotesNotFlushed(f"Queued votes of user {user_id} are not written yet")
+
+    def wait_until_flushed(self, user_id: int):
+        """
+        Block until no worker holds unflushed votes for this user. This
+        worker's own queued votes are flushed right here; if other workers'
+        are still queued after the read timeout, VotesNotFlushed is raised
+        rather than serving a read that misses them.
+        """
+        if not self.enabled:
+            return
+        deadline = time.monotonic() + self.read_timeout_seconds
+        while True:
+            if self._holds_votes_of(user_id):
+                self.flush()
+            if self.counters.get(user_id) == 0:
+                return
+            if time.monotonic() >= deadline:
+                raise self._timed_out(user_id)
+            time.sleep(0.001)
+
+    async def wait_until_flushed_async(self, user_id: int):
+        """wait_until_flushed without blocking the event loop."""
+        if not self.enabled:
+            return
+        deadline = time.monotonic() + self.read_timeout_seconds
+        while True:
+            if self._holds_votes_of(user_id):
+                await asyncio.to_thread(self.flush)
+            if self.counters.get(user_id) == 0:
+                return
+            if time.monotonic() >= deadline:
+                raise self._timed_out(user_id)
+            await asyncio.sleep(0.001)
+
+    def flush(self) -> int:
+        """Write all queued votes in one transaction; returns votes written."""
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, {}
+                self._pending_users.clear()
+            if not batch:
+                return 0
+
+            db = SessionLocal()
+            try:
+                rows = upsert_votes(
+                    db, [(u, n, vote) for (u, n), vote in batch.items()]
+                )
+                db.commit()
+            except Exception:
+                db.rollback()
+                self._requeue(batch)
+                raise
+            finally:
+                db.close()
+
+        saved = defaultdict(list)
+        for row in rows:
+            saved[row.user_id].append((row.name_id, row.vote))
+        for user_id, user_votes in saved.items():
+            vote_cache.record_votes(user_id, user_votes)
+        leaderboard.update(
+            vote_stats.record_votes(
+                [(row.name_id, row.previous, row.vote) for row in rows]
+            )
+        )
+        for user_id, queued in Counter(u for u, _ in batch).items():
+            self.counters.add(user_id, -queued)
+
+        if len(rows) < len(batch):
+            APP_LOGGER.warning(
+                f"Dropped {len(batch) - len(rows)} queued votes for unknown names"
+            )
+        return len(rows)
+
+    def _requeue(self, batch: Dict[Tuple[int, int], bool]):
+        """Put a failed batch back, keeping any newer votes for the same name."""
+        with self._lock:
+            for (user_id, name_id), vote in batch.items():
+                key = (user_id, name_id)
+                if key in self._pending:
+                    # Superseded: the newer vote holds its own pending count
+                    self.counters.add(user_id, -1)
+                else:
+                    self._pending[key] = vote
+                    self._pending_users[user_id] += 1
+
+    async def run_flush_loop(self):
+        """Flush every few milliseconds, or early once a batch fills up."""
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await asyncio.to_thread(self.flush)
+            except Exception as e:
+                ERROR_LOGGER.error(f"Vote queue flush failed: {e}")
+
+    def drain(self):
+        """Flush whatever is left, e.g. on shutdown."""
+        written = self.flush()
+        if written:
+            APP_LOGGER.info(f"Flushed {written} queued votes on shutdown")
+
+
+# Global instance
+vote_queue = VoteQueue()
@@ -0,0 +1,275 @@
+"""
+Per-name like/dislike aggregates.
+
+The source of truth is the `name_vote_stats` table, which triggers on
+`votes` keep current (see migration 0005). Each worker holds a snapshot of
+it in two typed arrays indexed by Name.id, so adding stats to a response is
+an array lookup rather than a join or an extra query. The snapshot is loaded
+in full once, then every VOTE_STATS_REFRESH_SECONDS only the rows changed
+since the previous refresh are read (by `changed_xid`, migration 0009).
+Votes written by the worker itself are applied to its snapshot right away.
+
+A periodic reconciliation recomputes the aggregates from `votes` and fixes
+rows that drifted (e.g. after bulk loads with triggers disabled), without
+ever locking `votes`. Only one worker at a time runs it, guarded by a
+Postgres advisory lock.
+"""
+
+import asyncio
+import threading
+import time
+from array import array
+from typing import Iterable, List, Optional, Tuple
+
+from sqlalchemy import text
+
+from config import get_required_env
+from models.database import NameVoteStats, SessionLocal, engine
+from utils.logging_config import APP_LOGGER, ERROR_LOGGER
+
+VOTE_STATS_REFRESH_SECONDS = int(get_required_env("VOTE_STATS_REFRESH_SECONDS", "30"))
+VOTE_STATS_RECONCILE_SECONDS = int(
+    get_required_env("VOTE_STATS_RECONCILE_SECONDS", "86400")
+)
+
+# Arbitrary application-wide key for pg_try_advisory_lock
+RECONCILE_LOCK_KEY = 7_303_656_102
+
+# Drifted names fixed per transaction
+RECONCILE_BATCH_SIZE = 500
+
+# The triggers write name_vote_stats in the vote's own transaction, so one
+# snapshot always sees both tables consistent: no lock is needed to compare.
+DRIFTED_SQL = text(
+    """
+    SELECT coalesce(v.name_id, s.name_id) AS name_id
+    FROM (
+        SELECT name_id,
+               count(*) FILTER (WHERE vote) AS likes,
+               count(*) FILTER (WHERE NOT vote) AS dislikes
+        FROM votes
+        GROUP BY name_id
+    ) AS v
+    FULL JOIN name_vote_stats AS s ON s.name_id = v.name_id
+    WHERE (coalesce(v.likes, 0), coalesce(v.dislikes, 0))
+          IS DISTINCT FROM (coalesce(s.likes, 0), coalesce(s.dislikes, 0))
+    ORDER BY 1
+    """
+)
+
+RECHECK_SQL = [
+    # Names with votes but no stats row get one to lock
+    text(
+        """
+        INSERT INTO name_vote_stats (name_id)
+        SELECT id FROM names WHERE id = ANY(CAST(:ids AS integer[]))
+        ORDER BY id
+        ON CONFLICT (name_id) DO NOTHING
+        """
+    ),
+    # Holds off vote writes for these names only (their triggers update the
+    # same rows); in the same order as the triggers, so no deadlocks
+    text(
+        """
+        SELECT name_id FROM name_vote_stats
+        WHERE name_id = ANY(CAST(:ids AS integer[]))
+        ORDER BY name_id
+        FOR UPDATE
+        """
+    ),
+]
+
+# A new statement, so it counts every vote committed before the rows were
+# locked; votes still uncommitted are added by their triggers afterwards
+FIX_SQL = text(
+    """
+    WITH counted AS (
+        SELECT ids.name_id,
+               count(v.vote) FILTER (WHERE v.vote) AS likes,
+               count(v.vote) FILTER (WHERE NOT v.vote) AS dislikes
+        FROM unnest(CAST(:ids AS integer[])) AS ids (name_id)
+        LEFT JOIN votes AS v ON v.name_id = ids.name_id
+        GROUP BY ids.name_id
+    )
+    UPDATE name_vote_stats AS s
+    SET likes = c.likes, dislikes = c.dislikes
+    FROM counted AS c
+    WHERE s.name_id = c.name_id
+      AND (s.likes, s.dislikes) IS DISTINCT FROM (c.likes, c.dislikes)
+    """
+)
+
+
+def reconcile_name_vote_stats() -> Optional[int]:
+    """
+    Recompute name_vote_stats from votes and fix rows that differ. Returns
+    the number of corrected rows, or None if another worker holds the lock.
+    """
+    # One connection throughout: the advisory lock belongs to the session
+    with engine.connect() as conn:
+        locked = conn.execute(
+            text("SELECT pg_try_advisory_lock(:key)"), {"key": RECONCILE_LOCK_KEY}
+        ).scalar()
+        conn.commit()
+        if not locked:
+            return None
+
+        try:
+            drifted = [name_id for (name_id,) in conn.execute(DRIFTED_SQL)]
+            conn.commit()
+
+            fixed = 0
+            for start in range(0, len(drifted), RECONCILE_BATCH_SIZE):
+                ids = drifted[start : start + RECONCILE_BATCH_SIZE]
+                try:
+                    for statement in RECHECK_SQL:
+                        conn.execute(statement, {"ids": ids})
+                    fixed += conn.execute(FIX_SQL, {"ids": ids}).rowcount
+                    conn.commit()
+                except Exception:
+                    conn.rollback()
+                    raise
+            return fixed
+        finally:
+            conn.execute(
+                text("SELECT pg_advisory_unlock(:key)"), {"key": RECONCILE_LOCK_KEY}
+            )
+            conn.commit()
+
+
+class VoteStatsSnapshot:
+    """Per-process copy of name_vote_stats, indexed by Name.id."""
+
+    def __init__(self):
+        # (likes, dislikes), replaced as a pair so readers never mix snapshots
+        self._stats: Tuple[array, array] = (array("i"), array("i"))
+        self.refreshed_at: Optional[float] = None
+        # xmin of the previous refresh's snapshot, None before the full load
+        self._horizon: Optional[str] = None
+        self._write_lock = threading.Lock()
+
+    def get(self, name_id: int) -> Tuple[int, int]:
+        """(likes, dislikes) for a name as of the last refresh."""
+        likes, dislikes = self._stats
+        if name_id < len(likes):
+            return likes[name_id], dislikes[name_id]
+        return 0, 0
+
+    def record_votes(
+        self, changes: Iterable[Tuple[int, Optional[bool], Optional[bool]]]
+    ) -> List[Tuple[int, int, int]]:
+        """
+        Apply (name_id, previous, vote) changes made by this worker, where
+        None means "no vote", so the snapshot does not lag behind its own
+        writes until the next refresh. Returns the updated
+        (name_id, likes, dislikes) of every changed name.
+        """
+        updated = []
+        with self._write_lock:
+            likes, dislikes = self._stats
+            for name_id, previous, vote in changes:
+                if previous == vote:
+                    continue
+                if name_id >= len(likes):
+                    grow = name_id + 1 - len(likes)
+                    likes = likes + array("i", bytes(4 * grow))
+                    dislikes = dislikes + array("i", bytes(4 * grow))
+                    self._stats = (likes, dislikes)
+                if previous is not None:
+                    if previous:
+                        likes[name_id] = max(likes[name_id] - 1, 0)
+                    else:
+                        dislikes[name_id] = max(dislikes[name_id] - 1, 0)
+                if vote is not None:
+                    if vote:
+                        likes[name_id] += 1
+                    else:
+                        dislikes[name_id] += 1
+                updated.append((name_id, likes[name_id], dislikes[name_id]))
+        return updated
+
+    def refresh(self):
+        """
+        Load the snapshot from name_vote_stats: the whole table the first
+        time, afterwards only the rows changed since the previous refresh.
+        """
+        db = SessionLocal()
+        try:
+            # A change the previous refresh could not see yet was made by a
+            # transaction at least as new as the xmin of its snapshot
+            horizon = db.execute(
+                text("SELECT pg_snapshot_xmin(pg_current_snapshot())::text")
+            ).scalar()
+            query = db.query(
+                NameVoteStats.name_id, NameVoteStats.likes, NameVoteStats.dislikes
+            )
+            if self._horizon is None:
+                self._stats = self._load(query.yield_per(10000))
+            else:
+                changed = (
+                    query.filter(
+                        text("name_vote_stats.changed_xid >= CAST(:horizon AS xid8)")
+                    )
+                    .params(horizon=self._horizon)
+                    .all()
+                )
+                self._store(changed)
+        finally:
+            db.close()
+
+        self._horizon = horizon
+        self.refreshed_at = time.time()
+
+    @staticmethod
+    def _load(rows: Iterable[Tuple[int, int, int]]) -> Tuple[array, array]:
+        likes = array("i")
+        dislikes = array("i")
+        for name_id, name_likes, name_dislikes in rows:
+            if name_id >= len(likes):
+                grow = max(name_id + 1, 2 * len(likes)) - len(likes)
+                zeros = array("i", bytes(4 * grow))
+                likes.extend(zeros)
+                dislikes.extend(zeros)
+            likes[name_id] = name_likes
+            dislikes[name_id] = name_dislikes
+        return likes, dislikes
+
+    def _store(self, rows: List[Tuple[int, int, int]]):
+        """Overwrite (name_id, likes, dislikes) rows in the current snapshot."""
+        if not rows:
+            return
+        with self._write_lock:
+            likes, dislikes = self._stats
+            top = max(name_id for name_id, _, _ in rows)
+            if top >= len(likes):
+                grow = top + 1 - len(likes)
+                likes = likes + array("i", bytes(4 * grow))
+                dislikes = dislikes + array("i", bytes(4 * grow))
+                self._stats = (likes, dislikes)
+            for name_id, name_likes, name_dislikes in rows:
+                likes[name_id] = name_likes
+                dislikes[name_id] = name_dislikes
+
+    async def run_refresh_loop(self, interval: int = VOTE_STATS_REFRESH_SECONDS):
+        """Periodically reload the snapshot."""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await asyncio.to_thread(self.refresh)
+            except Exception as e:
+                ERROR_LOGGER.error(f"Vote stats refresh failed: {e}")
+
+    async def run_reconcile_loop(self, interval: int = VOTE_STATS_RECONCILE_SECONDS):
+        """Periodically correct drift in name_vote_stats."""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                fixed = await asyncio.to_thread(reconcile_name_vote_stats)
+                if fixed:
+                    APP_LOGGER.warning(f"Reconciled {fixed} drifted name vote stats")
+            except Exception as e:
+                ERROR_LOGGER.error(f"Vote stats reconciliation failed: {e}")
+
+
+# Global instance
+vote_stats = VoteStatsSnapshot()
@@ -0,0 +1,188 @@
+"""
+Weighted sampling without replacement for /api/names/random.
+
+Alias tables (Vose's method) are precomputed per catalog and filter, so a
+single weighted draw costs O(1) regardless of how many names the catalog
+holds. Filters come from the client, so only the WEIGHTED_SAMPLER_MAX_TABLES
+most recently used tables are kept. Drawing n distinct names rejects repeats
+and excluded (already voted) names; if rejections pile up because most of the
+weight is excluded, the remaining draws fall back to an exact O(N) pass.
+"""
+
+import heapq
+import math
+import random
+import threading
+from array import array
+from collections import OrderedDict
+from typing import Callable, List, Optional, Sequence, Tuple
+
+from config import get_required_env
+
+# Rejected draws allowed per requested name before switching to the exact pass
+MAX_ATTEMPTS_PER_NAME = 32
+
+# Filters (gender x source combinations) with a cached alias table
+WEIGHTED_SAMPLER_MAX_TABLES = int(get_required_env("WEIGHTED_SAMPLER_MAX_TABLES", "64"))
+
+
+def weighted_sample_without_replacement(
+    items: Sequence, weights: Sequence[float], n: int, rng=random
+) -> list:
+    """
+    Exact weighted sampling without replacement (Efraimidis-Spirakis).
+    Every item gets the key -ln(u)/w and the n smallest keys win. Items with
+    a zero weight are only returned once all weighted items are taken.
+    """
+    if len(items) <= n:
+        return list(items)
+
+    def key(index: int) -> Tuple[float, float]:
+        weight = weights[index]
+        u = 1.0 - rng.random()  # (0, 1], avoids log(0)
+        if weight > 0:
+            return (-math.log(u) / weight, 0.0)
+        return (math.inf, u)
+
+    keyed = [(key(index), index) for index in range(len(items))]
+    return [items[index] for _, index in heapq.nsmallest(n, keyed)]
+
+
+class AliasTable:
+    """O(1) weighted draws over a fixed set of rows."""
+
+    def __init__(self, rows: Sequence[int], weights: Sequence[float]):
+        self.rows = array("i")
+        self.zero_weight_rows = array("i")
+        positive = []
+        for row, weight in zip(rows, weights):
+            if weight > 0:
+                self.rows.append(row)
+                positive.append(float(weight))
+            else:
+                self.zero_weight_rows.append(row)
+
+        size = len(self.rows)
+        self.prob = array("d", bytes(8 * size))
+        self.alias = array("i", bytes(4 * size))
+        self.weights = array("d", positive)
+        if size == 0:
+            return
+
+        total = math.fsum(positive)
+        scaled = [weight * size / total for weight in positive]
+        small = [i for i, p in enumerate(scaled) if p < 1.0]
+        large = [i for i, p in enumerate(scaled) if p >= 1.0]
+
+        while small and large:
+            s = small.pop()
+            l = large.pop()
+            self.prob[s] = scaled[s]
+            self.alias[s] = l
+            scaled[l] = (scaled[l] + scaled[s]) - 1.0
+            (small if scaled[l] < 1.0 else large).append(l)
+
+        # Leftovers are 1.0 up to floating point error
+        for i in large + small:
+            self.prob[i] = 1.0
+            self.alias[i] = i
+
+    def __len__(self) -> int:
+        return len(self.rows) + len(self.zero_weight_rows)
+
+    def draw(self, rng=random) -> int:
+        """Draw one row with probability proportional to its weight."""
+        u = rng.random() * len(self.rows)
+        slot = int(u)
+        if u - slot < self.prob[slot]:
+            return self.rows[slot]
+        return self.rows[self.alias[slot]]
+
+    def sample(
+        self,
+        n: int,
+        is_excluded: Optional[Callable[[int], bool]] = None,
+        rng=random,
+    ) -> List[int]:
+        """
+        Draw up to n distinct rows without replacement, skipping excluded
+        rows. Returns fewer than n rows only if fewer are eligible.
+        """
+        selected: List[int] = []
+        seen = set()
+
+        if self.rows:
+            attempts = 0
+            max_attempts = n * MAX_ATTEMPTS_PER_NAME
+            while len(selected) < n and attempts < max_attempts:
+                attempts += 1
+                row = self.draw(rng)
+                if row in seen or (is_excluded and is_excluded(row)):
+                    continue
+                seen.add(row)
+                selected.append(row)
+
+        if len(selected) < n:
+            selected += self._exact_remainder(n - len(selected), seen, is_excluded, rng)
+
+        return selected
+
+    def _exact_remainder(
+        self,
+        k: int,
+        seen: set,
+        is_excluded: Optional[Callable[[int], bool]],
+        rng,
+    ) -> List[int]:
+        """Draw the last k rows with an exact pass over the eligible rows."""
+        rows, weights = [], []
+        for row, weight in zip(self.rows, self.weights):
+            if row not in seen and not (is_excluded and is_excluded(row)):
+                rows.append(row)
+                weights.append(weight)
+        for row in self.zero_weight_rows:
+            if not (is_excluded and is_excluded(row)):
+                rows.append(row)
+                weights.append(0.0)
+        return weighted_sample_without_replacement(rows, weights, k, rng)
+
+
+class WeightedSampler:
+    """LRU cache of alias tables per gender/source filter for the current catalog."""
+
+    def __init__(self, max_tables: int = WEIGHTED_SAMPLER_MAX_TABLES):
+        self.max_tables = max_tables
+        self._catalog_id = None
+        self._tables: "OrderedDict[tuple, AliasTable]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def table_for(
+        self, catalog, genders: Optional[List[str]], source_ids: Optional[set] = None
+    ) -> AliasTable:
+        """Alias table over the catalog rows matching `genders` and `source_ids`."""
+        gender_key = tuple(sorted(set(genders or [])))
+        source_key = None if source_ids is None else tuple(sorted(source_ids))
+        key = (gender_key, source_key)
+        with self._lock:
+            if catalog.file_id != self._catalog_id:
+                self._catalog_id = catalog.file_id
+                self._tables.clear()
+            table = self._tables.get(key)
+            if table is not None:
+                self._tables.move_to_end(key)
+                return table
+
+        # Only reads the requested sources' rows, see NameCatalog.rows_matching
+        rows = catalog.rows_matching(list(gender_key), source_ids)
+        counts = catalog.counts
+        table = AliasTable(rows, [max(counts[row], 0) for row in rows])
+        with self._lock:
+            if catalog.file_id == self._catalog_id:
+                self._tables[key] = table
+                while len(self._tables) > self.max_tables:
+                    self._tables.popitem(last=False)
+        return table
+
+
+# Global instance
+weighted_sampler = WeightedSampler()
@@ -1,5 +1,5 @@
 import axios from 'axios'
-import type { VoteCreate, VoteWithName } from '@/types'
+import type { VoteBatchResponse, VoteCreate, VotePage } from '@/types'
 
 export const useVoteService = () => {
   const submitVote = async (vote: VoteCreate) => {
@@ -7,17 +7,33 @@ export const useVoteService = () => {
     return response.data
   }
 
-  const getVotes = async (vote?: boolean, skip = 0, limit = 100): Promise<VoteWithName[]> => {
-    const params: any = { skip, limit }
-    if (vote !== undefined) {
+  const submitVotes = async (votes: VoteCreate[]): Promise<VoteBatchResponse> => {
+    const response = await axios.post('/api/votes/batch', { votes })
+    return response.data
+  }
+
+  const getVotes = async (
+    vote?: boolean,
+    cursor: string | null = null,
+    limit = 100,
+    includeCounts = false
+  ): Promise<VotePage> => {
+    const params: any = { limit }
+    if (cursor) {
+      params.cursor = cursor
+    } else if (vote !== undefined) {
       params.vote = vote
     }
+    if (includeCounts) {
+      params.include_counts = true
+    }
     const response = await axios.get('/api/votes/', { params })
     return response.data
   }
 
   return {
     submitVote,
+    submitVotes,
     getVotes
   }
 }
@@ -1,7 +1,7 @@
 import { defineStore } from 'pinia'
 import { ref } from 'vue'
 
-export type SortOrder = 'random' | 'most_popular' | 'least_popular'
+export type SortOrder = 'random' | 'most_popular' | 'least_popular' | 'recommended'
 export type Gender = 'male' | 'female'
 
 export const usePreferencesStore = defineStore('preferences', () => {
@@ -14,7 +14,7 @@ export const usePreferencesStore = defineStore('preferences', () => {
     const savedSortOrder = localStorage.getItem('sortOrder')
     const savedGenders = localStorage.getItem('selectedGenders')
 
-    if (savedSortOrder && ['random', 'most_popular', 'least_popular'].includes(savedSortOrder)) {
+    if (savedSortOrder && ['random', 'most_popular', 'least_popular', 'recommended'].includes(savedSortOrder)) {
       sortOrder.value = savedSortOrder as SortOrder
     }
 
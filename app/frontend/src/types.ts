@@ -19,6 +19,16 @@ export interface VoteResponse {
   vote: boolean
 }
 
+export interface VoteBatchResult extends VoteCreate {
+  id: number | null
+  status: 'saved' | 'not_found'
+}
+
+export interface VoteBatchResponse {
+  saved: number
+  results: VoteBatchResult[]
+}
+
 export interface VoteWithName {
   id: number
   name_id: number
@@ -26,6 +36,18 @@ export interface VoteWithName {
   name: NameResponse
 }
 
+export interface VoteCounts {
+  total: number
+  likes: number
+  dislikes: number
+}
+
+export interface VotePage {
+  items: VoteWithName[]
+  next_cursor: string | null
+  counts?: VoteCounts | null
+}
+
 export interface LoginRequest {
   username: string
   password: string